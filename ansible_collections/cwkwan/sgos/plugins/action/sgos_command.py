@@ -0,0 +1,156 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import re
+
+from ansible.errors import AnsibleError
+from ansible.parsing.mod_args import ModuleArgsParser
+from ansible.plugins.action.normal import ActionModule as _ActionModule
+from ansible.template import Templar
+from ansible_collections.cwkwan.sgos.plugins.cliconf.sgos import READ_ONLY_COMMAND_RE
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import run_commands, profiled
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos_action import ModuleExit, TaskModule
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_command
+
+
+# a template that only references a variable, an attribute or an index of it
+SIMPLE_TEMPLATE_RE = re.compile(r"{{\s*([A-Za-z_]\w*)(?:\.[A-Za-z_]\w*|\[\d+\]|\['[^'{}]*'\])*\s*}}")
+TEMPLATE_RE = re.compile(r'{{|{%|{#')
+
+# responses of the items of a looped task that were run in one go, by task
+# and host; the items of a loop run one after another in the same worker
+BATCHES = dict()
+
+
+def is_simple(data):
+    """Returns True when data is literal or only references variables
+
+    Filters, tests, lookups and omit are left to the task executor, the
+    items of a loop using them are not batched.
+    """
+    if isinstance(data, dict):
+        return all(is_simple(key) and is_simple(value) for key, value in data.items())
+    if isinstance(data, list):
+        return all(is_simple(value) for value in data)
+    if not isinstance(data, str):
+        return True
+    if any(match.group(1) == 'omit' for match in SIMPLE_TEMPLATE_RE.finditer(data)):
+        return False
+    return not TEMPLATE_RE.search(SIMPLE_TEMPLATE_RE.sub('', data))
+
+
+class Batch(object):
+    """The commands and responses of every item of a loop"""
+
+    def __init__(self, commands, responses):
+        self.commands = commands
+        self.responses = responses
+        self.position = 0
+
+    def next(self, commands):
+        """Returns the responses of the next item, or None when its commands differ from the batch
+
+        Once an item differs the remaining items are not taken from the batch
+        either, they run one by one.
+        """
+        if self.position >= len(self.commands) or self.commands[self.position] != commands:
+            self.position = len(self.commands)
+            return None
+        responses = self.responses[self.position]
+        self.responses[self.position] = None
+        self.position += 1
+        return responses
+
+
+class ActionModule(_ActionModule):
+
+    def run(self, tmp=None, task_vars=None):
+        del tmp  # tmp no longer has any effect
+
+        socket_path = getattr(self._connection, 'socket_path', None)
+        if not socket_path or self._task.async_val:
+            return super(ActionModule, self).run(task_vars=task_vars)
+
+        self._supports_check_mode = False
+        super(_ActionModule, self).run(task_vars=task_vars)
+
+        # the module only talks to the persistent connection, run it here
+        # instead of shipping it to a new python process
+        try:
+            module = TaskModule(sgos_command.ARGUMENT_SPEC, self._task.args, socket_path)
+            responses = self._batched_responses(module, task_vars)
+        except ModuleExit as e:
+            return e.result
+
+        if responses is None:
+            return module.run(sgos_command.run_module)
+        return dict(changed=False, warnings=list(), stdout=responses, stdout_lines=list(sgos_command.to_lines(responses)))
+
+    def _batched_responses(self, module, task_vars):
+        """Returns the responses of the current loop item from a batch of all items
+
+        The first item of a loop runs the commands of all items in a single
+        call, so they share one round trip to the persistent connection and
+        can be spread over its shell channels. Only loops of show commands
+        without wait_for, conditions and loop_control, whose loop and
+        arguments are literal or plain variable references, are batched.
+        Other tasks return None and run item by item.
+        """
+        loop_var = task_vars.get('ansible_loop_var')
+        if not loop_var or module.params['wait_for']:
+            return None
+
+        key = (self._task._uuid, task_vars.get('inventory_hostname'))
+        if key not in BATCHES:
+            # the first item, None when the loop cannot be batched
+            BATCHES[key] = self._run_batch(module, task_vars, loop_var)
+        batch = BATCHES[key]
+        if batch is None:
+            return None
+        return batch.next(sgos_command.parse_commands(module))
+
+    def _run_batch(self, module, task_vars, loop_var):
+        if (self._task.loop_with or self._task.loop_control or self._task.when or self._task.until or
+                not isinstance(self._task._ds, dict) or not is_simple(self._task.loop)):
+            return None
+
+        try:
+            args = ModuleArgsParser(task_ds=self._task._ds,
+                                    collection_list=self._task.collections).parse(skip_action_validation=True)[1]
+            if '_variable_params' in args or not is_simple(args):
+                return None
+            variables = dict(task_vars)
+            variables.pop(loop_var, None)
+            templar = Templar(loader=self._loader, variables=variables)
+            items = templar.template(self._task.loop)
+            if not isinstance(items, list) or len(items) < 2:
+                return None
+
+            commands = list()
+            for item in items:
+                variables[loop_var] = item
+                templar.available_variables = variables
+                item_module = TaskModule(sgos_command.ARGUMENT_SPEC, templar.template(args), module._socket_path)
+                if item_module.params['wait_for']:
+                    return None
+                commands.append(sgos_command.parse_commands(item_module))
+        except (AnsibleError, ModuleExit):
+            return None
+
+        if not all(READ_ONLY_COMMAND_RE.match(cmd['command']) and not cmd.get('prompt')
+                   for item_commands in commands for cmd in item_commands):
+            return None
+
+        run_batch = profiled('sgos_command')(
+            lambda module: run_commands(module, [cmd for item_commands in commands for cmd in item_commands]))
+        responses = module.run(run_batch)
+        if isinstance(responses, dict):
+            # run_commands failed, let every item report its own error
+            return None
+
+        batch = list()
+        for item_commands in commands:
+            batch.append(responses[:len(item_commands)])
+            responses = responses[len(item_commands):]
+        return Batch(commands, batch)
@@ -2,7 +2,59 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import hashlib
+import json
+import os
+import tempfile
+
+from ansible import constants as C
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_bytes
 from ansible.plugins.action.network import ActionModule as ActionNetworkModule
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_config
+
+
+# commands of the rendered src files parsed by this worker, by checksum
+CANDIDATES = dict()
+
+
+def candidate_commands(contents, cache_dir=None):
+    """Returns the commands of a rendered src file
+
+    The commands are parsed once per distinct content. Every host of a play
+    runs the task in its own worker process, so the commands are also kept as
+    JSON in ``cache_dir`` for the workers of the other hosts.
+    """
+    key = hashlib.sha256(to_bytes(contents, errors='surrogate_or_strict')).hexdigest()
+    if key in CANDIDATES:
+        return CANDIDATES[key]
+
+    path = os.path.join(cache_dir, '%s.json' % key) if cache_dir else None
+    commands = None
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                commands = json.load(f)
+        except (IOError, OSError, ValueError):
+            pass
+
+    if commands is None:
+        commands = sgos_config.parse_src(contents)
+        if path:
+            try:
+                if not os.path.isdir(cache_dir):
+                    os.makedirs(cache_dir)
+                # written under a temporary name first, the workers of
+                # other hosts may read it at any time
+                fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(commands, f)
+                os.rename(tmp_path, path)
+            except (IOError, OSError):
+                pass
+
+    CANDIDATES[key] = commands
+    return commands
 
 
 class ActionModule(ActionNetworkModule):
@@ -11,5 +63,20 @@ class ActionModule(ActionNetworkModule):
         del tmp  # tmp no longer has any effect
 
         self._config_module = True
-        return super(ActionModule, self).run(task_vars=task_vars)
+        if not self._task.args.get('src') or self._task.args.get('lines') or self._task.args.get('commands'):
+            return super(ActionModule, self).run(task_vars=task_vars)
+
+        try:
+            self._handle_src_option()
+        except AnsibleError as e:
+            return {'failed': True, 'msg': e.message, 'changed': False}
+
+        # the module loads the parsed commands as lines instead of parsing
+        # the file again on every host
+        commands = candidate_commands(self._task.args['src'], os.path.join(C.DEFAULT_LOCAL_TMP, 'sgos_config'))
+        if commands:
+            del self._task.args['src']
+            self._task.args['lines'] = commands
 
+        # src is rendered already, skip the src handling of ActionNetworkModule
+        return super(ActionNetworkModule, self).run(task_vars=task_vars)
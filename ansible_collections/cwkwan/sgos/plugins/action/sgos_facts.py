@@ -0,0 +1,26 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.plugins.action.normal import ActionModule as _ActionModule
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos_action import ModuleExit, TaskModule
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_facts
+
+
+class ActionModule(_ActionModule):
+
+    def run(self, tmp=None, task_vars=None):
+        del tmp  # tmp no longer has any effect
+
+        socket_path = getattr(self._connection, 'socket_path', None)
+        if not socket_path or self._task.async_val:
+            return super(ActionModule, self).run(task_vars=task_vars)
+
+        # the module only talks to the persistent connection, run it here
+        # instead of shipping it to a new python process
+        try:
+            module = TaskModule(sgos_facts.ARGUMENT_SPEC, self._task.args, socket_path,
+                                check_mode=self._play_context.check_mode)
+        except ModuleExit as e:
+            return e.result
+        return module.run(sgos_facts.run_module)
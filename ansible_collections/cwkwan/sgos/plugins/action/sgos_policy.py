@@ -0,0 +1,100 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import socket
+import threading
+import uuid
+
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.six.moves import BaseHTTPServer, socketserver
+from ansible.plugins.action.network import ActionModule as ActionNetworkModule
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import policy_checksum
+
+
+class PolicyHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.requests.append(self.client_address[0])
+        if self.path == self.server.path:
+            status, body = 200, self.server.content
+        else:
+            status, body = 404, b'Not Found'
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PolicyServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Serves one file under a random path until it is closed"""
+
+    daemon_threads = True
+
+    def __init__(self, content, name, address='', port=0):
+        BaseHTTPServer.HTTPServer.__init__(self, (address, port), PolicyHandler)
+        self.content = content
+        self.path = '/%s/%s' % (uuid.uuid4().hex, name)
+        self.requests = list()
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def url(self, address):
+        return 'http://%s:%d%s' % (address, self.server_address[1], self.path)
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+
+def local_address(remote_addr):
+    """Returns the address of the interface the control host reaches ``remote_addr`` over"""
+    # connecting a datagram socket only selects the route, nothing is sent
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect((remote_addr, 22))
+        return sock.getsockname()[0]
+    finally:
+        sock.close()
+
+
+class ActionModule(ActionNetworkModule):
+
+    def run(self, tmp=None, task_vars=None):
+        del tmp  # tmp no longer has any effect
+
+        if not self._task.args.get('src'):
+            return super(ActionModule, self).run(task_vars=task_vars)
+        if self._task.args.get('url'):
+            return {'failed': True, 'msg': 'parameters are mutually exclusive: src|url', 'changed': False}
+
+        try:
+            self._handle_src_option()
+            serve_address = self._task.args.pop('serve_address', None) or local_address(self._play_context.remote_addr)
+        except (AnsibleError, socket.error) as e:
+            return {'failed': True, 'msg': to_text(e), 'changed': False}
+
+        content = to_bytes(self._task.args.pop('src'), errors='surrogate_or_strict')
+        policy = self._task.args.get('policy') or 'local'
+        try:
+            server = PolicyServer(content, '%s.txt' % policy, serve_address, self._task.args.pop('serve_port', None) or 0)
+        except socket.error as e:
+            return {'failed': True, 'msg': 'unable to serve src on %s: %s' % (serve_address, to_text(e)), 'changed': False}
+
+        try:
+            self._task.args['url'] = server.url(serve_address)
+            self._task.args['checksum'] = policy_checksum(content)
+            result = super(ActionModule, self).run(task_vars=task_vars)
+        finally:
+            server.close()
+
+        result['downloads'] = len(server.requests)
+        return result
@@ -19,16 +19,22 @@ notes:
 
 import re
 import json
+import time
 
+from collections import OrderedDict
 from itertools import chain
 from functools import wraps
 
 from ansible.errors import AnsibleError, AnsibleConnectionFailure
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.network.common.utils import to_list
 from ansible.plugins.cliconf import CliconfBase
 
 
+# commands that can run on any shell channel of the connection
+READ_ONLY_COMMAND_RE = re.compile(r'^\s*show\b', re.I)
+
+
 def exit_conf_first(func):
     @wraps(func)
     def wrapped(self, *args, **kwargs):
@@ -49,8 +55,70 @@ def exit_conf_last(func):
     return wrapped
 
 
+class ResponseCache(object):
+    """Least recently used command responses, each valid for ``ttl`` seconds"""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key, now=None):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[0] < (now or time.time()):
+            return None
+        self._entries[key] = entry
+        return entry[1]
+
+    def put(self, key, response, now=None):
+        self._entries.pop(key, None)
+        self._entries[key] = ((now or time.time()) + self.ttl, response)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
 class Cliconf(CliconfBase):
 
+    def __init__(self, *args, **kwargs):
+        super(Cliconf, self).__init__(*args, **kwargs)
+        self._cache = None
+        self._cache_patterns = None
+        self._cache_prompt = None
+
+    def _response_cache(self):
+        """Returns the response cache, or None when the response_cache option is empty"""
+        patterns = tuple(self._connection.get_option('response_cache') or ())
+        if not patterns:
+            self._cache = None
+            return None
+
+        if self._cache is None or patterns != tuple(p.pattern for p in self._cache_patterns):
+            self._cache = ResponseCache(self._connection.get_option('response_cache_size'),
+                                        self._connection.get_option('response_cache_ttl'))
+            self._cache_patterns = [re.compile(pattern) for pattern in patterns]
+
+        prompt = self._connection.get_prompt()
+        if prompt != self._cache_prompt:
+            # entering or leaving enable or configuration mode
+            self._cache.clear()
+            self._cache_prompt = prompt
+        return self._cache
+
+    def _cache_key(self, command, prompt=None, answer=None, sendonly=False):
+        """Returns the cache key of a command, or None when its response must not be cached"""
+        if prompt or answer or sendonly:
+            return None
+        command = ' '.join(to_text(command, errors='surrogate_or_strict').split())
+        if any(pattern.search(command) for pattern in self._cache_patterns):
+            return command
+        return None
+
     def get_device_info(self):
         device_info = {}
 
@@ -90,6 +158,9 @@ class Cliconf(CliconfBase):
         sendonly = False
         eof_marker = '_EOF'
 
+        if self._cache is not None:
+            self._cache.clear()
+
         self.send_command('configure terminal')
 
         for cmd in chain(to_list(command)):
@@ -129,7 +200,73 @@ class Cliconf(CliconfBase):
 
     @exit_conf_first
     def get(self, command, prompt=None, answer=None, sendonly=False, newline=True, check_all=False):
-        return self.send_command(command=command, prompt=prompt, answer=answer, sendonly=sendonly, newline=newline, check_all=check_all)
+        cache = self._response_cache()
+        key = None
+        if cache is not None:
+            key = self._cache_key(command, prompt, answer, sendonly)
+            response = cache.get(key) if key else None
+            if response is not None:
+                return response
+            if key is None and (prompt or not READ_ONLY_COMMAND_RE.match(to_text(command, errors='surrogate_or_strict'))):
+                cache.clear()
+
+        response = self.send_command(command=command, prompt=prompt, answer=answer, sendonly=sendonly, newline=newline, check_all=check_all)
+        if key:
+            cache.put(key, response)
+        return response
+
+    @exit_conf_first
+    def run_commands(self, commands=None, check_rc=True):
+        if commands is None:
+            raise ValueError("'commands' value is required")
+
+        commands = [cmd if isinstance(cmd, dict) else dict(command=cmd) for cmd in to_list(commands)]
+
+        cache = self._response_cache()
+        keys = [None] * len(commands)
+        responses = [None] * len(commands)
+        if cache is not None:
+            if all(READ_ONLY_COMMAND_RE.match(cmd['command']) and not cmd.get('prompt') for cmd in commands):
+                keys = [self._cache_key(cmd['command']) for cmd in commands]
+                responses = [cache.get(key) if key else None for key in keys]
+            else:
+                # the batch may change what the cached commands return
+                cache.clear()
+
+        pending = [index for index, response in enumerate(responses) if response is None]
+        parallel = len(pending) > 1 and hasattr(self._connection, 'send_parallel') and all(
+            READ_ONLY_COMMAND_RE.match(commands[index]['command']) and not commands[index].get('prompt')
+            for index in pending)
+
+        if parallel:
+            results = self._connection.send_parallel([to_bytes(commands[index]['command'], errors='surrogate_or_strict')
+                                                      for index in pending])
+            for index, response in zip(pending, results):
+                if isinstance(response, AnsibleConnectionFailure):
+                    if check_rc:
+                        raise response
+                    response = to_text(response, errors='surrogate_or_strict')
+                elif keys[index]:
+                    cache.put(keys[index], response)
+                responses[index] = response
+        else:
+            for index in pending:
+                cmd = commands[index]
+                try:
+                    response = self.send_command(command=cmd['command'], prompt=cmd.get('prompt'), answer=cmd.get('answer'))
+                except AnsibleConnectionFailure as e:
+                    if check_rc:
+                        raise
+                    response = to_text(e, errors='surrogate_or_strict')
+                else:
+                    if keys[index]:
+                        cache.put(keys[index], response)
+                responses[index] = to_text(response, errors='surrogate_or_strict')
+
+        return responses
+
+    def get_base_rpc(self):
+        return super(Cliconf, self).get_base_rpc() + ['run_commands']
 
     def get_capabilities(self):
         result = super(Cliconf, self).get_capabilities()
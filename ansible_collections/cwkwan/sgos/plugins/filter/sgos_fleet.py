@@ -0,0 +1,224 @@
+#
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+filter: sgos_fleet
+short_description: Aggregate parsed SGOS records across a fleet of devices
+description:
+  - Turns per host SGOS records, such as registered C(sgos_stats) or
+    C(sgos_facts) results, into columns and runs sum, percentile and top-N
+    operations over them.
+  - Records are given either as a mapping of host name to record (for
+    example C(hostvars)) or as a list of records. Records in a list are
+    named by their C(inventory_hostname) key or by their position.
+  - Values are selected with a dotted path, e.g.
+    C(sgos_stats.counters.cpu.Total CPU utilization).
+  - Uses NumPy when it is installed and falls back to pure Python otherwise.
+version_added: "2.9"
+notes:
+  - Tested against Ansible 2.9.1
+"""
+
+EXAMPLES = """
+# Total HTTP requests per second over all proxies
+- debug:
+    msg: "{{ hostvars | sgos_sum('stats.rates.http.Requests') }}"
+
+# Total client connections per site
+- debug:
+    msg: "{{ hostvars | sgos_sum('stats.counters.http.Client connections', by='site') }}"
+
+# 95th percentile of CPU utilization per model
+- debug:
+    msg: "{{ hostvars | sgos_percentile('stats.counters.cpu.Total CPU utilization', 95, by='ansible_net_model') }}"
+
+# Ten busiest proxies
+- debug:
+    msg: "{{ hostvars | sgos_top('stats.counters.cpu.Total CPU utilization', 10) }}"
+"""
+
+import math
+
+from ansible.errors import AnsibleFilterError
+from ansible.module_utils.common._collections_compat import Mapping
+from ansible.module_utils.six import iteritems, string_types
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+def _lookup(record, path):
+    value = record
+    for key in path.split('.'):
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(key)
+        if value is None:
+            return None
+    return value
+
+
+def _number(value):
+    if isinstance(value, bool) or value is None:
+        return float('nan')
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, string_types):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return float('nan')
+
+
+def _records(data):
+    if isinstance(data, Mapping):
+        return [(host, data[host]) for host in data]
+
+    records = list()
+    for index, record in enumerate(data or list()):
+        host = record.get('inventory_hostname', index) if isinstance(record, Mapping) else index
+        records.append((host, record))
+    return records
+
+
+def sgos_columns(data, keys, by=None):
+    """Converts per host records into a dict of columns
+
+    Every column has one entry per host. Missing or non numeric values are
+    returned as None. The group column, when requested with I(by), keeps its
+    original values.
+    """
+    if isinstance(keys, string_types):
+        keys = [keys]
+
+    records = _records(data)
+    columns = dict(host=[host for host, record in records])
+    for key in keys:
+        column = list()
+        for host, record in records:
+            value = _number(_lookup(record, key))
+            column.append(None if math.isnan(value) else value)
+        columns[key] = column
+
+    if by:
+        columns[by] = [_lookup(record, by) for host, record in records]
+
+    return columns
+
+
+def _column(data, key, by=None):
+    records = _records(data)
+    hosts = [host for host, record in records]
+    values = [_number(_lookup(record, key)) for host, record in records]
+    groups = None
+    if by:
+        groups = [_lookup(record, by) for host, record in records]
+    if HAS_NUMPY:
+        values = np.array(values, dtype=float)
+    return hosts, values, groups
+
+
+def _group(values, groups, func):
+    if groups is None:
+        return func(values)
+
+    if HAS_NUMPY:
+        labels = [str(g) for g in groups]
+        keys, inverse = np.unique(labels, return_inverse=True)
+        originals = dict()
+        for label, group in zip(labels, groups):
+            originals.setdefault(label, group)
+        return dict((originals[key], func(values[inverse == index])) for index, key in enumerate(keys))
+
+    grouped = dict()
+    for group, value in zip(groups, values):
+        grouped.setdefault(group, list()).append(value)
+    return dict((group, func(group_values)) for group, group_values in iteritems(grouped))
+
+
+def _sum(values):
+    if HAS_NUMPY:
+        return float(np.nansum(values))
+    return float(sum(v for v in values if not math.isnan(v)))
+
+
+def _percentile(q):
+    def percentile(values):
+        if HAS_NUMPY:
+            values = values[~np.isnan(values)]
+            if not values.size:
+                return None
+            return float(np.percentile(values, q))
+
+        values = sorted(v for v in values if not math.isnan(v))
+        if not values:
+            return None
+        # linear interpolation, same as numpy.percentile's default
+        rank = (len(values) - 1) * q / 100.0
+        low = int(math.floor(rank))
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (rank - low)
+    return percentile
+
+
+def sgos_sum(data, key, by=None):
+    """Returns the sum of a value over all hosts, or per group with I(by)"""
+    hosts, values, groups = _column(data, key, by)
+    return _group(values, groups, _sum)
+
+
+def sgos_percentile(data, key, q=50, by=None):
+    """Returns the I(q)th percentile of a value, or per group with I(by)"""
+    try:
+        q = float(q)
+    except (TypeError, ValueError):
+        raise AnsibleFilterError('sgos_percentile: q must be a number, got %s' % q)
+    if not 0 <= q <= 100:
+        raise AnsibleFilterError('sgos_percentile: q must be between 0 and 100, got %s' % q)
+
+    hosts, values, groups = _column(data, key, by)
+    return _group(values, groups, _percentile(q))
+
+
+def sgos_top(data, key, n=10, reverse=True):
+    """Returns the I(n) hosts with the highest value as a list of [host, value]
+
+    Set I(reverse) to false for the lowest values instead.
+    """
+    n = int(n)
+    hosts, values, groups = _column(data, key)
+
+    if HAS_NUMPY:
+        valid = np.flatnonzero(~np.isnan(values))
+        ordered = values[valid] if not reverse else -values[valid]
+        if 0 < n < valid.size:
+            picked = np.argpartition(ordered, n - 1)[:n]
+        else:
+            picked = np.arange(valid.size)
+        picked = picked[np.argsort(ordered[picked], kind='stable')][:max(n, 0)]
+        return [[hosts[i], float(values[i])] for i in valid[picked]]
+
+    pairs = [(host, value) for host, value in zip(hosts, values) if not math.isnan(value)]
+    pairs.sort(key=lambda pair: pair[1], reverse=reverse)
+    return [[host, value] for host, value in pairs[:max(n, 0)]]
+
+
+class FilterModule(object):
+    """Filters for aggregating parsed SGOS records across a fleet"""
+
+    filter_map = {
+        'sgos_columns': sgos_columns,
+        'sgos_sum': sgos_sum,
+        'sgos_percentile': sgos_percentile,
+        'sgos_top': sgos_top
+    }
+
+    def filters(self):
+        return self.filter_map
@@ -0,0 +1,244 @@
+#
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+httpapi: sgos
+short_description: Use the SGOS management console to run show advanced-url commands
+description:
+  - This sgos plugin fetches the C(show advanced-url) pages of Proxy SGOS
+    devices from the HTTP(S) management console instead of an interactive
+    cli session.
+  - The pages are fetched over a pool of keep-alive connections which stays
+    open for the lifetime of the persistent connection, several pages are
+    fetched concurrently.
+  - Only C(show advanced-url) commands are available, use the
+    sgos_network_cli connection for other commands and configuration
+    changes.
+version_added: "2.9"
+notes:
+  - Tested against SGOS 6.7.4.144, Ansible 2.9.1
+  - The management console listens on port 8082 by default, set
+    C(ansible_httpapi_port) when it has been moved.
+  - The credentials are sent with every request. The console port 8082 is
+    always reached over HTTPS, other ports only with
+    C(ansible_httpapi_use_ssl=true), which the examples set.
+  - Requests go straight to the device, I(use_proxy) is ignored.
+options:
+  pool_size:
+    type: int
+    default: 4
+    description:
+      - Maximum number of connections to the management console, and of pages
+        fetched at the same time.
+    env:
+      - name: ANSIBLE_HTTPAPI_SGOS_POOL_SIZE
+    vars:
+      - name: ansible_httpapi_sgos_pool_size
+"""
+
+import base64
+import json
+import re
+import socket
+import ssl
+import threading
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.network.common.utils import to_list
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.six.moves.queue import Empty, Queue
+from ansible.plugins.httpapi import HttpApiBase
+
+try:
+    from html import unescape
+except ImportError:
+    from HTMLParser import HTMLParser
+    unescape = HTMLParser().unescape
+
+
+# the console port of SGOS appliances
+DEFAULT_PORT = 8082
+
+ADVANCED_URL_RE = re.compile(r'^\s*show\s+advanced-url\s+(\S+)\s*$', re.I)
+LINE_BREAK_RE = re.compile(r'<br\s*/?>|</(?:p|div|tr|h\d)>', re.I)
+TAG_RE = re.compile(r'<[^>]*>')
+
+
+def html_to_text(data):
+    """Returns the text of an HTML page laid out like the cli output of it"""
+    text = unescape(TAG_RE.sub('', LINE_BREAK_RE.sub('\n', data)))
+    return '\n'.join(line.rstrip() for line in text.splitlines()).strip('\n')
+
+
+class HttpApi(HttpApiBase):
+
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self._idle = list()
+        self._lock = threading.Lock()
+        self._cookie = None
+        self._device_info = None
+
+    def send_request(self, data, **message_kwargs):
+        return self.run_commands(commands=data, check_rc=message_kwargs.get('check_rc', True))
+
+    def logout(self):
+        with self._lock:
+            idle, self._idle = self._idle, list()
+        for conn in idle:
+            conn.close()
+
+    def _open(self):
+        """Returns a new, not yet connected, connection to the management console"""
+        host = self.connection.get_option('host')
+        port = self.connection.get_option('port') or DEFAULT_PORT
+        timeout = self.connection.get_option('timeout')
+        # the console port only serves HTTPS, and use_ssl defaults to false
+        if self.connection.get_option('use_ssl') or port == DEFAULT_PORT:
+            if self.connection.get_option('validate_certs'):
+                context = ssl.create_default_context()
+            else:
+                context = ssl._create_unverified_context()
+            return http_client.HTTPSConnection(host, port, timeout=timeout, context=context)
+        return http_client.HTTPConnection(host, port, timeout=timeout)
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._open()
+
+    def _release(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+
+    def _headers(self):
+        credentials = '%s:%s' % (self.connection.get_option('remote_user'), self.connection.get_option('password'))
+        headers = {'Authorization': 'Basic %s' % to_text(base64.b64encode(to_bytes(credentials, errors='surrogate_or_strict')))}
+        if self._cookie:
+            headers['Cookie'] = self._cookie
+        return headers
+
+    def fetch(self, path):
+        """Returns the text of the management console page at ``path``"""
+        conn = self._acquire()
+        try:
+            for attempt in range(2):
+                reused = conn.sock is not None
+                try:
+                    conn.request('GET', path, headers=self._headers())
+                    response = conn.getresponse()
+                    data = response.read()
+                    break
+                except (http_client.HTTPException, socket.error) as e:
+                    conn.close()
+                    # the device closes keep-alive connections that were idle for too long
+                    if not reused or attempt:
+                        raise AnsibleConnectionFailure('Could not fetch %s: %s' % (path, to_text(e)))
+            if response.will_close:
+                conn.close()
+        finally:
+            self._release(conn)
+
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self._cookie = cookie.split(';', 1)[0]
+
+        if response.status == 401:
+            raise AnsibleConnectionFailure('Authentication to the management console failed')
+        if response.status != 200:
+            raise AnsibleConnectionFailure('%s: %s %s' % (path, response.status, response.reason))
+
+        text = to_text(data, errors='surrogate_then_replace')
+        if 'html' in (response.getheader('Content-Type') or ''):
+            text = html_to_text(text)
+        return text.replace('\r\n', '\n').strip()
+
+    def fetch_all(self, paths):
+        """Fetches several pages concurrently over the connection pool
+
+        Returns the text of every page in the order of ``paths``. A page that
+        could not be fetched returns its AnsibleConnectionFailure in its place.
+        """
+        paths = to_list(paths)
+        results = [None] * len(paths)
+        pending = Queue()
+        for index, path in enumerate(paths):
+            pending.put((index, path))
+
+        def worker():
+            while True:
+                try:
+                    index, path = pending.get_nowait()
+                except Empty:
+                    return
+                try:
+                    results[index] = self.fetch(path)
+                except AnsibleConnectionFailure as e:
+                    results[index] = e
+
+        threads = list()
+        for i in range(min(self.get_option('pool_size'), len(paths)) - 1):
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        worker()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def get(self, command, prompt=None, answer=None, sendonly=False, newline=True, check_all=False):
+        return self.run_commands(commands=[dict(command=command, prompt=prompt)])[0]
+
+    def run_commands(self, commands=None, check_rc=True):
+        if commands is None:
+            raise ValueError("'commands' value is required")
+
+        commands = [cmd if isinstance(cmd, dict) else dict(command=cmd) for cmd in to_list(commands)]
+        paths = list()
+        for cmd in commands:
+            match = ADVANCED_URL_RE.match(to_text(cmd['command'], errors='surrogate_or_strict'))
+            if not match or cmd.get('prompt'):
+                raise AnsibleConnectionFailure('%s is not available over the management console, only show advanced-url '
+                                               'commands are, use the sgos_network_cli connection' % cmd['command'])
+            paths.append(match.group(1))
+
+        responses = list()
+        for path, response in zip(paths, self.fetch_all(paths)):
+            if isinstance(response, AnsibleConnectionFailure):
+                if check_rc:
+                    raise response
+                response = to_text(response, errors='surrogate_or_strict')
+            self.connection._log_messages("fetched '%s' over the management console" % path)
+            responses.append(response)
+        return responses
+
+    def edit_config(self, command):
+        raise AnsibleConnectionFailure('Configuration changes are not available over the management console, '
+                                       'use the sgos_network_cli connection')
+
+    def get_device_info(self):
+        if self._device_info:
+            return self._device_info
+
+        device_info = {}
+        device_info['network_os'] = 'sgos'
+        reply = self.fetch('/Diagnostics/Hardware/Info')
+        match = re.search(r'Model:\s+(\S+)', reply, re.M)
+        if match:
+            device_info['network_os_model'] = match.group(1)
+
+        self._device_info = device_info
+        return self._device_info
+
+    def get_capabilities(self):
+        result = {}
+        result['rpc'] = ['get', 'run_commands', 'get_capabilities', 'get_device_info', 'send_request']
+        result['device_info'] = self.get_device_info()
+        result['network_api'] = 'httpapi'
+        return json.dumps(result)
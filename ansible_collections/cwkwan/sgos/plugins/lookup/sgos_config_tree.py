@@ -0,0 +1,293 @@
+#
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+lookup: sgos_config_tree
+short_description: Answer questions about an SGOS configuration from an index
+description:
+  - Parses the output of C(show configuration) into a tree of sections and
+    configuration modes, and indexes the commands of every node by their
+    first one to three keywords. Queries are then dictionary lookups instead
+    of regular expressions over the whole text, terms of more keywords are
+    looked up by their first three and compared with the rest of the
+    commands found.
+  - Sections are the C(!- BEGIN) / C(!- END) blocks of the configuration,
+    commands ending with C(;mode) open a node that C(exit) closes. The path
+    of a node joins the section and the mode commands with C( > ), for
+    example C(networking > interface 0:0).
+  - The index of a configuration file given with I(src) is kept next to it
+    as I(src).index and only rebuilt when the checksum of the file changes.
+version_added: "2.9"
+notes:
+  - Tested against SGOS 6.7.4.144, Ansible 2.9.1
+  - Keywords and commands are compared with their whitespace collapsed.
+options:
+  _terms:
+    description:
+      - The leading keywords of the commands to look up, or the path of a
+        node with I(query=section).
+    required: true
+  src:
+    description:
+      - Path of a file holding the configuration, for example saved from a
+        registered C(sgos_command) result. Relative paths are looked up like
+        with the C(file) lookup.
+  config:
+    description:
+      - The configuration itself, when it is not kept in a file.
+  section:
+    description:
+      - Only look at the commands of the node with this path.
+      - Cannot be combined with I(query=section), which takes the path of
+        the node as term.
+  query:
+    description:
+      - C(values) returns the rest of every command starting with the term,
+        C(exists) whether there is such a command and C(section) the commands
+        of the node with the path given as term.
+    default: values
+    choices: ['values', 'exists', 'section']
+"""
+
+EXAMPLES = """
+- name: Fetch the configuration
+  sgos_command:
+    commands: show configuration
+  register: config
+
+- name: Keep it on the control host
+  copy:
+    content: "{{ config.stdout[0] }}"
+    dest: "configs/{{ inventory_hostname }}.cfg"
+  delegate_to: localhost
+
+- name: Enable the NTP servers when none is configured
+  sgos_config:
+    lines:
+      - ntp server 10.0.0.1
+      - ntp enable
+  when: not lookup('cwkwan.sgos.sgos_config_tree', 'ntp server', src='configs/' ~ inventory_hostname ~ '.cfg',
+                   query='exists')
+
+- name: The appliance name
+  debug:
+    msg: "{{ lookup('cwkwan.sgos.sgos_config_tree', 'appliance-name', config=config.stdout[0]) }}"
+
+- name: The addresses of the first interface
+  debug:
+    msg: "{{ query('cwkwan.sgos.sgos_config_tree', 'ip-address', src='proxy1.cfg',
+                   section='networking > interface 0:0') }}"
+"""
+
+RETURN = """
+_raw:
+  description:
+    - The values, one per matching command, with the quotes around a single
+      quoted value removed. With I(query=exists) a boolean per term, with
+      I(query=section) the commands of the node.
+  type: list
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from ansible.errors import AnsibleLookupError
+from ansible.module_utils._text import to_bytes, to_native, to_text
+from ansible.plugins.lookup import LookupBase
+
+
+PATH_SEPARATOR = ' > '
+MODE_SUFFIX = ';mode'
+WORD_RE = re.compile(r'\S+')
+# commands are indexed by up to this many leading keywords
+MAX_KEYWORDS = 3
+# bumped when the layout of the index changes, older index files are rebuilt
+INDEX_VERSION = 2
+
+# indexes of the configurations seen by this process, by checksum
+INDEXES = dict()
+
+
+def parse_config(config):
+    """Returns the commands of every node of a configuration, by path"""
+    tree = dict()
+    section = None
+    modes = list()
+    for line in config.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('!- BEGIN '):
+            section = ' '.join(line[len('!- BEGIN '):].split())
+            modes = list()
+            continue
+        if line.startswith('!- END '):
+            section = None
+            modes = list()
+            continue
+        if line.startswith(('!', ';')):
+            continue
+        if line == 'exit':
+            if modes:
+                modes.pop()
+            continue
+
+        enters = line.endswith(MODE_SUFFIX)
+        if enters:
+            line = line[:-len(MODE_SUFFIX)].rstrip()
+        path = PATH_SEPARATOR.join(([section] if section else []) + modes)
+        tree.setdefault(path, list()).append(line)
+        if enters:
+            modes.append(' '.join(line.split()))
+    return tree
+
+
+def build_index(tree):
+    """Returns the commands of ``tree`` indexed by path and by their first one to three keywords
+
+    ``paths`` maps a path and keywords to the rest of the commands of that
+    node, ``keywords`` maps keywords to the path and rest of every command.
+    """
+    paths = dict()
+    keywords = dict()
+    for path, lines in tree.items():
+        node = paths.setdefault(path, dict())
+        for line in lines:
+            prefix = None
+            for count, match in enumerate(WORD_RE.finditer(line)):
+                if count == MAX_KEYWORDS:
+                    break
+                prefix = match.group(0) if prefix is None else '%s %s' % (prefix, match.group(0))
+                rest = line[match.end():].strip()
+                node.setdefault(prefix, list()).append(rest)
+                keywords.setdefault(prefix, list()).append([path, rest])
+    return dict(tree=tree, paths=paths, keywords=keywords, version=INDEX_VERSION)
+
+
+def strip_keywords(rest, words):
+    """Returns ``rest`` without the leading keywords ``words``, None when it does not start with them"""
+    if not words:
+        return rest
+    if not rest.startswith(words[0]):
+        # most commands sharing the indexed keywords differ right away
+        return None
+    matches = list()
+    for match in WORD_RE.finditer(rest):
+        matches.append(match)
+        if len(matches) == len(words):
+            break
+    if [match.group(0) for match in matches] != words:
+        return None
+    return rest[matches[-1].end():].strip()
+
+
+def find_values(keywords, term, node=False):
+    """Returns the rest of every command of ``keywords`` that starts with the keywords of ``term``
+
+    ``keywords`` is the ``keywords`` of an index, or one node of its
+    ``paths`` when ``node`` is set.
+    """
+    words = term.split()
+    values = list()
+    for value in keywords.get(' '.join(words[:MAX_KEYWORDS]), list()):
+        value = strip_keywords(value if node else value[1], words[MAX_KEYWORDS:])
+        if value is not None:
+            values.append(value)
+    return values
+
+
+def checksum(config):
+    return hashlib.sha256(to_bytes(config, errors='surrogate_or_strict')).hexdigest()
+
+
+def get_index(config, index_path=None):
+    """Returns the index of ``config``, loaded from ``index_path`` when it is current"""
+    key = checksum(config)
+    if key in INDEXES:
+        return INDEXES[key]
+
+    index = None
+    if index_path and os.path.exists(index_path):
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (IOError, OSError, ValueError):
+            index = None
+        if index and (index.get('checksum') != key or index.get('version') != INDEX_VERSION):
+            index = None
+
+    if index is None:
+        index = build_index(parse_config(config))
+        index['checksum'] = key
+        if index_path:
+            try:
+                # written under a temporary name first, other workers may
+                # read it at any time
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)))
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(index, f)
+                os.rename(tmp_path, index_path)
+            except (IOError, OSError):
+                pass
+
+    INDEXES[key] = index
+    return index
+
+
+def unquote(value):
+    if len(value) > 1 and value[0] == value[-1] == '"' and '"' not in value[1:-1]:
+        return value[1:-1]
+    return value
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        src = kwargs.get('src')
+        config = kwargs.get('config')
+        section = kwargs.get('section')
+        query = kwargs.get('query', 'values')
+        if query not in ('values', 'exists', 'section'):
+            raise AnsibleLookupError('query must be one of values, exists or section, got %s' % query)
+        if bool(src) == (config is not None):
+            raise AnsibleLookupError('exactly one of src and config is required')
+        if query == 'section' and section is not None:
+            raise AnsibleLookupError('section cannot be used with query=section, give the path of the node as term')
+
+        index_path = None
+        if src:
+            path = self.find_file_in_search_path(variables or dict(), 'files', src)
+            if not path:
+                raise AnsibleLookupError('could not find the configuration %s' % src)
+            try:
+                with open(path, 'rb') as f:
+                    config = to_text(f.read(), errors='surrogate_or_strict')
+            except (IOError, OSError) as e:
+                raise AnsibleLookupError('could not read the configuration %s: %s' % (path, to_native(e)))
+            index_path = '%s.index' % path
+
+        index = get_index(to_text(config), index_path)
+        if section is not None:
+            keywords = index['paths'].get(' '.join(section.split()), dict())
+        else:
+            keywords = index['keywords']
+
+        ret = list()
+        for term in terms:
+            term = to_text(term)
+            if query == 'section':
+                ret.extend(index['tree'].get(' '.join(term.split()), list()))
+                continue
+
+            values = find_values(keywords, term, node=section is not None)
+            if query == 'exists':
+                ret.append(bool(values))
+            else:
+                ret.extend(unquote(value) for value in values)
+        return ret
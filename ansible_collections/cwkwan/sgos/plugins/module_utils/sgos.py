@@ -4,16 +4,46 @@ from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
 
+import hashlib
 import json
-from ansible.module_utils._text import to_text
-from ansible.module_utils.network.common.utils import to_list
+import os
+import re
+import time
+
+from functools import wraps
+
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.connection import Connection, ConnectionError
 
 
+# Matches both the "Key: value" and "Key : value" layouts used by SGOS show
+# commands. The key stops at the first colon so values may contain colons.
+KEY_VALUE_RE = re.compile(r'^[ \t]*([^:\r\n]*[^:\s])[ \t]*:[ \t]*([^\r\n]*?)[ \t]*\r?$', re.M)
+NUMBER_RE = re.compile(r'^[+-]?(?:\d*\.\d+|\d+)')
+
+# Directory to write cProfile stats and tracemalloc snapshots of module runs to
+PROFILE_DIR_ENV = 'ANSIBLE_SGOS_PROFILE_DIR'
+
+
+def to_list(val):
+    """Returns val as a list
+
+    Same as network.common.utils.to_list, which is not imported here as it
+    pulls jinja2 and the other network helpers into every module run.
+    """
+    if isinstance(val, (list, tuple)):
+        return list(val)
+    elif val is not None:
+        return [val]
+    return list()
+
+
 def get_connection(module):
     """Get device connection
 
-    Creates reusable SSH connection to the device.
+    Creates reusable SSH connection to the device, or reuses the pooled
+    HTTP(S) connections to its management console with the httpapi
+    connection.
 
     Args:
         module: A valid AnsibleModule instance.
@@ -30,7 +60,7 @@ def get_connection(module):
 
     capabilities = get_capabilities(module)
     network_api = capabilities.get('network_api')
-    if network_api == 'cliconf':
+    if network_api in ('cliconf', 'httpapi'):
         module.sgos_connection = Connection(module._socket_path)
     else:
         module.fail_json(msg='Invalid connection type %s' % network_api)
@@ -63,8 +93,9 @@ def get_capabilities(module):
 def run_commands(module, commands):
     """Run command list against connection.
 
-    Get new or previously used connection and send commands to it one at a time,
-    collecting response.
+    Get new or previously used connection and send the commands to it in a
+    single call. The cliconf plugin runs independent read-only commands over
+    the shell channels of the connection in parallel.
 
     Args:
         module: A valid AnsibleModule instance.
@@ -73,30 +104,15 @@ def run_commands(module, commands):
     Returns:
         A list of output strings.
     """
-    responses = list()
     connection = get_connection(module)
 
-    for cmd in to_list(commands):
-        if isinstance(cmd, dict):
-            command = cmd['command']
-            prompt = cmd['prompt']
-            answer = cmd['answer']
-        else:
-            command = cmd
-            prompt = None
-            answer = None
-
-        try:
-            out = connection.get(command, prompt, answer)
-            out = to_text(out, errors='surrogate_or_strict')
-        except ConnectionError as exc:
-            module.fail_json(msg=to_text(exc))
-        except UnicodeError:
-            module.fail_json(msg=u'Failed to decode output from %s: %s' % (cmd, to_text(out)))
-
-        responses.append(out)
-
-    return responses
+    try:
+        responses = connection.run_commands(commands=to_list(commands), check_rc=True)
+        return [to_text(out, errors='surrogate_or_strict') for out in responses]
+    except ConnectionError as exc:
+        module.fail_json(msg=to_text(exc))
+    except UnicodeError:
+        module.fail_json(msg=u'Failed to decode output from %s' % to_list(commands))
 
 
 def load_config(module, commands):
@@ -120,3 +136,120 @@ def load_config(module, commands):
     except ConnectionError as exc:
         module.fail_json(msg=to_text(exc))
 
+
+def to_number(value):
+    """Convert a parsed value to a number
+
+    Accepts values that carry a unit or suffix, e.g. ``8192 MB`` or ``12%``.
+
+    Args:
+        value: An int, float or string value.
+
+    Returns:
+        An int or float, or None if the value does not start with a number.
+    """
+    if isinstance(value, (int, float)):
+        return value
+
+    match = NUMBER_RE.match(value.replace(',', '')) if value else None
+    if not match:
+        return None
+    number = match.group()
+    if '.' in number:
+        return float(number)
+    return int(number)
+
+
+def parse_key_values(data):
+    """Parse SGOS show output into a dictionary
+
+    Scans the output once for "Key: value" and "Key : value" lines. The first
+    occurrence of a key wins. Values are returned as the device printed them,
+    use to_number() for the numeric ones.
+
+    Args:
+        data: Output string of a show command.
+
+    Returns:
+        A dictionary of key value pairs.
+    """
+    parsed = dict()
+    if not data:
+        return parsed
+
+    for key, value in KEY_VALUE_RE.findall(data):
+        key = ' '.join(key.split())
+        if key not in parsed:
+            parsed[key] = value
+
+    return parsed
+
+
+def policy_checksum(data):
+    """Checksum a policy file
+
+    Blank lines, CPL comments and trailing whitespace are left out, so the
+    source of a policy and the copy shown by the device have the same
+    checksum.
+
+    Args:
+        data: Policy text.
+
+    Returns:
+        The hex encoded SHA-256 of the policy.
+    """
+    lines = (line.rstrip() for line in to_text(data, errors='surrogate_or_strict').splitlines())
+    policy = '\n'.join(line for line in lines if line and not line.lstrip().startswith(';'))
+    return hashlib.sha256(to_bytes(policy, errors='surrogate_or_strict')).hexdigest()
+
+
+def profiled(name):
+    """Profile a module entry point
+
+    When the ``ANSIBLE_SGOS_PROFILE_DIR`` environment variable is set, the
+    decorated function is run under cProfile and tracemalloc. The stats are
+    written to ``<name>-<pid>-<time>.pstats`` and the allocation snapshot to
+    ``<name>-<pid>-<time>.tracemalloc`` in that directory, also when the
+    function exits through ``exit_json`` or ``fail_json``. The time is in
+    microseconds, the action plugins run several tasks in one process.
+
+    Args:
+        name: Prefix of the files written.
+
+    Returns:
+        A decorator.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            profile_dir = os.environ.get(PROFILE_DIR_ENV)
+            if not profile_dir:
+                return func(*args, **kwargs)
+
+            import cProfile
+            try:
+                import tracemalloc
+            except ImportError:
+                tracemalloc = None
+
+            prefix = os.path.join(os.path.expanduser(profile_dir), '%s-%s-%d' % (name, os.getpid(), time.time() * 1000000))
+            if not os.path.isdir(os.path.dirname(prefix)):
+                os.makedirs(os.path.dirname(prefix))
+
+            # only stopped again when started here, not when the caller traces
+            started = tracemalloc and not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                profiler.dump_stats('%s.pstats' % prefix)
+                if tracemalloc:
+                    tracemalloc.take_snapshot().dump('%s.tracemalloc' % prefix)
+                if started:
+                    tracemalloc.stop()
+        return wrapped
+    return decorator
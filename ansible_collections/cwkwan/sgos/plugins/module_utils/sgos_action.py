@@ -0,0 +1,109 @@
+#
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+from ansible.module_utils._text import to_text
+from ansible.module_utils.common.parameters import handle_aliases
+from ansible.module_utils.common.validation import (check_required_arguments, check_type_bool, check_type_dict,
+                                                    check_type_float, check_type_int, check_type_list, check_type_path,
+                                                    check_type_raw, check_type_str)
+
+
+TYPE_CHECKERS = dict(
+    str=check_type_str,
+    list=check_type_list,
+    dict=check_type_dict,
+    bool=check_type_bool,
+    int=check_type_int,
+    float=check_type_float,
+    path=check_type_path,
+    raw=check_type_raw,
+)
+
+# capabilities of the persistent connections, by socket path, for the
+# lifetime of the worker process
+CAPABILITIES = dict()
+
+
+class ModuleExit(Exception):
+    """Raised by TaskModule.exit_json and fail_json with the module result"""
+
+    def __init__(self, result):
+        super(ModuleExit, self).__init__(result.get('msg'))
+        self.result = result
+
+
+class TaskModule(object):
+    """Runs module code in the controller process
+
+    Provides the parts of AnsibleModule the sgos modules use, so the action
+    plugins can run a module's logic against the persistent connection
+    without building and starting a module payload. exit_json and fail_json
+    raise ModuleExit with the result.
+
+    Args:
+        argument_spec: The argument spec of the module.
+        params: The task arguments.
+        socket_path: Path of the persistent connection socket.
+        check_mode: Whether the task runs in check mode.
+    """
+
+    # used by the Entity helpers of module_utils.network.common.utils
+    _CHECK_ARGUMENT_TYPES_DISPATCHER = TYPE_CHECKERS
+
+    def __init__(self, argument_spec, params, socket_path, check_mode=False):
+        self.argument_spec = argument_spec
+        self.check_mode = check_mode
+        self._socket_path = socket_path
+        if socket_path in CAPABILITIES:
+            self.sgos_capabilities = CAPABILITIES[socket_path]
+        self.params = self._check_arguments(dict(params))
+
+    def _check_arguments(self, params):
+        try:
+            aliases, legal_inputs = handle_aliases(self.argument_spec, params)
+            unsupported = set(params) - set(legal_inputs)
+            if unsupported:
+                self.fail_json(msg='Unsupported parameters for module: %s' % ', '.join(sorted(unsupported)))
+            check_required_arguments(self.argument_spec, params)
+
+            for alias in aliases:
+                params.pop(alias, None)
+            for name, spec in self.argument_spec.items():
+                value = params.get(name)
+                if value is None:
+                    params[name] = spec.get('default')
+                    continue
+                value = TYPE_CHECKERS[spec.get('type', 'str')](value)
+                if spec.get('choices') and value not in spec['choices']:
+                    self.fail_json(msg='value of %s must be one of: %s, got: %s' % (
+                        name, ', '.join(spec['choices']), value))
+                params[name] = value
+        except (TypeError, ValueError) as e:
+            self.fail_json(msg=to_text(e))
+        return params
+
+    def exit_json(self, **kwargs):
+        kwargs.setdefault('changed', False)
+        raise ModuleExit(kwargs)
+
+    def fail_json(self, msg, **kwargs):
+        kwargs.update(failed=True, msg=msg)
+        raise ModuleExit(kwargs)
+
+    def run(self, run_module):
+        """Returns the result of ``run_module(self)``
+
+        The capabilities of the connection are kept for the next items of a
+        loop, they do not change for the lifetime of the persistent
+        connection.
+        """
+        try:
+            result = run_module(self)
+        except ModuleExit as e:
+            result = e.result
+        if hasattr(self, 'sgos_capabilities'):
+            CAPABILITIES[self._socket_path] = self.sgos_capabilities
+        return result
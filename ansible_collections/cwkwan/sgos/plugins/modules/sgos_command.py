@@ -129,10 +129,8 @@ failed_conditions:
 import re
 import time
 
-from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import run_commands
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import run_commands, profiled
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.network.common.utils import ComplexList
-from ansible.module_utils.network.common.parsing import Conditional
 from ansible.module_utils.six import string_types
 
 
@@ -146,37 +144,52 @@ def to_lines(stdout):
         yield item
 
 
-def main():
-    """main entry point for module execution
-    """
-    argument_spec = dict(
-        commands=dict(type='list', required=True),
+ARGUMENT_SPEC = dict(
+    commands=dict(type='list', required=True),
 
-        wait_for=dict(type='list'),
-        match=dict(default='all', choices=['all', 'any']),
+    wait_for=dict(type='list'),
+    match=dict(default='all', choices=['all', 'any']),
 
-        retries=dict(default=10, type='int'),
-        interval=dict(default=1, type='int')
-    )
+    retries=dict(default=10, type='int'),
+    interval=dict(default=1, type='int')
+)
 
-    module = AnsibleModule(argument_spec=argument_spec,
-                           supports_check_mode=False)
 
-    result = {'changed': False}
-
-    warnings = list()
+def parse_commands(module):
+    """Returns the commands of the task as a list of dicts"""
+    commands = module.params['commands']
+    if all(isinstance(cmd, string_types) for cmd in commands):
+        return [dict(command=cmd, prompt=None, answer=None) for cmd in commands]
 
+    from ansible.module_utils.network.common.utils import ComplexList
     command = ComplexList(dict(
         command=dict(key=True),
         prompt=dict(),
         answer=dict()
     ), module)
-    commands = command(module.params['commands'])
+    return command(commands)
+
+
+@profiled('sgos_command')
+def run_module(module):
+    """Runs the commands of the task and returns the module result
+
+    Shared by main and the sgos_command action plugin, which runs it in the
+    controller process, so it is profiled rather than main.
+    """
+    result = {'changed': False}
+
+    warnings = list()
+
+    commands = parse_commands(module)
 
     result['warnings'] = warnings
 
     wait_for = module.params['wait_for'] or list()
-    conditionals = [Conditional(c) for c in wait_for]
+    conditionals = list()
+    if wait_for:
+        from ansible.module_utils.network.common.parsing import Conditional
+        conditionals = [Conditional(c) for c in wait_for]
 
     retries = module.params['retries']
     interval = module.params['interval']
@@ -208,8 +221,16 @@ def main():
         'stdout': responses,
         'stdout_lines': list(to_lines(responses))
     })
+    return result
+
+
+def main():
+    """main entry point for module execution
+    """
+    module = AnsibleModule(argument_spec=ARGUMENT_SPEC,
+                           supports_check_mode=False)
 
-    module.exit_json(**result)
+    module.exit_json(**run_module(module))
 
 
 if __name__ == '__main__':
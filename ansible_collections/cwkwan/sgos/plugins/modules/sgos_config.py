@@ -90,10 +90,9 @@ commands:
 
 import re
 
-from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import load_config
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import load_config, profiled
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.six import string_types
-from ansible.module_utils.network.common.utils import EntityCollection
 
 __metaclass__ = type
 
@@ -105,33 +104,43 @@ def to_lines(response):
         yield item
 
 
+def parse_src(contents):
+    """Returns the commands of a rendered configuration file
+
+    Blank lines are dropped and every inline block is kept as a single
+    command, followed by its end of file marker. Also used by the sgos_config
+    action plugin, which passes the commands to the module as lines.
+    """
+    context = parse_lines(contents.splitlines())
+    commands = []
+    inline_block = False
+    eof_mark = ''
+    for line in context:
+        if line.lstrip().lower().startswith('inline') and not inline_block:
+            inline_block = True
+            inline_cli = line.strip().split()
+            eof_mark = inline_cli[-1]
+            match = re.search(r'(%s.*?)(%s|$)' % (line, eof_mark), contents, re.DOTALL)
+            inline_cmd = match.group(1)
+            inline_eof = match.group(2)
+            contents = re.sub(r'%s%s' % (re.escape(inline_cmd), re.escape(inline_eof)), '', contents)
+            commands.append(inline_cmd)
+        else:
+            if inline_block and (eof_mark in line):
+                inline_block = False
+                commands.append(eof_mark)
+            elif inline_block and (eof_mark not in line):
+                continue
+            else:
+                commands.append(line)
+    return commands
+
+
 def get_candidate(module):
     contents = module.params['src'] or module.params['lines']
 
     if module.params['src']:
-        context = parse_lines(contents.splitlines())
-        commands = []
-        inline_block = False
-        eof_mark = ''
-        for line in context:
-            if line.lstrip().lower().startswith('inline') and not inline_block:
-                inline_block = True
-                inline_cli = line.strip().split()
-                eof_mark = inline_cli[-1]
-                match = re.search(r'(%s.*?)(%s|$)' % (line, eof_mark), contents, re.DOTALL)
-                inline_cmd = match.group(1)
-                inline_eof = match.group(2)
-                contents = re.sub(r'%s%s' % (re.escape(inline_cmd), re.escape(inline_eof)), '', contents)
-                commands.append(inline_cmd)
-            else:
-                if inline_block and (eof_mark in line):
-                    inline_block = False
-                    commands.append(eof_mark)
-                elif inline_block and (eof_mark not in line):
-                    continue
-                else:
-                    commands.append(line)
-        contents = commands
+        contents = parse_src(contents)
 
     command_attrs = dict(command=dict(key=True),
                          prompt=dict(type='list', required=False),
@@ -141,8 +150,13 @@ def get_candidate(module):
     for item in contents:
         parsed_contents.append(parse_prompt(module, item))
 
-    command = EntityCollection(module, command_attrs)
-    candidate = command(parsed_contents)
+    if all(isinstance(item, string_types) for item in contents):
+        # lines built by parse_prompt are valid already
+        candidate = parsed_contents
+    else:
+        from ansible.module_utils.network.common.utils import EntityCollection
+        command = EntityCollection(module, command_attrs)
+        candidate = command(parsed_contents)
 
     for item in candidate:
         item['eof_marker'] = module.params['eof_marker']
@@ -168,6 +182,7 @@ def parse_prompt(module, item):
 def parse_lines(contents):
     return [line for line in contents if len(line.strip()) > 0]
 
+@profiled('sgos_config')
 def main():
     """ main entry point for module execution
     """
@@ -0,0 +1,278 @@
+#!/usr/bin/python
+#
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+module: sgos_event_log
+version_added: "2.9"
+author: "cwkwan@gmail.com"
+short_description: Collect new event log entries from devices running Proxy SGOS
+description:
+  - Collects the event log of a remote device running SGOS incrementally.
+    The timestamp of the newest entry collected is kept in I(cursor) on the
+    Ansible control host, and the next run only asks the device for the
+    entries logged since then with C(show event-log start).
+  - The entries are returned as records and can be appended to a NDJSON
+    file, one JSON object per line, that is rotated by size.
+notes:
+  - Tested against SGOS 6.7.4.144, Ansible 2.9.1
+  - Timestamps are compared as the device prints them, in its local time.
+    Entries logged while the clock of the device is set back are missed.
+  - Lines of the event log that do not have the layout of an entry are
+    skipped.
+options:
+  cursor:
+    description:
+      - Path of the file on the control host keeping the position of the
+        device in its event log, one file per device. Without a cursor the
+        whole event log is collected every time.
+    type: path
+  since:
+    description:
+      - Only collect entries logged at or after this time, as
+        C(YYYY-mm-dd HH:MM:SS), when there is no I(cursor) yet.
+    type: str
+  start:
+    description:
+      - Ask the device for the new entries only with C(show event-log start).
+      - When false the whole event log is read and the entries older than the
+        cursor are skipped on the control host, for devices without the
+        C(start) option.
+    type: bool
+    default: true
+  regex:
+    description:
+      - Only collect entries matching this regular expression, which is
+        passed to the device in double quotes with C(show event-log regex).
+      - It cannot contain double quotes or line breaks.
+    type: str
+  dest:
+    description:
+      - Path of the NDJSON file on the control host to append the records
+        to.
+    type: path
+  max_size:
+    description:
+      - Rotate I(dest) once it has grown to this many bytes.
+    type: int
+    default: 10485760
+  backups:
+    description:
+      - The number of rotated files of I(dest) to keep, as I(dest).1 to
+        I(dest).N.
+    type: int
+    default: 5
+  return_records:
+    description:
+      - Return the records in the result. Disable it when collecting large
+        amounts of entries to I(dest).
+    type: bool
+    default: true
+"""
+
+EXAMPLES = """
+- name: Collect the new event log entries of every proxy
+  sgos_event_log:
+    cursor: /var/lib/sgos/{{ inventory_hostname }}.cursor
+    dest: /var/log/sgos/{{ inventory_hostname }}.ndjson
+    return_records: false
+
+- name: Watch for health monitor alerts since the last run
+  sgos_event_log:
+    cursor: /var/lib/sgos/{{ inventory_hostname }}.health
+    regex: Health Monitor
+  register: health
+"""
+
+RETURN = """
+records:
+  description: The entries collected, oldest first
+  returned: when I(return_records) is true
+  type: list
+  sample: [{'timestamp': '2019-12-02 06:11:32', 'timezone': '+00:00UTC', 'severity': '0',
+            'message': 'Health Monitor: Health status changed from OK to WARNING',
+            'event_id': '250021:1', 'source': 'health_monitor.cpp:357'}]
+count:
+  description: The number of entries collected
+  returned: always
+  type: int
+  sample: 1
+command:
+  description: The command sent to the device
+  returned: always
+  type: str
+  sample: show event-log start 2019-12-02 06:11:32
+cursor:
+  description: The timestamp of the newest entry collected so far
+  returned: always
+  type: str
+  sample: '2019-12-02 06:11:32'
+"""
+
+import json
+import os
+import re
+import tempfile
+
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import run_commands, profiled
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_native
+
+
+# 2019-12-02 06:11:32+00:00UTC  "Message"  0 250021:1  health_monitor.cpp:357
+EVENT_RE = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)(\S*)\s+"(.*)"\s+(\S+)\s+(\S+)\s+(\S+)\s*$')
+TIMESTAMP_RE = re.compile(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$')
+
+
+def load_cursor(path):
+    """Returns the cursor stored at ``path``, an empty cursor when there is none"""
+    if not path or not os.path.exists(path):
+        return dict()
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_file(path, data):
+    """Replaces the file at ``path`` with ``data`` in one step"""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        f.write(data)
+    os.rename(tmp_path, path)
+
+
+def parse_events(output, cursor):
+    """Yields the raw line and the record of every entry of ``output`` newer than ``cursor``
+
+    Entries logged in the second of the cursor are only skipped when the
+    cursor has seen them, several entries can share a timestamp.
+    """
+    since = cursor.get('timestamp')
+    seen = set(cursor.get('lines', []))
+    for line in output.splitlines():
+        line = line.rstrip()
+        if since:
+            # the timestamp leads the line, compare it before parsing
+            stamp = line[:19]
+            if stamp < since or (stamp == since and line in seen):
+                continue
+        match = EVENT_RE.match(line)
+        if match:
+            yield line, dict(zip(('timestamp', 'timezone', 'message', 'severity', 'event_id', 'source'),
+                                 match.groups()))
+
+
+def advance_cursor(cursor, events):
+    """Returns the cursor after ``events``"""
+    timestamp = cursor.get('timestamp')
+    lines = list(cursor.get('lines', []))
+    for line, record in events:
+        if timestamp is None or record['timestamp'] > timestamp:
+            timestamp = record['timestamp']
+            lines = list()
+        if record['timestamp'] == timestamp:
+            lines.append(line)
+    if timestamp is None:
+        return cursor
+    return dict(timestamp=timestamp, lines=lines)
+
+
+def rotate(path, backups):
+    """Moves ``path`` to ``path``.1 and the older files one further, dropping the oldest"""
+    for index in range(backups - 1, 0, -1):
+        if os.path.exists('%s.%d' % (path, index)):
+            os.rename('%s.%d' % (path, index), '%s.%d' % (path, index + 1))
+    if backups > 0:
+        os.rename(path, '%s.1' % path)
+    else:
+        os.remove(path)
+
+
+def append_records(path, records, max_size, backups):
+    """Appends the records to the NDJSON file at ``path``, rotating it when it is full"""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    f = open(path, 'a')
+    try:
+        for record in records:
+            if max_size and f.tell() >= max_size:
+                f.close()
+                rotate(path, backups)
+                f = open(path, 'a')
+            f.write(json.dumps(record, sort_keys=True))
+            f.write('\n')
+    finally:
+        f.close()
+
+
+@profiled('sgos_event_log')
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        cursor=dict(type='path'),
+        since=dict(),
+        start=dict(type='bool', default=True),
+        regex=dict(),
+        dest=dict(type='path'),
+        max_size=dict(type='int', default=10485760),
+        backups=dict(type='int', default=5),
+        return_records=dict(type='bool', default=True),
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    since = module.params['since']
+    if since and not TIMESTAMP_RE.match(since):
+        module.fail_json(msg='since must be given as YYYY-mm-dd HH:MM:SS, got %s' % since)
+    regex = module.params['regex']
+    if regex and any(c in regex for c in '"\r\n'):
+        module.fail_json(msg='regex cannot contain double quotes or line breaks, got %r' % regex)
+
+    try:
+        cursor = load_cursor(module.params['cursor'])
+    except (IOError, OSError, ValueError) as e:
+        module.fail_json(msg='unable to read the cursor %s: %s' % (module.params['cursor'], to_native(e)))
+    if not cursor and since:
+        cursor = dict(timestamp=since, lines=[])
+
+    command = 'show event-log'
+    if cursor.get('timestamp') and module.params['start']:
+        command += ' start %s' % cursor['timestamp']
+    if regex:
+        command += ' regex "%s"' % regex
+
+    output = run_commands(module, [command])[0]
+    events = list(parse_events(output, cursor))
+    records = [record for line, record in events]
+    cursor = advance_cursor(cursor, events)
+
+    result = {'changed': False, 'command': command, 'count': len(records), 'cursor': cursor.get('timestamp')}
+    if module.params['return_records']:
+        result['records'] = records
+
+    if not module.check_mode:
+        try:
+            if module.params['dest'] and records:
+                append_records(module.params['dest'], records, module.params['max_size'], module.params['backups'])
+                result['changed'] = True
+            # only moved on once the records are stored
+            if module.params['cursor'] and events:
+                write_file(module.params['cursor'], json.dumps(cursor))
+        except (IOError, OSError) as e:
+            module.fail_json(msg='unable to store the records: %s' % to_native(e), **result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
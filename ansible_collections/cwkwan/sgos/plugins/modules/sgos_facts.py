@@ -84,9 +84,7 @@ ansible_net_memtotal_mb:
   type: int
 """
 
-import re
-
-from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import run_commands
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import run_commands, parse_key_values, to_number, profiled
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.six import iteritems
 
@@ -99,13 +97,24 @@ class FactsBase(object):
         self.module = module
         self.facts = dict()
         self.responses = None
+        self.parsed = None
 
     def populate(self):
-        self.responses = run_commands(self.module, self.COMMANDS)
+        if self.responses is None:
+            self.responses = run_commands(self.module, self.COMMANDS)
+        self.parsed = [parse_key_values(data) for data in self.responses]
 
     def run(self, cmd):
         return run_commands(self.module, cmd)
 
+    def get_str(self, index, key):
+        return self.parsed[index].get(key)
+
+    def get_int(self, index, key):
+        value = to_number(self.parsed[index].get(key))
+        if value is not None:
+            return int(value)
+
 
 class Default(FactsBase):
 
@@ -117,38 +126,10 @@ class Default(FactsBase):
 
     def populate(self):
         super(Default, self).populate()
-        data = self.responses[0]
-        if data:
-            self.facts['version'] = self.parse_version(data)
-            self.facts['serialnum'] = self.parse_serialnum(data)
-
-        data = self.responses[1]
-        if data:
-            self.facts['hostname'] = self.parse_hostname(data)
-
-        data = self.responses[2]
-        if data:
-            self.facts['model'] = self.parse_model(data)
-
-    def parse_version(self, data):
-        match = re.search(r'Version: ([ \S]+)', data)
-        if match:
-            return match.group(1)
-
-    def parse_model(self, data):
-        match = re.search(r'Model: (\S+)', data, re.M)
-        if match:
-            return match.group(1)
-
-    def parse_hostname(self, data):
-        match = re.search(r'Appliance name : (\S+)', data, re.M)
-        if match:
-            return match.group(1)
-
-    def parse_serialnum(self, data):
-        match = re.search(r'Serial number: (\S+)', data, re.M)
-        if match:
-            return match.group(1)
+        self.facts['version'] = self.get_str(0, 'Version')
+        self.facts['serialnum'] = self.get_str(0, 'Serial number')
+        self.facts['hostname'] = self.get_str(1, 'Appliance name')
+        self.facts['model'] = self.get_str(2, 'Model')
 
 
 class Hardware(FactsBase):
@@ -159,20 +140,8 @@ class Hardware(FactsBase):
 
     def populate(self):
         super(Hardware, self).populate()
-        data = self.responses[0]
-        if data:
-            self.facts['memtotal_mb'] = int(self.parse_memtotal(data))
-            self.facts['memfree_mb'] = int(self.parse_memfree(data))
-
-    def parse_memtotal(self, data):
-        match = re.search(r'Memory installed:\s+(\d+)\s', data, re.M)
-        if match:
-            return match.group(1)
-
-    def parse_memfree(self, data):
-        match = re.search(r'Memory available:\s+(\d+)\s', data, re.M)
-        if match:
-            return match.group(1)
+        self.facts['memtotal_mb'] = self.get_int(0, 'Memory installed')
+        self.facts['memfree_mb'] = self.get_int(0, 'Memory available')
 
 
 FACT_SUBSETS = dict(
@@ -182,16 +151,18 @@ FACT_SUBSETS = dict(
 VALID_SUBSETS = frozenset(FACT_SUBSETS.keys())
 
 
-def main():
-    """main entry point for module execution
-    """
-    argument_spec = dict(
-        gather_subset=dict(default=["!config"], type='list')
-    )
+ARGUMENT_SPEC = dict(
+    gather_subset=dict(default=["!config"], type='list')
+)
 
-    module = AnsibleModule(argument_spec=argument_spec,
-                           supports_check_mode=True)
 
+@profiled('sgos_facts')
+def run_module(module):
+    """Gathers the facts of the requested subsets and returns the module result
+
+    Shared by main and the sgos_facts action plugin, which runs it in the
+    controller process, so it is profiled rather than main.
+    """
     gather_subset = module.params['gather_subset']
 
     runable_subsets = set()
@@ -232,6 +203,12 @@ def main():
     for key in runable_subsets:
         instances.append(FACT_SUBSETS[key](module))
 
+    # run the commands of all subsets in one go, so the connection can
+    # spread them over its shell channels
+    responses = run_commands(module, [command for inst in instances for command in inst.COMMANDS])
+    for inst in instances:
+        inst.responses, responses = responses[:len(inst.COMMANDS)], responses[len(inst.COMMANDS):]
+
     for inst in instances:
         inst.populate()
         facts.update(inst.facts)
@@ -243,7 +220,16 @@ def main():
 
     warnings = list()
 
-    module.exit_json(ansible_facts=ansible_facts, warnings=warnings)
+    return dict(ansible_facts=ansible_facts, warnings=warnings)
+
+
+def main():
+    """main entry point for module execution
+    """
+    module = AnsibleModule(argument_spec=ARGUMENT_SPEC,
+                           supports_check_mode=True)
+
+    module.exit_json(**run_module(module))
 
 
 if __name__ == '__main__':
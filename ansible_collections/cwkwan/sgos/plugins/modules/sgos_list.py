@@ -0,0 +1,274 @@
+#!/usr/bin/python
+#
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+module: sgos_list
+version_added: "2.9"
+author: "cwkwan@gmail.com"
+short_description: Manage large lists on devices running Proxy SGOS
+description:
+  - Manages the entries of a list of a remote device running SGOS, such as a
+    local user list or an address list, by only sending the entries that
+    differ.
+  - The current entries are read with a single I(show) command and compared
+    with I(entries) as sets. Only the additions and removals are pushed, in
+    batches of I(chunk_size) commands, or the whole list is replaced with
+    I(inline) when the difference is larger than I(inline_threshold).
+notes:
+  - Tested against SGOS 6.7.4.144, Ansible 2.9.1
+  - The commands to list, add and remove entries differ between the kinds of
+    lists, see the examples.
+  - Entries are compared as exact strings after removing leading and
+    trailing whitespace, they must be written as the device shows them.
+options:
+  entries:
+    description:
+      - The entries of the list.
+    type: list
+    required: true
+  state:
+    description:
+      - With C(present) the entries are added when missing, with C(absent)
+        they are removed when found. With C(replaced) entries not in
+        I(entries) are removed as well.
+    type: str
+    choices: ['present', 'absent', 'replaced']
+    default: present
+  show:
+    description:
+      - The command showing the current entries of the list.
+    type: str
+    required: true
+  entry_regex:
+    description:
+      - Regular expression matching the lines of the I(show) output that hold
+        an entry, in multiline mode. The entry is the first group of the
+        expression or the whole match when it has none.
+      - It must not match the headers and other text of the output, with
+        I(state=replaced) every entry found that is not in I(entries) is
+        removed.
+    type: str
+    required: true
+  parents:
+    description:
+      - The commands entering the configuration mode of the list, they are
+        sent before every batch.
+    type: list
+  add:
+    description:
+      - The command adding an entry, C({entry}) is replaced by the entry.
+      - Required with I(state=present) and I(state=replaced).
+    type: str
+  remove:
+    description:
+      - The command removing an entry, C({entry}) is replaced by the entry.
+      - Required with I(state=absent) and I(state=replaced).
+    type: str
+  inline:
+    description:
+      - The C(inline) command replacing the whole list with the lines sent
+        after it, without the end of file marker.
+      - When not given the additions and removals are always sent one by
+        one.
+    type: str
+  inline_threshold:
+    description:
+      - Replace the whole list with I(inline) when more than this many
+        entries are added and removed.
+    type: int
+    default: 1000
+  chunk_size:
+    description:
+      - The number of commands sent in one batch.
+    type: int
+    default: 500
+  eof_marker:
+    description:
+      - The end of file marker of the I(inline) block.
+    type: str
+    default: "_EOF"
+"""
+
+EXAMPLES = """
+- name: Allow the management stations
+  sgos_list:
+    show: show security allowed-access
+    entry_regex: '^\\s*(\\d+\\.\\d+\\.\\d+\\.\\d+ \\d+\\.\\d+\\.\\d+\\.\\d+)\\s*$'
+    add: security allowed-access add {entry}
+    remove: security allowed-access remove {entry}
+    entries:
+      - 10.1.0.5 255.255.255.255
+      - 10.1.1.0 255.255.255.0
+
+- name: Keep the users of a local user list in sync
+  sgos_list:
+    state: replaced
+    show: show security local-user-list guests
+    entry_regex: '^\\s*Username:\\s*(\\S+)'
+    parents: security local-user-list edit guests
+    add: user create {entry}
+    remove: user delete {entry}
+    entries: "{{ guest_users }}"
+
+- name: Replace a large bypass list in one go when much of it changed
+  sgos_list:
+    state: replaced
+    show: show bypass-list local
+    entry_regex: '^\\s*(\\d+\\.\\d+\\.\\d+\\.\\d+/\\d+)\\s*$'
+    add: bypass-list local add {entry}
+    remove: bypass-list local remove {entry}
+    inline: inline bypass-list local
+    inline_threshold: 5000
+    entries: "{{ lookup('file', 'bypass.txt').splitlines() }}"
+"""
+
+RETURN = """
+commands:
+  description: The commands sent to the device, without the I(parents)
+  returned: always
+  type: list
+  sample: ['security allowed-access add 10.1.0.5 255.255.255.255']
+added:
+  description: The entries added to the list
+  returned: always
+  type: list
+  sample: ['10.1.0.5 255.255.255.255']
+removed:
+  description: The entries removed from the list
+  returned: always
+  type: list
+  sample: []
+inline:
+  description: Whether the whole list was replaced with I(inline)
+  returned: always
+  type: bool
+"""
+
+import re
+
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import run_commands, load_config, profiled
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_text
+
+
+def unique(entries):
+    """Returns the entries without blanks and duplicates, in their order"""
+    seen = set()
+    result = list()
+    for entry in entries:
+        entry = to_text(entry, errors='surrogate_or_strict').strip()
+        if entry and entry not in seen:
+            seen.add(entry)
+            result.append(entry)
+    return result
+
+
+def parse_entries(output, entry_regex):
+    """Returns the entries of a list from the output of its show command"""
+    regex = re.compile(entry_regex, re.M)
+    output = output.replace('\r\n', '\n')
+    group = 1 if regex.groups else 0
+    return unique(match.group(group) for match in regex.finditer(output))
+
+
+def diff_entries(current, entries, state):
+    """Returns the entries to add and to remove as two lists"""
+    current_set = set(current)
+    if state == 'absent':
+        entries_set = set(entries)
+        return [], [entry for entry in current if entry in entries_set]
+
+    added = [entry for entry in entries if entry not in current_set]
+    if state == 'present':
+        return added, []
+
+    entries_set = set(entries)
+    return added, [entry for entry in current if entry not in entries_set]
+
+
+def push(module, commands, parents, chunk_size):
+    """Sends the commands in batches of ``chunk_size``
+
+    Every batch enters the configuration mode of the list with ``parents``
+    and leaves configuration mode at its end.
+    """
+    exits = ['exit'] * (len(parents) + 1)
+    for offset in range(0, len(commands), chunk_size):
+        load_config(module, parents + commands[offset:offset + chunk_size] + exits)
+
+
+@profiled('sgos_list')
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        entries=dict(type='list', required=True),
+        state=dict(default='present', choices=['present', 'absent', 'replaced']),
+        show=dict(required=True),
+        entry_regex=dict(required=True),
+        parents=dict(type='list'),
+        add=dict(),
+        remove=dict(),
+        inline=dict(),
+        inline_threshold=dict(type='int', default=1000),
+        chunk_size=dict(type='int', default=500),
+        eof_marker=dict(default='_EOF'),
+    )
+
+    required_if = [('state', 'present', ['add']),
+                   ('state', 'absent', ['remove']),
+                   ('state', 'replaced', ['add', 'remove'])]
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           required_if=required_if,
+                           supports_check_mode=True)
+
+    state = module.params['state']
+    parents = module.params['parents'] or list()
+    eof_marker = module.params['eof_marker']
+    if module.params['chunk_size'] < 1:
+        module.fail_json(msg='chunk_size must be at least 1')
+
+    try:
+        current = parse_entries(run_commands(module, [module.params['show']])[0], module.params['entry_regex'])
+    except re.error as e:
+        module.fail_json(msg='invalid entry_regex: %s' % to_text(e))
+
+    entries = unique(module.params['entries'])
+    added, removed = diff_entries(current, entries, state)
+
+    result = {'changed': False, 'commands': [], 'added': added, 'removed': removed, 'inline': False}
+    if not added and not removed:
+        module.exit_json(**result)
+
+    if module.params['inline'] and len(added) + len(removed) > module.params['inline_threshold']:
+        if state == 'replaced':
+            target = entries
+        else:
+            removed_set = set(removed)
+            target = [entry for entry in current if entry not in removed_set] + added
+        block = '%s %s\n%s' % (module.params['inline'], eof_marker, '\n'.join(target))
+        result['commands'] = [block, eof_marker]
+        result['inline'] = True
+        commands = [dict(command=block, prompt=None, answer=None, eof_marker=eof_marker), eof_marker]
+        chunk_size = len(commands)
+    else:
+        result['commands'] = ([module.params['remove'].replace('{entry}', entry) for entry in removed] +
+                              [module.params['add'].replace('{entry}', entry) for entry in added])
+        commands = result['commands']
+        chunk_size = module.params['chunk_size']
+
+    if not module.check_mode:
+        push(module, commands, parents, chunk_size)
+
+    result['changed'] = True
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/python
+#
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+module: sgos_policy
+version_added: "2.9"
+author: "cwkwan@gmail.com"
+short_description: Install policy files on devices running Proxy SGOS from a URL
+description:
+  - Points a policy file of a remote device running SGOS at a URL and loads
+    it from there, so the device fetches the whole policy in one HTTP
+    transfer instead of it being typed into an C(inline) block line by line.
+  - With I(src) the rendered file is served by a short-lived HTTP server on
+    the Ansible control host for the time of the task only, under a random
+    path.
+  - The policy is only loaded when its checksum differs from the policy
+    installed on the device, and the installed policy is verified against
+    the checksum afterwards.
+notes:
+  - Tested against SGOS 6.7.4.144, Ansible 2.9.1
+  - The device must be able to open HTTP connections to I(serve_address).
+    The file is sent unencrypted, use I(url) with an HTTPS server for
+    policies that hold secrets.
+  - The path of the policy file is left pointing at the URL. Loading the
+    policy again outside of Ansible fails once the task has finished.
+  - Loading a large policy can take longer than the default command timeout,
+    raise C(ansible_command_timeout) for such tasks.
+  - Blank lines, comments and trailing whitespace are ignored when comparing
+    the checksums.
+options:
+  policy:
+    description:
+      - The policy file to install.
+    type: str
+    choices: ['local', 'central', 'forward']
+    default: local
+  src:
+    description:
+      - Path of the policy file or template to install. The path can either
+        be the full path on the Ansible control host or a relative path from
+        the playbook or role root directory.
+      - This argument is mutually exclusive with I(url).
+    type: path
+  url:
+    description:
+      - URL the device loads the policy from, when it is served elsewhere.
+      - This argument is mutually exclusive with I(src).
+    type: str
+  checksum:
+    description:
+      - SHA-256 of the policy at I(url) as computed by this module. When not
+        given the policy at I(url) is always loaded and not verified.
+      - Computed from the rendered file with I(src).
+    type: str
+  serve_address:
+    description:
+      - Address on the control host to serve I(src) on, as seen from the
+        device. Defaults to the address of the interface the control host
+        reaches the device over.
+    type: str
+  serve_port:
+    description:
+      - Port to serve I(src) on, a free port is picked when 0.
+    type: int
+    default: 0
+  verify:
+    description:
+      - Compare the checksum of the installed policy with I(checksum) after
+        loading it and fail when they differ.
+    type: bool
+    default: true
+"""
+
+EXAMPLES = """
+- name: Install the local policy from a template
+  sgos_policy:
+    src: local_policy.txt.j2
+
+- name: Serve the policy over a dedicated interface
+  sgos_policy:
+    policy: central
+    src: /srv/policies/central.txt
+    serve_address: 10.1.0.5
+    serve_port: 8080
+
+- name: Load the policy from a web server
+  sgos_policy:
+    url: https://repo.example.com/policies/local.txt
+    checksum: "{{ lookup('file', 'local.txt.sha256') }}"
+"""
+
+RETURN = """
+commands:
+  description: The commands sent to the device
+  returned: always
+  type: list
+  sample: ['policy local-path http://10.1.0.5:41234/4f1c.../local.txt', 'load policy local']
+checksum:
+  description: The checksum of the policy to install
+  returned: when I(checksum) or I(src) is given
+  type: str
+  sample: 9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08
+response:
+  description: The output of the load command
+  returned: when the policy was loaded
+  type: str
+downloads:
+  description: How many times the device fetched I(src) from the control host
+  returned: when I(src) is given
+  type: int
+  sample: 1
+"""
+
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import (run_commands, load_config, policy_checksum,
+                                                                       profiled)
+from ansible.module_utils.basic import AnsibleModule
+
+
+def get_installed_checksum(module, policy):
+    """Returns the checksum of the policy file installed on the device"""
+    source = run_commands(module, ['show sources policy %s' % policy])[0]
+    return policy_checksum(source)
+
+
+@profiled('sgos_policy')
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        policy=dict(default='local', choices=['local', 'central', 'forward']),
+        src=dict(type='path'),
+        url=dict(),
+        checksum=dict(),
+        serve_address=dict(),
+        serve_port=dict(type='int', default=0),
+        verify=dict(type='bool', default=True),
+    )
+
+    mutually_exclusive = [('src', 'url')]
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           mutually_exclusive=mutually_exclusive,
+                           required_one_of=[('src', 'url')],
+                           supports_check_mode=True)
+
+    policy = module.params['policy']
+    url = module.params['url']
+    checksum = module.params['checksum']
+    if not url:
+        # the action plugin serves src and replaces it with the url
+        module.fail_json(msg='src can only be served by the sgos_policy action plugin')
+
+    result = {'changed': False}
+    result['commands'] = ['policy %s-path %s' % (policy, url), 'load policy %s' % policy]
+
+    if checksum:
+        result['checksum'] = checksum
+        if get_installed_checksum(module, policy) == checksum:
+            result['commands'] = []
+            module.exit_json(**result)
+
+    if not module.check_mode:
+        load_config(module, result['commands'][:1])
+        result['response'] = run_commands(module, result['commands'][1:])[0]
+
+        if checksum and module.params['verify'] and get_installed_checksum(module, policy) != checksum:
+            module.fail_json(msg='the %s policy installed on the device does not match the checksum %s'
+                             % (policy, checksum), **result)
+
+    result['changed'] = True
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/python
+#
+#
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+DOCUMENTATION = """
+---
+module: sgos_stats
+version_added: "2.9"
+author: "cwkwan@gmail.com"
+short_description: Sample statistics counters from devices running Proxy SGOS
+description:
+  - Fetches one or more C(show advanced-url) diagnostic pages from a remote
+    device running SGOS in a single session and parses them into numeric
+    counters.
+  - When I(state_file) is given, the previous sample is read from it and the
+    per second rate of every counter is returned. The new sample is then
+    stored in the file for the next run.
+notes:
+  - Tested against SGOS 6.7.4.144, Ansible 2.9.1
+  - Only values that start with a number are returned, units such as C(MB)
+    or C(%) are dropped.
+  - A counter is left out of I(rates) if it decreased since the previous
+    sample, e.g. after a reboot.
+options:
+  gather_subset:
+    description:
+      - When supplied, this argument will restrict the statistics pages
+        fetched to a given subset. Possible values for this argument include
+        all, cpu, http, tcp and cache. Values can also be used with an
+        initial C(M(!)) to specify that a specific subset should not be
+        fetched.
+    required: false
+    type: list
+    default: 'all'
+  urls:
+    description:
+      - Additional C(advanced-url) paths to fetch. The counters of each page
+        are returned under the path as key.
+    required: false
+    type: list
+  state_file:
+    description:
+      - Path of a file on the Ansible control host to store the sample in.
+        Use one file per device, for example by templating
+        C(inventory_hostname) into the path.
+    required: false
+    type: path
+"""
+
+EXAMPLES = """
+# Sample all statistics pages
+- sgos_stats:
+
+# Sample CPU and HTTP counters and compute rates since the previous poll
+- sgos_stats:
+    gather_subset:
+      - cpu
+      - http
+    state_file: "/var/lib/sgos/stats/{{ inventory_hostname }}.json"
+
+# Fetch an additional diagnostic page
+- sgos_stats:
+    gather_subset: "!all"
+    urls:
+      - /SSL/Statistics
+"""
+
+RETURN = """
+timestamp:
+  description: The time the sample was taken, in seconds since the epoch
+  returned: always
+  type: float
+counters:
+  description: The numeric counters of each fetched page
+  returned: always
+  type: dict
+  sample: {'http': {'Client connections': 1523, 'Requests': 4401234}}
+interval:
+  description: The number of seconds since the previous sample
+  returned: when a previous sample was found in state_file
+  type: float
+rates:
+  description: The per second rate of each counter since the previous sample
+  returned: when a previous sample was found in state_file
+  type: dict
+  sample: {'http': {'Requests': 120.5}}
+"""
+
+import json
+import os
+import time
+
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import run_commands, parse_key_values, to_number, profiled
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_native
+from ansible.module_utils.six import iteritems
+
+
+STAT_PAGES = dict(
+    cpu='/Diagnostics/CPU_Monitor',
+    http='/HTTP/Statistics',
+    tcp='/TCP/Statistics',
+    cache='/CM/Statistics')
+
+VALID_SUBSETS = frozenset(STAT_PAGES.keys())
+
+
+def parse_counters(data):
+    counters = dict()
+    for key, value in iteritems(parse_key_values(data)):
+        value = to_number(value)
+        if value is not None:
+            counters[key] = value
+    return counters
+
+
+def compute_rates(current, previous, interval):
+    rates = dict()
+    if interval <= 0:
+        return rates
+
+    for page, counters in iteritems(current):
+        previous_counters = previous.get(page) or dict()
+        page_rates = dict()
+        for key, value in iteritems(counters):
+            previous_value = previous_counters.get(key)
+            if previous_value is None or value < previous_value:
+                continue
+            page_rates[key] = (value - previous_value) / float(interval)
+        rates[page] = page_rates
+
+    return rates
+
+
+def load_sample(module, path):
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError) as exc:
+        module.warn('Ignoring unreadable state file %s: %s' % (path, to_native(exc)))
+
+
+def save_sample(module, path, sample):
+    tmpfile = '%s.tmp' % path
+    try:
+        with open(tmpfile, 'w') as f:
+            json.dump(sample, f)
+    except (IOError, OSError) as exc:
+        module.fail_json(msg='Failed to write state file %s: %s' % (path, to_native(exc)))
+    module.atomic_move(tmpfile, path)
+
+
+@profiled('sgos_stats')
+def main():
+    """main entry point for module execution
+    """
+    argument_spec = dict(
+        gather_subset=dict(default=['all'], type='list'),
+        urls=dict(type='list'),
+        state_file=dict(type='path'),
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    runable_subsets = set()
+    exclude_subsets = set()
+
+    for subset in module.params['gather_subset']:
+        if subset == 'all':
+            runable_subsets.update(VALID_SUBSETS)
+            continue
+
+        if subset.startswith('!'):
+            subset = subset[1:]
+            if subset == 'all':
+                exclude_subsets.update(VALID_SUBSETS)
+                continue
+            exclude = True
+        else:
+            exclude = False
+
+        if subset not in VALID_SUBSETS:
+            module.fail_json(msg='Bad subset')
+
+        if exclude:
+            exclude_subsets.add(subset)
+        else:
+            runable_subsets.add(subset)
+
+    if not runable_subsets and not exclude_subsets:
+        runable_subsets.update(VALID_SUBSETS)
+
+    runable_subsets.difference_update(exclude_subsets)
+
+    pages = [(key, STAT_PAGES[key]) for key in sorted(runable_subsets)]
+    pages.extend((url, url) for url in module.params['urls'] or list())
+    if not pages:
+        module.fail_json(msg='No statistics pages selected')
+
+    commands = ['show advanced-url %s' % url for name, url in pages]
+    responses = run_commands(module, commands)
+    timestamp = time.time()
+
+    counters = dict()
+    for (name, url), data in zip(pages, responses):
+        counters[name] = parse_counters(data)
+
+    result = {
+        'changed': False,
+        'timestamp': timestamp,
+        'counters': counters
+    }
+
+    state_file = module.params['state_file']
+    if state_file:
+        previous = load_sample(module, state_file)
+        if previous:
+            interval = timestamp - previous.get('timestamp', timestamp)
+            result['interval'] = interval
+            result['rates'] = compute_rates(counters, previous.get('counters') or dict(), interval)
+
+        if not module.check_mode:
+            save_sample(module, state_file, dict(timestamp=timestamp, counters=counters))
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
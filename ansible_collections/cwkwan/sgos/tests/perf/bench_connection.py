@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#
+"""Benchmark the sgos_network_cli connection plugin against a fake SGOS server.
+
+Measures connect time (SSH, login and terminal initialisation), commands per
+second for a short ``show version``, bytes per second for large outputs and
+batches of show commands sent over ``--channels`` shell channels.
+
+Example::
+
+    python bench_connection.py --latency 0.02 --bandwidth 1000000 --json bench.json
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+
+import sgos_bench
+from fake_sgos import FakeSgosServer
+
+
+def bench_connect(server, iterations):
+    def connect():
+        sgos_bench.open_connection(server).close()
+    return sgos_bench.summarize('connect', sgos_bench.measure(connect, iterations), unit='conn')
+
+
+def bench_commands(connection, iterations):
+    durations = sgos_bench.measure(lambda: connection.send(b'show version'), iterations)
+    return sgos_bench.summarize('show version', durations, unit='cmd')
+
+
+def bench_output(connection, lines, width, iterations):
+    command = b'show bench %d %d' % (lines, width)
+    durations = sgos_bench.measure(lambda: connection.send(command), iterations)
+    return sgos_bench.summarize('show bench %d x %d' % (lines, width), durations, units=lines * (width + 1), unit='B')
+
+
+def bench_parallel(connection, commands, iterations):
+    batch = [b'show version', b'show status', b'show appliance-name'] * (commands // 3)
+    durations = sgos_bench.measure(lambda: connection.send_parallel(batch), iterations)
+    return sgos_bench.summarize('send_parallel %d cmds / %d ch' % (len(batch), connection.get_option('channels')),
+                                durations, units=len(batch), unit='cmd')
+
+
+def bench_config(connection, lines, iterations):
+    commands = ['dns server 10.0.%d.%d' % (i // 256, i % 256) for i in range(lines)]
+    durations = sgos_bench.measure(lambda: connection.cliconf.edit_config(commands), iterations)
+    return sgos_bench.summarize('edit_config %d lines' % lines, durations, units=lines, unit='line')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before every response')
+    parser.add_argument('--bandwidth', type=int, default=0, help='bytes per second, unlimited when 0')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 100000], help='output sizes in lines')
+    parser.add_argument('--width', type=int, default=80, help='output line width')
+    parser.add_argument('--config-lines', type=int, default=100)
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 4], help='shell channels for send_parallel')
+    parser.add_argument('--batch', type=int, default=12, help='commands per send_parallel batch')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = list()
+    with FakeSgosServer(latency=args.latency, bandwidth=args.bandwidth) as server:
+        results.append(bench_connect(server, max(1, args.iterations // 4)))
+
+        connection = sgos_bench.open_connection(server)
+        try:
+            results.append(bench_commands(connection, args.iterations))
+            for lines in args.lines:
+                results.append(bench_output(connection, lines, args.width, max(1, args.iterations // 4)))
+            results.append(bench_config(connection, args.config_lines, max(1, args.iterations // 4)))
+        finally:
+            connection.close()
+
+        for channels in args.channels:
+            connection = sgos_bench.open_connection(server, channels=channels)
+            try:
+                results.append(bench_parallel(connection, args.batch, max(1, args.iterations // 4)))
+            finally:
+                connection.close()
+
+    sgos_bench.report(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
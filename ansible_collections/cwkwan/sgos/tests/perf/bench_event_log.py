@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+"""Compare collecting the whole event log with incremental sgos_event_log runs.
+
+Runs ansible-playbook against a fake SGOS server whose event log holds
+``--entries`` entries, and adds ``--new`` entries between the runs.
+sgos_command downloads the whole log on every run, sgos_event_log only
+asks for the entries since its cursor.
+
+Example::
+
+    python bench_event_log.py --entries 10000 100000 --new 10 --latency 0.005
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import sgos_bench
+from bench_modules import INVENTORY, run_playbook
+from fake_sgos import FakeSgosServer
+
+
+def make_events(start, count):
+    """Returns ``count`` event log entries, one per second from ``start`` seconds after midnight"""
+    return ['2019-12-02 %02d:%02d:%02d+00:00UTC  "Snapshot sysinfo_stats has fetched /SYSINFO/Stats"  0 '
+            '2D0006:96  ../Snapshot_worker.cpp:219' % ((second // 3600) % 24, (second // 60) % 60, second % 60)
+            for second in range(start, start + count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before every response')
+    parser.add_argument('--bandwidth', type=int, default=0, help='bytes per second, unlimited when 0')
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000, 10000], help='event log sizes in entries')
+    parser.add_argument('--new', type=int, default=10, help='entries logged between two runs')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    results = list()
+    try:
+        with FakeSgosServer(latency=args.latency, bandwidth=args.bandwidth) as server:
+            with open(os.path.join(workdir, 'inventory'), 'w') as f:
+                f.write(INVENTORY % dict(host=server.host, port=server.port, username=server.username,
+                                         password=server.password, python=sys.executable))
+
+            for count in args.entries:
+                # a day holds 86400 entries at one per second
+                count = min(count, 86400 - args.new)
+                server.event_log = make_events(0, count)
+                cursor = os.path.join(workdir, 'cursor-%d' % count)
+                run_playbook(workdir, 'sgos_event_log', {'cursor': cursor, 'return_records': False}, 1)
+                server.event_log.extend(make_events(count, args.new))
+
+                duration = run_playbook(workdir, 'sgos_command', {'commands': ['show event-log']}, 1)
+                results.append(sgos_bench.summarize('sgos_command full %d' % count, [duration]))
+                duration = run_playbook(workdir, 'sgos_event_log', {'cursor': cursor}, 1)
+                results.append(sgos_bench.summarize('sgos_event_log new %d' % count, [duration]))
+                with open(cursor) as f:
+                    if json.load(f)['timestamp'] != server.event_log[-1][:19]:
+                        raise SystemExit('sgos_event_log did not collect the new entries')
+    finally:
+        shutil.rmtree(workdir)
+
+    sgos_bench.report(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
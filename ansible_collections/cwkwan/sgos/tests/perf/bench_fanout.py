@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+#
+"""Benchmark the sgos_fanout engine against a fake SGOS server.
+
+Every host of the fleet is a different 127.0.0.0/8 address of the same fake
+server, so each one gets its own SSH connection.
+
+Example::
+
+    python bench_fanout.py --hosts 100 500 --latency 0.05 --connect-workers 64
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import os
+import sys
+
+import sgos_bench
+from fake_sgos import FakeSgosServer
+
+sys.path.insert(0, os.path.join(sgos_bench.COLLECTIONS_PATH, 'bin'))
+import sgos_fanout  # noqa: E402
+
+
+COMMANDS = ['show version', 'show status', 'show appliance-name']
+
+
+def bench_fleet(server, hosts, concurrency, connect_workers):
+    fleet = [dict(name='sgos%d' % index, host='127.0.%d.%d' % (index // 250, 1 + index % 250), port=server.port,
+                  username=server.username, password=server.password) for index in range(hosts)]
+    results = list()
+    durations = sgos_bench.measure(lambda: results.extend(sgos_fanout.run_fleet(
+        fleet, COMMANDS, concurrency=concurrency, connect_workers=connect_workers)))
+    failed = [result for result in results if result['failed']]
+    if failed:
+        print('%d hosts failed, first: %s' % (len(failed), failed[0]['msg']))
+    return sgos_bench.summarize('fleet %d hosts' % hosts, durations, units=hosts, unit='host')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before every response')
+    parser.add_argument('--hosts', type=int, nargs='+', default=[10, 100], help='fleet sizes')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--connect-workers', type=int, default=32)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = list()
+    with FakeSgosServer(latency=args.latency, host='0.0.0.0') as server:
+        for hosts in args.hosts:
+            results.append(bench_fleet(server, hosts, args.concurrency, args.connect_workers))
+
+    sgos_bench.report(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
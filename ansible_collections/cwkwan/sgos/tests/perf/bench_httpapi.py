@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+#
+"""Compare fetching advanced-url pages over the cli and the management console.
+
+Fetches ``--pages`` diagnostic pages of ``--lines`` lines with
+``show advanced-url`` over a sgos_network_cli connection to a fake SGOS
+server, one at a time and over ``--channels`` shell channels, and over an
+httpapi connection to a fake management console with a keep-alive
+connection pool of ``--pool-size`` connections.
+
+Example::
+
+    python bench_httpapi.py --latency 0.02 --pages 12 --pool-size 1 4
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+
+import sgos_bench
+from fake_sgos import FakeSgosConsole, FakeSgosServer
+
+
+def make_pages(count, lines):
+    """Returns ``count`` diagnostic pages of ``lines`` counters each, by path"""
+    return dict(('/Bench/Page%d' % index, '\r\n'.join('Counter %d: %d' % (line, line * index) for line in range(lines)))
+                for index in range(count))
+
+
+def bench_cli(server, commands, channels, iterations):
+    connection = sgos_bench.open_connection(server, channels=channels)
+    try:
+        batch = [command.encode() for command in commands]
+        if channels > 1:
+            durations = sgos_bench.measure(lambda: connection.send_parallel(batch), iterations)
+        else:
+            durations = sgos_bench.measure(lambda: [connection.send(command) for command in batch], iterations)
+    finally:
+        connection.close()
+    return sgos_bench.summarize('cli %d pages / %d ch' % (len(commands), channels), durations,
+                                units=len(commands), unit='page')
+
+
+def bench_httpapi(console, commands, pool_size, iterations):
+    connection = sgos_bench.open_httpapi(console, pool_size=pool_size)
+    try:
+        durations = sgos_bench.measure(lambda: connection.httpapi.run_commands(commands), iterations)
+    finally:
+        connection.close()
+    return sgos_bench.summarize('httpapi %d pages / pool %d' % (len(commands), pool_size), durations,
+                                units=len(commands), unit='page')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds before every response')
+    parser.add_argument('--pages', type=int, default=12, help='pages fetched per iteration')
+    parser.add_argument('--lines', type=int, default=50, help='lines per page')
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 4], help='shell channels of the cli connection')
+    parser.add_argument('--pool-size', type=int, nargs='+', default=[1, 4], help='httpapi connection pool sizes')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.lines)
+    commands = ['show advanced-url %s' % path for path in sorted(pages)]
+
+    results = list()
+    with FakeSgosServer(latency=args.latency, pages=pages) as server:
+        for channels in args.channels:
+            results.append(bench_cli(server, commands, channels, args.iterations))
+    with FakeSgosConsole(latency=args.latency, pages=pages) as console:
+        for pool_size in args.pool_size:
+            results.append(bench_httpapi(console, commands, pool_size, args.iterations))
+
+    sgos_bench.report(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
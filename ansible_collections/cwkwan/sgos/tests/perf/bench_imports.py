@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+#
+"""Benchmark the import time of the sgos modules.
+
+Imports every module in a fresh interpreter with ``python -X importtime``,
+as the AnsiballZ wrapper does on every task, and reports the cumulative
+import time. The run fails when a module imports one of the helpers kept
+off the common path, or with --budget when its fastest import takes longer
+than that many milliseconds.
+
+Example::
+
+    python bench_imports.py --iterations 10 --budget 80
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import subprocess
+import sys
+
+import sgos_bench
+
+
+MODULES = ['sgos_command', 'sgos_config', 'sgos_facts', 'sgos_policy', 'sgos_stats']
+
+# only imported by the modules for the tasks that need them
+LAZY_IMPORTS = [
+    'jinja2',
+    'ansible.module_utils.network.common.utils',
+    'ansible.module_utils.network.common.parsing',
+]
+
+
+def import_times(module):
+    """Returns the cumulative import time in seconds of every package imported by ``module``"""
+    name = 'ansible_collections.cwkwan.sgos.plugins.modules.%s' % module
+    env = sgos_bench.ansible_env()
+    env['PYTHONPATH'] = sgos_bench.COLLECTIONS_PATH
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import %s' % name],
+                            env=env, stderr=subprocess.PIPE, check=True, universal_newlines=True).stderr
+
+    times = dict()
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        cumulative, package = line.split('|')[1:]
+        times[package.strip()] = int(cumulative) / 1000000.0
+    return times[name], times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5, help='imports per module')
+    parser.add_argument('--modules', nargs='+', default=MODULES, choices=MODULES)
+    parser.add_argument('--budget', type=float, help='fail when a module takes longer than this many ms to import')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = list()
+    errors = list()
+    for module in args.modules:
+        durations = list()
+        for i in range(args.iterations):
+            duration, times = import_times(module)
+            durations.append(duration)
+
+        results.append(sgos_bench.summarize(module, durations, unit='import'))
+        errors.extend('%s imports %s' % (module, name) for name in LAZY_IMPORTS if name in times)
+        if args.budget and min(durations) * 1000 > args.budget:
+            errors.append('%s takes %.1fms to import, the budget is %.1fms' % (module, min(durations) * 1000,
+                                                                               args.budget))
+
+    sgos_bench.report(results, args.json)
+    if errors:
+        sys.exit('\n'.join(errors))
+
+
+if __name__ == '__main__':
+    main()
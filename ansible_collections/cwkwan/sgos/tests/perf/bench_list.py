@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#
+"""Compare pushing a whole list with sgos_config to sending the delta with sgos_list.
+
+Runs ansible-playbook against a fake SGOS server holding an address list of
+``--entries`` entries, and changes one entry of it. sgos_config sends every
+entry of the list again, sgos_list reads the list once and sends the one
+entry added and the one removed. sgos_config is only run for lists of up to
+``--config-max`` entries, it takes a round trip per entry.
+
+Example::
+
+    python bench_list.py --entries 1000 10000 100000 --latency 0.005
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import sgos_bench
+from bench_modules import INVENTORY, run_playbook
+from fake_sgos import FakeSgosServer
+
+
+ADD = 'security allowed-access add %s'
+
+
+def make_entries(count):
+    """Returns ``count`` distinct addresses"""
+    return ['10.%d.%d.%d' % (index >> 16, (index >> 8) & 255, index & 255) for index in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before every response')
+    parser.add_argument('--bandwidth', type=int, default=0, help='bytes per second, unlimited when 0')
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000, 10000], help='list sizes in entries')
+    parser.add_argument('--config-max', type=int, default=1000, help='largest list to push with sgos_config')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    results = list()
+    try:
+        with FakeSgosServer(latency=args.latency, bandwidth=args.bandwidth) as server:
+            with open(os.path.join(workdir, 'inventory'), 'w') as f:
+                f.write(INVENTORY % dict(host=server.host, port=server.port, username=server.username,
+                                         password=server.password, python=sys.executable))
+
+            for count in args.entries:
+                entries = make_entries(count)
+                changed = entries[1:] + ['192.168.0.1']
+
+                if count <= args.config_max:
+                    server.config = [ADD % entry for entry in entries]
+                    duration = run_playbook(workdir, 'sgos_config', {'lines': [ADD % entry for entry in changed]}, 1)
+                    results.append(sgos_bench.summarize('sgos_config %d' % count, [duration], units=count,
+                                                        unit='entry'))
+
+                server.config = [ADD % entry for entry in entries]
+                pushed = len(server.commands)
+                duration = run_playbook(workdir, 'sgos_list', {
+                    'state': 'replaced',
+                    'show': 'show configuration',
+                    'entry_regex': r'^security allowed-access add (\S+)$',
+                    'add': ADD % '{entry}',
+                    'remove': 'security allowed-access remove {entry}',
+                    'entries': changed,
+                }, 1)
+                results.append(sgos_bench.summarize('sgos_list %d' % count, [duration], units=count, unit='entry'))
+
+                pushed = [cmd for cmd in server.commands[pushed:] if cmd.startswith('security')]
+                if pushed != ['security allowed-access remove 10.0.0.0', ADD % '192.168.0.1']:
+                    raise SystemExit('sgos_list sent %d list commands, expected 2' % len(pushed))
+    finally:
+        shutil.rmtree(workdir)
+
+    sgos_bench.report(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#
+"""Benchmark the sgos modules end to end against a fake SGOS server.
+
+Runs ansible-playbook with the persistent sgos_network_cli connection and
+repeats each module task a number of times. The first task of every play
+pays for the connect, so it is reported separately from the per task time.
+With --loop an sgos_command task looping over that many items is timed too.
+
+Example::
+
+    python bench_modules.py --tasks 20 --latency 0.02 --loop 200
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import sgos_bench
+from fake_sgos import FakeSgosServer
+
+
+MODULE_TASKS = {
+    'sgos_command': {'commands': ['show version', 'show appliance-name']},
+    'sgos_facts': {'gather_subset': ['default']},
+    'sgos_config': {'lines': ['dns server 10.0.0.1', 'ntp server 10.0.0.2']},
+}
+
+INVENTORY = """\
+sgos ansible_host=%(host)s ansible_port=%(port)d ansible_user=%(username)s ansible_password=%(password)s \
+ansible_network_os=sgos ansible_connection=sgos_network_cli ansible_python_interpreter=%(python)s
+"""
+
+LOOP_ITEMS = ['version', 'appliance-name']
+
+
+def run_playbook(workdir, module, args, tasks, loop=None):
+    task = {'cwkwan.sgos.%s' % module: args}
+    if loop:
+        task['loop'] = loop
+    play = [{
+        'hosts': 'sgos',
+        'gather_facts': False,
+        'tasks': [task] * tasks,
+    }]
+    playbook = os.path.join(workdir, '%s.yml' % module)
+    with open(playbook, 'w') as f:
+        json.dump(play, f)
+
+    start = time.time()
+    subprocess.check_call(['ansible-playbook', '-i', os.path.join(workdir, 'inventory'), playbook],
+                          env=sgos_bench.ansible_env(), stdout=subprocess.DEVNULL)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before every response')
+    parser.add_argument('--bandwidth', type=int, default=0, help='bytes per second, unlimited when 0')
+    parser.add_argument('--tasks', type=int, default=10, help='tasks per module')
+    parser.add_argument('--modules', nargs='+', default=sorted(MODULE_TASKS), choices=sorted(MODULE_TASKS))
+    parser.add_argument('--loop', type=int, default=0, help='items of the looped sgos_command task')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    results = list()
+    try:
+        with FakeSgosServer(latency=args.latency, bandwidth=args.bandwidth) as server:
+            with open(os.path.join(workdir, 'inventory'), 'w') as f:
+                f.write(INVENTORY % dict(host=server.host, port=server.port, username=server.username,
+                                         password=server.password, python=sys.executable))
+
+            for module in args.modules:
+                # a play with one task measures the fixed cost of a run
+                single = run_playbook(workdir, module, MODULE_TASKS[module], 1)
+                total = run_playbook(workdir, module, MODULE_TASKS[module], args.tasks + 1)
+                per_task = (total - single) / args.tasks
+
+                results.append(sgos_bench.summarize('%s (first task)' % module, [single], unit='task'))
+                results.append(sgos_bench.summarize(module, [per_task] * args.tasks, unit='task'))
+
+            if args.loop:
+                loop = [LOOP_ITEMS[i % len(LOOP_ITEMS)] for i in range(args.loop)]
+                single = run_playbook(workdir, 'sgos_command', {'commands': ['show version']}, 1)
+                total = run_playbook(workdir, 'sgos_command', {'commands': ['show {{ item }}']}, 1, loop)
+                results.append(sgos_bench.summarize('sgos_command (loop)', [(total - single) / args.loop] * args.loop,
+                                                    unit='item'))
+    finally:
+        shutil.rmtree(workdir)
+
+    sgos_bench.report(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+#
+"""Micro-benchmarks for the pure CPU hot paths of the collection.
+
+Times candidate building in sgos_config, the show output parser used by the
+facts modules, the sgos_config_tree lookup, and the response handling of the connection plugin
+(_strip, _sanitize and _find_prompt) on synthetic SGOS configs, policies
+and show outputs of the given sizes.
+
+Results can be saved as a baseline and later runs compared against it; a
+benchmark slower than ``--threshold`` times its baseline fails the run::
+
+    python bench_parsers.py --sizes 10000 100000 --save-baseline
+    python bench_parsers.py --sizes 10000 100000 --threshold 2
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+import sgos_bench
+
+from ansible.module_utils import basic
+from ansible.module_utils._text import to_bytes
+from ansible_collections.cwkwan.sgos.plugins.action import sgos_config as sgos_config_action
+from ansible_collections.cwkwan.sgos.plugins.lookup import sgos_config_tree
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import parse_key_values
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_config, sgos_stats
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_parsers_baseline.json')
+
+PROMPT = b'testdevice01#'
+
+
+def make_module(**params):
+    """Returns an AnsibleModule with the sgos_config argument spec and ``params``"""
+    args = dict(src=None, lines=None, prompt=None, answer=None, eof_marker='_EOF')
+    args.update(params)
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps({'ANSIBLE_MODULE_ARGS': args}))
+    return basic.AnsibleModule(argument_spec=dict(
+        src=dict(), lines=dict(type='list'), eof_marker=dict(default='_EOF'),
+        prompt=dict(type='list'), answer=dict(type='list')))
+
+
+def make_config(lines):
+    """Returns an SGOS config of about ``lines`` lines"""
+    config = list()
+    for index in range(lines):
+        if index % 50 == 0:
+            config.append('security local-user-list edit "list%d"' % index)
+        elif index % 50 == 49:
+            config.append('exit')
+        else:
+            config.append('user create "user%d"' % index)
+        if index % 10 == 0:
+            config.append('')
+    return '\n'.join(config)
+
+
+def make_policy(lines, blocks=10):
+    """Returns a config with ``blocks`` inline CPL blocks of ``lines`` lines in total"""
+    policy = list()
+    per_block = max(1, lines // blocks)
+    for block in range(blocks):
+        policy.append('inline policy local _EOF%d' % block)
+        for index in range(per_block):
+            policy.append('url.domain=host%d.block%d.example.com ALLOW' % (index, block))
+        policy.append('_EOF%d' % block)
+        policy.append('dns server 10.0.0.%d' % block)
+    return '\n'.join(policy)
+
+
+def make_show_output(lines):
+    """Returns show output of ``lines`` "Key: value" and "Key : value" lines"""
+    output = list()
+    for index in range(lines):
+        if index % 2:
+            output.append('  Counter number %d:          %d' % (index, index * 7))
+        else:
+            output.append('Setting %d : value-%d' % (index, index))
+    return '\n'.join(output)
+
+
+def make_response(lines, command=b'show configuration'):
+    """Returns a raw device response with ANSI codes, the echoed command and the prompt"""
+    body = b''.join(b'line %d of output \x1b[K\r\n' % index for index in range(lines))
+    return command + b'\r\n' + body + PROMPT
+
+
+def bench_candidate(size, iterations):
+    results = list()
+
+    module = make_module(src=make_config(size))
+    results.append(sgos_bench.summarize('get_candidate config %d' % size,
+                                        sgos_bench.measure(lambda: sgos_config.get_candidate(module), iterations),
+                                        units=size, unit='line'))
+
+    module = make_module(src=make_policy(size))
+    results.append(sgos_bench.summarize('get_candidate policy %d' % size,
+                                        sgos_bench.measure(lambda: sgos_config.get_candidate(module), iterations),
+                                        units=size, unit='line'))
+
+    # another host of the play, the action plugin reads the commands from
+    # the cache and the module gets them as lines
+    cache_dir = tempfile.mkdtemp()
+    try:
+        policy = make_policy(size)
+        sgos_config_action.candidate_commands(policy, cache_dir)
+
+        def cached():
+            sgos_config_action.CANDIDATES.clear()
+            return sgos_config_action.candidate_commands(policy, cache_dir)
+
+        results.append(sgos_bench.summarize('cached candidate policy %d' % size,
+                                            sgos_bench.measure(cached, iterations), units=size, unit='line'))
+        commands = cached()
+    finally:
+        shutil.rmtree(cache_dir)
+
+    module = make_module(lines=commands)
+    results.append(sgos_bench.summarize('get_candidate lines policy %d' % size,
+                                        sgos_bench.measure(lambda: sgos_config.get_candidate(module), iterations),
+                                        units=size, unit='line'))
+
+    lines = make_config(size).splitlines()
+    results.append(sgos_bench.summarize('parse_lines %d' % size,
+                                        sgos_bench.measure(lambda: sgos_config.parse_lines(lines), iterations),
+                                        units=size, unit='line'))
+    return results
+
+
+def bench_facts(size, iterations):
+    output = make_show_output(size)
+    return [
+        sgos_bench.summarize('parse_key_values %d' % size,
+                             sgos_bench.measure(lambda: parse_key_values(output), iterations),
+                             units=size, unit='line'),
+        sgos_bench.summarize('parse_counters %d' % size,
+                             sgos_bench.measure(lambda: sgos_stats.parse_counters(output), iterations),
+                             units=size, unit='line'),
+    ]
+
+
+def bench_lookup(size, iterations):
+    config = make_config(size)
+    keywords = ['security local-user-list edit "list%d"' % index for index in range(0, size, size // 100 or 1)]
+
+    def scan():
+        return [re.findall(r'^%s(.*)$' % re.escape(keyword), config, re.M) for keyword in keywords]
+
+    index = sgos_config_tree.build_index(sgos_config_tree.parse_config(config))
+    return [
+        sgos_bench.summarize('config tree index %d' % size,
+                             sgos_bench.measure(lambda: sgos_config_tree.build_index(
+                                 sgos_config_tree.parse_config(config)), iterations),
+                             units=size, unit='line'),
+        sgos_bench.summarize('config tree query %d x %d' % (size, len(keywords)),
+                             sgos_bench.measure(lambda: [sgos_config_tree.find_values(index['keywords'], k) for k in keywords],
+                                                iterations),
+                             units=len(keywords), unit='query'),
+        sgos_bench.summarize('regex query %d x %d' % (size, len(keywords)),
+                             sgos_bench.measure(scan, iterations), units=len(keywords), unit='query'),
+    ]
+
+
+def bench_connection(size, iterations):
+    connection = sgos_bench.load_connection()
+    connection._terminal_stdout_re = connection._terminal.terminal_stdout_re
+    connection._terminal_stderr_re = connection._terminal.terminal_stderr_re
+    connection._matched_prompt = PROMPT
+
+    response = make_response(size)
+    stripped = connection._strip(response)
+    window = stripped[-256:]
+
+    return [
+        sgos_bench.summarize('_strip %d' % size,
+                             sgos_bench.measure(lambda: connection._strip(response), iterations),
+                             units=len(response), unit='B'),
+        sgos_bench.summarize('_sanitize %d' % size,
+                             sgos_bench.measure(lambda: connection._sanitize(stripped, b'show configuration'), iterations),
+                             units=len(stripped), unit='B'),
+        sgos_bench.summarize('_find_prompt x %d' % size,
+                             sgos_bench.measure(lambda: [connection._find_prompt(window) for i in range(size // 100)], iterations),
+                             units=size // 100, unit='window'),
+    ]
+
+
+def compare(results, baseline, threshold):
+    """Returns a message for every result more than ``threshold`` times slower than its baseline"""
+    # the fastest iteration is the least affected by other load on the machine
+    regressions = list()
+    for row in results:
+        previous = baseline.get(row['name'])
+        if previous and row['min'] > previous['min'] * threshold:
+            regressions.append('%s: %.4fs, baseline %.4fs (%.1fx)' % (
+                row['name'], row['min'], previous['min'], row['min'] / previous['min']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='input sizes in lines')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--only', help='only run benchmarks whose name matches this regex')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file, default %(default)s')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=2.0,
+                        help='fail when a benchmark is this many times slower than its baseline')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = list()
+    for size in args.sizes:
+        results.extend(bench_candidate(size, args.iterations))
+        results.extend(bench_facts(size, args.iterations))
+        results.extend(bench_lookup(size, args.iterations))
+        results.extend(bench_connection(size, args.iterations))
+    if args.only:
+        results = [row for row in results if re.search(args.only, row['name'])]
+
+    sgos_bench.report(results, args.json)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(dict((row['name'], row) for row in results), f, indent=2, sort_keys=True)
+        print('baseline written to %s' % args.baseline)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print('\nslower than %sx the baseline:\n  %s' % (args.threshold, '\n  '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
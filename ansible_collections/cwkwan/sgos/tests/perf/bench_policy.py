@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#
+"""Compare installing a policy inline with sgos_config and by URL with sgos_policy.
+
+Runs ansible-playbook against a fake SGOS server, once pushing a generated
+policy of ``--lines`` lines through ``inline policy local`` with
+sgos_config, and once letting the device pull it from the control host
+with sgos_policy. The second sgos_policy run finds the policy installed
+and only compares checksums.
+
+Example::
+
+    python bench_policy.py --lines 1000 10000 --latency 0.005
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import sgos_bench
+from bench_modules import INVENTORY, run_playbook
+from fake_sgos import FakeSgosServer
+
+
+def make_policy(lines):
+    """Returns a CPL policy of ``lines`` rules"""
+    return '\n'.join('url.domain=host%d.example.com ALLOW' % index for index in range(lines)) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before every response')
+    parser.add_argument('--bandwidth', type=int, default=0, help='bytes per second, unlimited when 0')
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 10000], help='policy sizes in lines')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    results = list()
+    try:
+        # the device pulls the policy from 127.0.0.1
+        with FakeSgosServer(latency=args.latency, bandwidth=args.bandwidth) as server:
+            with open(os.path.join(workdir, 'inventory'), 'w') as f:
+                f.write(INVENTORY % dict(host=server.host, port=server.port, username=server.username,
+                                         password=server.password, python=sys.executable))
+
+            for lines in args.lines:
+                policy = make_policy(lines)
+                inline = os.path.join(workdir, 'inline.txt')
+                with open(inline, 'w') as f:
+                    f.write('inline policy local _EOF\n%s_EOF\n' % policy)
+                src = os.path.join(workdir, 'local.txt')
+                with open(src, 'w') as f:
+                    f.write(policy)
+
+                duration = run_playbook(workdir, 'sgos_config', {'src': inline}, 1)
+                results.append(sgos_bench.summarize('sgos_config inline %d' % lines, [duration], units=lines, unit='line'))
+
+                server.policies = dict()
+                duration = run_playbook(workdir, 'sgos_policy', {'src': src}, 1)
+                results.append(sgos_bench.summarize('sgos_policy load %d' % lines, [duration], units=lines, unit='line'))
+                if server.policies.get('local') != policy:
+                    raise SystemExit('sgos_policy did not install the policy')
+
+                duration = run_playbook(workdir, 'sgos_policy', {'src': src}, 1)
+                results.append(sgos_bench.summarize('sgos_policy unchanged %d' % lines, [duration],
+                                                    units=lines, unit='line'))
+    finally:
+        shutil.rmtree(workdir)
+
+    sgos_bench.report(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+#
+"""Find the SSH transport settings giving the best throughput to an appliance.
+
+Connects with every combination of the given ciphers, compression and
+channel window sizes, and times the connect and a large command output for
+each. The fastest combination is printed as the sgos_network_cli options to
+set for the appliance model. Without ``--host`` the fake SGOS server is used.
+
+Example::
+
+    python bench_transport.py --host proxy1 --user admin --password secret --model S200-20 \\
+        --command 'show configuration' --ciphers aes128-ctr aes128-gcm@openssh.com --window-sizes 2097152 8388608
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import itertools
+
+import sgos_bench
+from fake_sgos import FakeSgosServer
+
+
+class Appliance(object):
+
+    def __init__(self, host, port, username, password):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+
+
+def bench_settings(appliance, command, cipher, compression, window_size, iterations):
+    options = dict(ssh_ciphers=[cipher], ssh_compression=compression, ssh_window_size=window_size)
+    name = '%s %s %dk' % (cipher, 'zlib' if compression else 'none', window_size // 1024)
+
+    connections = list()
+    connect = sgos_bench.summarize('connect', sgos_bench.measure(
+        lambda: connections.append(sgos_bench.open_connection(appliance, **options))))
+    connection = connections[0]
+    try:
+        sizes = list()
+        durations = sgos_bench.measure(lambda: sizes.append(len(connection.send(command))), iterations)
+    finally:
+        connection.close()
+
+    row = sgos_bench.summarize(name, durations, units=sizes[0], unit='B')
+    row.update(connect=connect['mean'], settings=options)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', help='appliance to test, the fake SGOS server when not set')
+    parser.add_argument('--port', type=int, default=22)
+    parser.add_argument('--user', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--model', default='fake', help='appliance model to report the settings for')
+    parser.add_argument('--command', help="command with a large output, default 'show bench 20000' on the fake server")
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before every response of the fake server')
+    parser.add_argument('--bandwidth', type=int, default=0, help='bytes per second of the fake server, unlimited when 0')
+    parser.add_argument('--ciphers', nargs='+', default=['aes128-ctr', 'aes256-ctr', 'aes128-gcm@openssh.com',
+                                                         'aes256-gcm@openssh.com'])
+    parser.add_argument('--compression', nargs='+', default=['off', 'on'], choices=['off', 'on'])
+    parser.add_argument('--window-sizes', type=int, nargs='+', default=[2097152, 8388608])
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    server = None
+    if args.host:
+        appliance = Appliance(args.host, args.port, args.user, args.password)
+        command = args.command or 'show configuration'
+    else:
+        server = appliance = FakeSgosServer(latency=args.latency, bandwidth=args.bandwidth)
+        server.start()
+        command = args.command or 'show bench 20000'
+
+    results = list()
+    try:
+        for cipher, compression, window_size in itertools.product(args.ciphers, args.compression, args.window_sizes):
+            results.append(bench_settings(appliance, command.encode(), cipher, compression == 'on', window_size,
+                                          args.iterations))
+    finally:
+        if server:
+            server.stop()
+
+    sgos_bench.report(results, args.json)
+
+    best = max(results, key=lambda row: row['rate'])
+    print('\nbest throughput for %s: %s (%.1f B/s, connect %.2fs)' % (args.model, best['name'], best['rate'], best['connect']))
+    print('[persistent_connection]')
+    for option, value in sorted(best['settings'].items()):
+        print('%s = %s' % (option, ', '.join(value) if isinstance(value, list) else value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,467 @@
+#
+"""A local SSH server emulating the SGOS CLI, for benchmarks.
+
+Emulates the parts of the SGOS CLI the collection relies on: the
+``host>`` / ``host#`` / ``host#(config)`` prompts, ``enable`` with a
+password prompt, configuration sub modes, ``inline`` blocks terminated by
+an EOF marker, ``% `` error messages and ``--More--`` paging until
+``line-vty`` / ``no length`` is configured, and loading policy files from
+the URL set with ``policy <file>-path``. ``show event-log`` lists the
+entries of ``FakeSgosServer.event_log`` and supports the ``start`` and
+``regex`` options.
+
+Besides the regular show commands, ``show bench <lines> [<width>]`` returns
+a generated output of the given size. Latency and bandwidth of every
+response can be configured to mimic slow links.
+
+FakeSgosConsole serves the same ``advanced-url`` pages over HTTP like the
+management console of the appliance, with keep-alive connections.
+
+Usage::
+
+    with FakeSgosServer(latency=0.01, bandwidth=1024 * 1024) as server:
+        print(server.host, server.port)
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import base64
+import logging
+import re
+import socket
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.request import urlopen
+
+import paramiko
+
+
+VERSION = (
+    'Version: SGOS 6.7.4.144 Proxy Edition\r\n'
+    'Release id: 123456\r\n'
+    'UI Version: 6.7.4.144 Build: 252248\r\n'
+    'Serial number: 1234567890\r\n'
+    'NIC 0 MAC: A0B1C2D3E4F5'
+)
+
+HARDWARE_INFO = (
+    'Hardware Information\r\n'
+    '\r\n'
+    'Model: S200-20\r\n'
+    'RAM: 8192 MB\r\n'
+    'Number of physical CPUs: 1\r\n'
+    'Number of cores: 1'
+)
+
+STATUS = (
+    'System information:\r\n'
+    '  Memory installed:                8192 MB\r\n'
+    '  Memory available:                6021 MB\r\n'
+    '  CPUs installed:                  1'
+)
+
+INVALID_INPUT = '% Invalid input detected at "^" marker.'
+
+PAGE_LINES = 24
+
+
+class FakeSgosSession(object):
+    """Runs the CLI of one shell channel"""
+
+    def __init__(self, server, channel):
+        self.server = server
+        self.channel = channel
+        self.enabled = False
+        self.modes = list()
+        self.paging = True
+        self.inline_eof = None
+        self.inline_lines = list()
+
+    @property
+    def prompt(self):
+        hostname = self.server.hostname
+        if not self.enabled:
+            return '%s>' % hostname
+        if self.modes:
+            return '%s#(%s)' % (hostname, ' '.join(self.modes))
+        return '%s#' % hostname
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        chunk_size = self.server.chunk_size
+        for offset in range(0, len(data), chunk_size):
+            chunk = data[offset:offset + chunk_size]
+            if self.server.bandwidth:
+                time.sleep(len(chunk) / float(self.server.bandwidth))
+            self.channel.sendall(chunk)
+
+    def readline(self):
+        line = bytearray()
+        while True:
+            try:
+                data = self.channel.recv(1)
+            except socket.timeout:
+                # idle for longer than the CLI inactivity timeout
+                return None
+            if not data:
+                return None
+            if data in (b'\r', b'\n'):
+                return line.decode('utf-8')
+            line += data
+            # sgos_config sends the EOF marker of an inline block without a newline
+            if self.inline_eof is not None and line == self.inline_eof.encode('utf-8'):
+                return line.decode('utf-8')
+
+    def run(self):
+        if self.server.idle_timeout:
+            self.channel.settimeout(self.server.idle_timeout)
+        try:
+            self.write('\r\n%s' % self.prompt)
+            while True:
+                line = self.readline()
+                if line is None:
+                    break
+                if self.inline_eof is not None:
+                    self.handle_inline(line)
+                    continue
+                if self.server.echo:
+                    self.write('%s\r\n' % line)
+                if not self.handle(line.strip()):
+                    break
+        except (EOFError, socket.error):
+            # the client went away in the middle of a response
+            pass
+        self.channel.close()
+
+    def handle_inline(self, line):
+        # inline content is not echoed and gets no prompt until the EOF marker
+        if line.strip().startswith(self.inline_eof):
+            self.server.inline_blocks.append('\n'.join(self.inline_lines))
+            self.inline_eof = None
+            self.inline_lines = list()
+            self.write('ok\r\n%s' % self.prompt)
+        else:
+            self.inline_lines.append(line)
+
+    def handle(self, command):
+        self.server.commands.append(command)
+        words = command.split()
+        output = None
+
+        if not words:
+            pass
+        elif words[0] == 'enable':
+            if not self.enabled and self.server.enable_password is not None:
+                self.write('Enable Password:')
+                password = self.readline()
+                if password != self.server.enable_password:
+                    self.write('\r\n% Bad passwords\r\n%s' % self.prompt)
+                    return True
+            self.enabled = True
+        elif words[0] == 'disable':
+            self.enabled = False
+            self.modes = list()
+        elif words[0] in ('conf', 'configure'):
+            if not self.enabled:
+                output = INVALID_INPUT
+            else:
+                self.modes = ['config']
+        elif words[0] == 'exit':
+            if self.modes:
+                self.modes.pop()
+            else:
+                return False
+        elif words[0] == 'line-vty' and self.modes:
+            self.modes.append('line-vty')
+        elif command == 'no length' and self.modes[-1:] == ['line-vty']:
+            self.paging = False
+        elif words[0] == 'inline' and self.modes:
+            self.inline_eof = words[-1]
+            return True
+        elif words[0] == 'policy' and self.modes and len(words) == 3 and words[1].endswith('-path'):
+            self.server.policy_paths[words[1][:-len('-path')]] = words[2]
+        elif words[:2] == ['load', 'policy'] and self.enabled and len(words) == 3:
+            output = self.load_policy(words[2])
+        elif words[0] == 'appliance-name' and self.modes and len(words) == 2:
+            self.server.hostname = words[1]
+        elif words[0] == 'show':
+            output = self.show(words[1:])
+        elif self.modes and words[0] in self.server.config_commands:
+            self.server.config.append(command)
+        else:
+            output = INVALID_INPUT
+
+        if output:
+            if not output.endswith('\r\n'):
+                output += '\r\n'
+            self.write_paged(output)
+        self.write(self.prompt)
+        return True
+
+    def show(self, args):
+        if args == ['version']:
+            return VERSION + '\r\n'
+        if args == ['appliance-name']:
+            return 'Appliance name : %s\r\n' % self.server.hostname
+        if args == ['status']:
+            return STATUS + '\r\n'
+        if args[:1] == ['advanced-url'] and len(args) == 2:
+            page = self.server.pages.get(args[1])
+            if page is None:
+                return '% Not found: %s\r\n' % args[1]
+            return page + '\r\n'
+        if args[:1] == ['bench'] and len(args) in (2, 3):
+            lines = int(args[1])
+            width = int(args[2]) if len(args) == 3 else 80
+            return ''.join('%08d %s\r\n' % (index, 'x' * (width - 9)) for index in range(lines))
+        if args[:2] == ['sources', 'policy'] and len(args) == 3:
+            return self.server.policies.get(args[2], '').replace('\n', '\r\n') + '\r\n'
+        if args[:1] == ['event-log']:
+            return self.show_event_log(args[1:])
+        if args == ['configuration']:
+            return '\r\n'.join(self.server.config) + '\r\n'
+        return INVALID_INPUT + '\r\n'
+
+    def show_event_log(self, args):
+        events = self.server.event_log
+        if args[:1] == ['start'] and len(args) >= 3:
+            since = ' '.join(args[1:3])
+            events = [event for event in events if event[:19] >= since]
+            args = args[3:]
+        if args[:1] == ['regex'] and len(args) >= 2:
+            regex = re.compile(' '.join(args[1:]).strip('"'))
+            events = [event for event in events if regex.search(event)]
+        elif args:
+            return INVALID_INPUT + '\r\n'
+        return ''.join('%s\r\n' % event for event in events)
+
+    def load_policy(self, name):
+        url = self.server.policy_paths.get(name)
+        if not url:
+            return '%% No %s policy path configured' % name
+        try:
+            policy = urlopen(url, timeout=30).read().decode('utf-8')
+        except IOError as e:
+            return '%% Error downloading %s: %s' % (url, e)
+        self.server.policies[name] = policy.replace('\r\n', '\n')
+        return 'Loading from %s\r\n%d bytes loaded\r\nFinished loading' % (url, len(policy))
+
+    def write_paged(self, output):
+        if not self.paging:
+            self.write(output)
+            return
+
+        lines = output.splitlines(True)
+        for offset in range(0, len(lines), PAGE_LINES):
+            self.write(''.join(lines[offset:offset + PAGE_LINES]))
+            if offset + PAGE_LINES < len(lines):
+                self.write('--More--')
+                if self.channel.recv(1) in (b'q', b''):
+                    self.write('\r\n')
+                    return
+                self.write('\r        \r')
+
+
+class FakeSgosServerInterface(paramiko.ServerInterface):
+
+    def __init__(self, server):
+        self.server = server
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (self.server.username, self.server.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        session = FakeSgosSession(self.server, channel)
+        thread = threading.Thread(target=session.run)
+        thread.daemon = True
+        thread.start()
+        return True
+
+
+class FakeSgosServer(object):
+    """SSH server emulating an SGOS appliance on a local port
+
+    :kwarg latency: Seconds to wait before every response.
+    :kwarg bandwidth: Bytes per second to send responses at, unlimited when 0.
+    :kwarg chunk_size: Size of the chunks responses are sent in.
+    :kwarg echo: Echo commands back like a terminal does.
+    :kwarg idle_timeout: Seconds after which an idle session is closed, never when 0.
+    :kwarg host: Address to listen on, C(0.0.0.0) serves every 127.0.0.0/8 address.
+    """
+
+    host_key = None
+
+    def __init__(self, hostname='testdevice01', username='admin', password='admin', enable_password=None,
+                 latency=0.0, bandwidth=0, chunk_size=1024, echo=True, pages=None, idle_timeout=0, host='127.0.0.1',
+                 config_commands=('dns', 'ntp', 'clock', 'snmp', 'security', 'policy', 'user')):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.enable_password = enable_password
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+        self.echo = echo
+        self.idle_timeout = idle_timeout
+        self.pages = {'/Diagnostics/Hardware/Info': HARDWARE_INFO}
+        self.pages.update(pages or dict())
+        self.config_commands = config_commands
+
+        self.commands = list()
+        self.config = list()
+        self.inline_blocks = list()
+        self.policy_paths = dict()
+        self.policies = dict()
+        self.event_log = list()
+
+        self.host = host
+        self.port = None
+        self._socket = None
+        self._transports = list()
+        self._thread = None
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        if FakeSgosServer.host_key is None:
+            FakeSgosServer.host_key = paramiko.RSAKey.generate(2048)
+
+        # the client closing the session mid response is expected, do not report it
+        logging.getLogger('paramiko.transport').setLevel(logging.CRITICAL)
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, 0))
+        self._socket.listen(100)
+        self._socket.settimeout(0.2)
+        self.port = self._socket.getsockname()[1]
+
+        self._running = True
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+        for transport in self._transports:
+            transport.close()
+        self._socket.close()
+
+    def _serve(self):
+        while self._running:
+            try:
+                client, addr = self._socket.accept()
+            except socket.timeout:
+                continue
+            transport = paramiko.Transport(client)
+            # offers zlib, it is only used when the client asks for it
+            transport.use_compression(True)
+            transport.add_server_key(self.host_key)
+            transport.start_server(server=FakeSgosServerInterface(self))
+            self._transports.append(transport)
+
+
+class FakeSgosConsoleHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        console = self.server.console
+        console.requests.append(self.path)
+        credentials = base64.b64encode(('%s:%s' % (console.username, console.password)).encode()).decode()
+        if console.latency:
+            time.sleep(console.latency)
+
+        if self.headers.get('Authorization') != 'Basic %s' % credentials:
+            status, body = 401, 'Unauthorized'
+        elif self.path not in console.pages:
+            status, body = 404, 'Not Found'
+        else:
+            status, body = 200, console.pages[self.path]
+
+        body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSgosConsoleServer(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+
+class FakeSgosConsole(object):
+    """HTTP server emulating the management console of an SGOS appliance
+
+    :kwarg latency: Seconds to wait before every response.
+    :kwarg pages: Additional advanced-url pages, by path.
+    """
+
+    def __init__(self, username='admin', password='admin', latency=0.0, pages=None, host='127.0.0.1'):
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.pages = {'/Diagnostics/Hardware/Info': HARDWARE_INFO}
+        self.pages.update(pages or dict())
+
+        self.requests = list()
+
+        self.host = host
+        self.port = None
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        self._server = FakeSgosConsoleServer((self.host, 0), FakeSgosConsoleHandler)
+        self._server.console = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -0,0 +1,135 @@
+#
+"""Helpers shared by the benchmark scripts."""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import json
+import os
+import sys
+import time
+
+COLLECTION_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+COLLECTIONS_PATH = os.path.abspath(os.path.join(COLLECTION_DIR, '..', '..', '..'))
+CONNECTION_PLUGINS = os.path.join(COLLECTIONS_PATH, 'plugins', 'connection')
+TERMINAL_PLUGINS = os.path.join(COLLECTION_DIR, 'plugins', 'terminal')
+CLICONF_PLUGINS = os.path.join(COLLECTION_DIR, 'plugins', 'cliconf')
+HTTPAPI_PLUGINS = os.path.join(COLLECTION_DIR, 'plugins', 'httpapi')
+
+# The fake server generates a new host key for every run
+os.environ.setdefault('ANSIBLE_HOST_KEY_CHECKING', 'False')
+
+if COLLECTIONS_PATH not in sys.path:
+    sys.path.insert(0, COLLECTIONS_PATH)
+
+
+def ansible_env():
+    """Returns the environment to run ansible-playbook against the fake server with"""
+    env = dict(os.environ)
+    env.update(
+        ANSIBLE_HOST_KEY_CHECKING='False',
+        ANSIBLE_COLLECTIONS_PATHS=COLLECTIONS_PATH,
+        ANSIBLE_CONNECTION_PLUGINS=CONNECTION_PLUGINS,
+        ANSIBLE_TERMINAL_PLUGINS=TERMINAL_PLUGINS,
+        ANSIBLE_CLICONF_PLUGINS=CLICONF_PLUGINS,
+        ANSIBLE_RETRY_FILES_ENABLED='False',
+    )
+    return env
+
+
+def load_connection(play_context=None):
+    """Returns an unconnected sgos_network_cli connection"""
+    from ansible.playbook.play_context import PlayContext
+    from ansible.plugins.loader import cliconf_loader, connection_loader, terminal_loader
+
+    terminal_loader.add_directory(TERMINAL_PLUGINS)
+    cliconf_loader.add_directory(CLICONF_PLUGINS)
+    connection_loader.add_directory(CONNECTION_PLUGINS)
+
+    if play_context is None:
+        play_context = PlayContext()
+        play_context.remote_addr = '127.0.0.1'
+    play_context.network_os = 'sgos'
+
+    connection = connection_loader.get('sgos_network_cli', play_context, '/dev/null')
+    connection.set_options()
+    return connection
+
+
+def open_connection(server, connect=True, **options):
+    """Returns an sgos_network_cli connection to a FakeSgosServer"""
+    from ansible.playbook.play_context import PlayContext
+
+    play_context = PlayContext()
+    play_context.remote_addr = server.host
+    play_context.port = server.port
+    play_context.remote_user = server.username
+    play_context.password = server.password
+
+    connection = load_connection(play_context)
+    direct = dict(persistent_command_timeout=60, persistent_connect_timeout=30)
+    direct.update(options)
+    connection.set_options(direct=direct)
+    if connect:
+        connection._connect()
+    return connection
+
+
+def open_httpapi(console, **options):
+    """Returns a connected httpapi connection to a FakeSgosConsole"""
+    from ansible.playbook.play_context import PlayContext
+    from ansible.plugins.loader import connection_loader, httpapi_loader
+
+    httpapi_loader.add_directory(HTTPAPI_PLUGINS)
+
+    play_context = PlayContext()
+    play_context.remote_addr = console.host
+    play_context.network_os = 'sgos'
+
+    connection = connection_loader.get('httpapi', play_context, '/dev/null')
+    direct = dict(host=console.host, port=console.port, remote_user=console.username, password=console.password,
+                  use_ssl=False)
+    direct.update(options)
+    connection.set_options(direct=direct)
+    connection._connect()
+    return connection
+
+
+def measure(func, iterations=1):
+    """Runs ``func`` ``iterations`` times, returns the list of durations in seconds"""
+    durations = list()
+    for i in range(iterations):
+        start = time.time()
+        func()
+        durations.append(time.time() - start)
+    return durations
+
+
+def summarize(name, durations, units=1, unit='op'):
+    """Returns a result row for a list of durations
+
+    ``units`` is the amount of work, e.g. bytes, done by one iteration.
+    """
+    total = sum(durations)
+    ordered = sorted(durations)
+    return dict(
+        name=name,
+        iterations=len(durations),
+        mean=total / len(durations),
+        min=ordered[0],
+        p95=ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        rate=units * len(durations) / total if total else float('inf'),
+        unit=unit,
+    )
+
+
+def report(results, json_path=None):
+    """Prints the result rows and optionally writes them as JSON"""
+    print('%-32s %6s %10s %10s %10s %14s' % ('benchmark', 'iter', 'mean(s)', 'min(s)', 'p95(s)', 'rate'))
+    for row in results:
+        print('%-32s %6d %10.4f %10.4f %10.4f %10.1f %s/s' % (
+            row['name'], row['iterations'], row['mean'], row['min'], row['p95'], row['rate'], row['unit']))
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
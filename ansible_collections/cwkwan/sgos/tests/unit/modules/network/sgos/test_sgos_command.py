@@ -3,6 +3,10 @@ from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
 import json
+import os
+import shutil
+import tempfile
+import tracemalloc
 
 from unittest.mock import patch
 from ansible_collections.cwkwan.sgos.plugins.modules import sgos_command
@@ -54,6 +58,13 @@ class TestSgosCommandModule(TestSgosModule):
         self.assertEqual(len(result['stdout']), 2)
         self.assertTrue(result['stdout'][0].startswith('Version: SGOS'))
 
+    def test_sgos_command_prompt(self):
+        set_module_args(dict(commands=['show version', dict(command='show version', prompt='continue', answer='y')]))
+        self.execute_module()
+        commands = self.run_commands.call_args[0][1]
+        self.assertEqual(commands[0], dict(command='show version', prompt=None, answer=None))
+        self.assertEqual(commands[1], dict(command='show version', prompt='continue', answer='y'))
+
     def test_sgos_command_wait_for(self):
         wait_for = 'result[0] contains "Version: SGOS"'
         set_module_args(dict(commands=['show version'], wait_for=wait_for))
@@ -90,3 +101,26 @@ class TestSgosCommandModule(TestSgosModule):
         set_module_args(dict(commands=commands, wait_for=wait_for, match='all'))
         self.execute_module(failed=True)
 
+    def test_sgos_command_profiled(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        set_module_args(dict(commands=['show version']))
+        with patch.dict(os.environ, {'ANSIBLE_SGOS_PROFILE_DIR': profile_dir}):
+            self.execute_module()
+
+        files = sorted(os.listdir(profile_dir))
+        self.assertEqual(len(files), 2)
+        self.assertTrue(files[0].startswith('sgos_command-'))
+        self.assertTrue(files[0].endswith('.pstats'))
+        self.assertTrue(files[1].endswith('.tracemalloc'))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_sgos_command_profiled_keeps_tracing(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        set_module_args(dict(commands=['show version']))
+        with patch.dict(os.environ, {'ANSIBLE_SGOS_PROFILE_DIR': profile_dir}):
+            self.execute_module()
+        self.assertTrue(tracemalloc.is_tracing())
@@ -0,0 +1,130 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from unittest.mock import patch
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_event_log
+from sgos_module import TestSgosModule, set_module_args
+
+
+EVENTS = [
+    '2019-12-02 06:11:30+00:00UTC  "Snapshot sysinfo_stats has fetched /SYSINFO/Stats"  0 2D0006:96  ../Snapshot_worker.cpp:219',
+    '2019-12-02 06:11:32+00:00UTC  "Health Monitor: Health status changed from OK to WARNING"  0 250021:1  health_monitor.cpp:357',
+    '2019-12-02 06:11:32+00:00UTC  "Administrator login from 10.1.0.5, user \'admin\'"  0 250017:1  cli_session.cpp:110',
+]
+
+
+class TestSgosEventLogModule(TestSgosModule):
+
+    module = sgos_event_log
+
+    def setUp(self):
+        super(TestSgosEventLogModule, self).setUp()
+        self.mock_run_commands = patch('ansible_collections.cwkwan.sgos.plugins.modules.sgos_event_log.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.cursor = os.path.join(self.tmpdir, 'proxy1.cursor')
+        self.events = list(EVENTS)
+
+    def tearDown(self):
+        super(TestSgosEventLogModule, self).tearDown()
+        self.mock_run_commands.stop()
+
+    def load_fixtures(self, commands=None):
+        def run_commands(module, commands):
+            output = 'Event log (7 MB)\r\n'
+            words = commands[0].split()
+            if 'start' in words:
+                # the device lists the entries of the start second again
+                since = ' '.join(words[3:5])
+                return [output + '\r\n'.join(e for e in self.events if e[:19] >= since)]
+            if 'regex' in words:
+                regex = commands[0].split(' regex ', 1)[1]
+                self.assertTrue(regex.startswith('"') and regex.endswith('"'))
+                return [output + '\r\n'.join(e for e in self.events if re.search(regex[1:-1], e))]
+            return [output + '\r\n'.join(self.events)]
+
+        self.run_commands.side_effect = run_commands
+
+    def test_sgos_event_log_records(self):
+        set_module_args(dict())
+        result = self.execute_module()
+        self.assertEqual(result['command'], 'show event-log')
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(result['records'][1], dict(
+            timestamp='2019-12-02 06:11:32', timezone='+00:00UTC', severity='0', event_id='250021:1',
+            message='Health Monitor: Health status changed from OK to WARNING', source='health_monitor.cpp:357'))
+
+    def test_sgos_event_log_cursor(self):
+        set_module_args(dict(cursor=self.cursor))
+        self.execute_module()
+        with open(self.cursor) as f:
+            self.assertEqual(json.load(f)['timestamp'], '2019-12-02 06:11:32')
+
+        self.events.append('2019-12-02 06:11:32+00:00UTC  "Administrator logout"  0 250018:1  cli_session.cpp:140')
+        self.events.append('2019-12-02 06:15:00+00:00UTC  "NTP: Periodic query"  0 90000:1  ntp.cpp:1018')
+        set_module_args(dict(cursor=self.cursor))
+        result = self.execute_module()
+        self.assertEqual(result['command'], 'show event-log start 2019-12-02 06:11:32')
+        self.assertEqual([r['message'] for r in result['records']], ['Administrator logout', 'NTP: Periodic query'])
+
+        set_module_args(dict(cursor=self.cursor))
+        result = self.execute_module()
+        self.assertEqual(result['count'], 0)
+        self.assertEqual(result['cursor'], '2019-12-02 06:15:00')
+
+    def test_sgos_event_log_without_start(self):
+        with open(self.cursor, 'w') as f:
+            json.dump(dict(timestamp='2019-12-02 06:11:31', lines=[]), f)
+        set_module_args(dict(cursor=self.cursor, start=False, regex='cpp'))
+        result = self.execute_module()
+        self.assertEqual(result['command'], 'show event-log regex "cpp"')
+        self.assertEqual(result['count'], 2)
+
+    def test_sgos_event_log_regex_with_space(self):
+        set_module_args(dict(regex='Health Monitor'))
+        result = self.execute_module()
+        self.assertEqual(result['command'], 'show event-log regex "Health Monitor"')
+        self.assertEqual([r['event_id'] for r in result['records']], ['250021:1'])
+
+    def test_sgos_event_log_invalid_regex(self):
+        for regex in ('user "admin"', 'login\nlogout'):
+            set_module_args(dict(regex=regex))
+            result = self.execute_module(failed=True)
+            self.assertIn('double quotes or line breaks', result['msg'])
+        self.run_commands.assert_not_called()
+
+    def test_sgos_event_log_since(self):
+        set_module_args(dict(since='2019-12-02 06:11:32'))
+        result = self.execute_module()
+        self.assertEqual(result['command'], 'show event-log start 2019-12-02 06:11:32')
+        self.assertEqual(result['count'], 2)
+
+    def test_sgos_event_log_invalid_since(self):
+        set_module_args(dict(since='yesterday'))
+        self.execute_module(failed=True)
+
+    def test_sgos_event_log_dest(self):
+        dest = os.path.join(self.tmpdir, 'logs', 'proxy1.ndjson')
+        set_module_args(dict(dest=dest, max_size=200, backups=1, return_records=False))
+        result = self.execute_module(changed=True)
+        self.assertNotIn('records', result)
+
+        with open(dest) as f:
+            self.assertEqual(json.loads(f.read())['event_id'], '250017:1')
+        with open(dest + '.1') as f:
+            self.assertEqual(len(f.read().splitlines()), 1)
+        self.assertFalse(os.path.exists(dest + '.2'))
+
+    def test_sgos_event_log_check_mode(self):
+        set_module_args(dict(cursor=self.cursor, _ansible_check_mode=True))
+        result = self.execute_module()
+        self.assertEqual(result['count'], 3)
+        self.assertFalse(os.path.exists(self.cursor))
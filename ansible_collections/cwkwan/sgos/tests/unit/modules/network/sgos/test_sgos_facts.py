@@ -42,3 +42,38 @@ class TestSgosFactsModule(TestSgosModule):
             result['ansible_facts']['ansible_net_serialnum'], '1234567890'
         )
 
+        self.assertEqual(
+            result['ansible_facts']['ansible_net_version'], 'SGOS 6.7.4.144 Proxy Edition'
+        )
+        self.assertEqual(
+            result['ansible_facts']['ansible_net_hostname'], 'testdevice01'
+        )
+
+    def test_sgos_facts_hardware(self):
+        set_module_args(dict(gather_subset='hardware'))
+        result = self.execute_module()
+        self.assertEqual(
+            result['ansible_facts']['ansible_net_memtotal_mb'], 8192
+        )
+        self.assertEqual(
+            result['ansible_facts']['ansible_net_memfree_mb'], 6021
+        )
+
+        # the commands of all subsets are run in one call
+        self.assertEqual(self.run_commands.call_count, 1)
+
+    def test_sgos_facts_hardware_missing_memory(self):
+        set_module_args(dict(gather_subset='hardware'))
+        self.run_commands.side_effect = lambda module, commands: ['Appliance name: testdevice01'] * len(commands)
+        result = self.changed()
+        self.assertIsNone(result['ansible_facts']['ansible_net_memtotal_mb'])
+
+    def test_sgos_facts_numeric_strings(self):
+        set_module_args(dict(gather_subset='default'))
+        self.run_commands.side_effect = lambda module, commands: [
+            'Version: 7.10\nSerial number: 0012345', 'Appliance name: 1e3', 'Model: 300.10']
+        result = self.changed()
+        self.assertEqual(result['ansible_facts']['ansible_net_version'], '7.10')
+        self.assertEqual(result['ansible_facts']['ansible_net_serialnum'], '0012345')
+        self.assertEqual(result['ansible_facts']['ansible_net_hostname'], '1e3')
+        self.assertEqual(result['ansible_facts']['ansible_net_model'], '300.10')
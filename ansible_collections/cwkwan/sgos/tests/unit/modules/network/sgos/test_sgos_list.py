@@ -0,0 +1,129 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest.mock import patch
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_list
+from sgos_module import TestSgosModule, set_module_args
+
+
+SHOW = 'Allowed access:\r\n  10.0.0.1\r\n  10.0.0.2\r\n  10.0.0.3\r\n'
+ARGS = dict(show='show security allowed-access', entry_regex=r'^\s+(\S+)$',
+            add='security allowed-access add {entry}', remove='security allowed-access remove {entry}')
+
+
+class TestSgosListModule(TestSgosModule):
+
+    module = sgos_list
+
+    def setUp(self):
+        super(TestSgosListModule, self).setUp()
+        self.mock_run_commands = patch('ansible_collections.cwkwan.sgos.plugins.modules.sgos_list.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+        self.mock_load_config = patch('ansible_collections.cwkwan.sgos.plugins.modules.sgos_list.load_config')
+        self.load_config = self.mock_load_config.start()
+
+    def tearDown(self):
+        super(TestSgosListModule, self).tearDown()
+        self.mock_run_commands.stop()
+        self.mock_load_config.stop()
+
+    def load_fixtures(self, commands=None):
+        self.run_commands.return_value = [SHOW]
+
+    def set_args(self, **args):
+        params = dict(ARGS)
+        params.update(args)
+        set_module_args(params)
+
+    def test_sgos_list_present(self):
+        self.set_args(entries=['10.0.0.2', '10.0.0.4', '10.0.0.4'])
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['added'], ['10.0.0.4'])
+        self.assertEqual(result['removed'], [])
+        self.assertEqual(result['commands'], ['security allowed-access add 10.0.0.4'])
+        self.load_config.assert_called_once()
+        self.assertEqual(self.load_config.call_args[0][1], ['security allowed-access add 10.0.0.4', 'exit'])
+
+    def test_sgos_list_unchanged(self):
+        self.set_args(entries=['10.0.0.1', '10.0.0.3'])
+        result = self.execute_module()
+        self.assertEqual(result['commands'], [])
+        self.load_config.assert_not_called()
+
+    def test_sgos_list_absent(self):
+        self.set_args(state='absent', entries=['10.0.0.1', '10.0.0.9'])
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['commands'], ['security allowed-access remove 10.0.0.1'])
+
+    def test_sgos_list_replaced(self):
+        self.set_args(state='replaced', entries=['10.0.0.2', '10.0.0.5'])
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['removed'], ['10.0.0.1', '10.0.0.3'])
+        self.assertEqual(result['added'], ['10.0.0.5'])
+        self.assertEqual(result['commands'], ['security allowed-access remove 10.0.0.1',
+                                              'security allowed-access remove 10.0.0.3',
+                                              'security allowed-access add 10.0.0.5'])
+
+    def test_sgos_list_replaced_headed_listing(self):
+        self.run_commands.return_value = ['Allowed access list\r\n===================\r\n'
+                                          '  10.0.0.1 255.255.255.255\r\n  10.0.0.2 255.255.255.255\r\n'
+                                          'Total: 2 entries\r\n']
+        self.set_args(state='replaced', entries=['10.0.0.2 255.255.255.255'],
+                      entry_regex=r'^\s*(\d+\.\d+\.\d+\.\d+ \d+\.\d+\.\d+\.\d+)\s*$')
+        with patch.object(self, 'load_fixtures'):
+            result = self.execute_module(changed=True)
+        self.assertEqual(result['removed'], ['10.0.0.1 255.255.255.255'])
+        self.assertEqual(result['commands'], ['security allowed-access remove 10.0.0.1 255.255.255.255'])
+
+    def test_sgos_list_missing_entry_regex(self):
+        set_module_args(dict(show='show security allowed-access', state='replaced', entries=['10.0.0.1'],
+                             add='security allowed-access add {entry}', remove='security allowed-access remove {entry}'))
+        result = self.execute_module(failed=True)
+        self.assertIn('entry_regex', result['msg'])
+        self.run_commands.assert_not_called()
+
+    def test_sgos_list_chunks(self):
+        entries = ['10.1.0.%d' % i for i in range(5)]
+        self.set_args(entries=entries, chunk_size=2, parents=['security edit-list'])
+        self.execute_module(changed=True)
+        batches = [call[0][1] for call in self.load_config.call_args_list]
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(batches[0], ['security edit-list', 'security allowed-access add 10.1.0.0',
+                                      'security allowed-access add 10.1.0.1', 'exit', 'exit'])
+        self.assertEqual(batches[2][1:-2], ['security allowed-access add 10.1.0.4'])
+
+    def test_sgos_list_inline(self):
+        self.set_args(state='replaced', entries=['10.1.0.1', '10.1.0.2'], inline='inline allowed-access',
+                      inline_threshold=3)
+        result = self.execute_module(changed=True)
+        self.assertTrue(result['inline'])
+        self.assertEqual(result['commands'], ['inline allowed-access _EOF\n10.1.0.1\n10.1.0.2', '_EOF'])
+        commands = self.load_config.call_args[0][1]
+        self.assertEqual(commands[0]['eof_marker'], '_EOF')
+        self.assertEqual(commands[1:], ['_EOF', 'exit'])
+
+    def test_sgos_list_below_inline_threshold(self):
+        self.set_args(entries=['10.1.0.1'], inline='inline allowed-access')
+        result = self.execute_module(changed=True)
+        self.assertFalse(result['inline'])
+
+    def test_sgos_list_check_mode(self):
+        self.set_args(entries=['10.1.0.1'], _ansible_check_mode=True)
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['added'], ['10.1.0.1'])
+        self.load_config.assert_not_called()
+
+    def test_sgos_list_missing_command(self):
+        set_module_args(dict(show='show security allowed-access', state='absent', entries=['10.0.0.1'],
+                             add='security allowed-access add {entry}'))
+        self.execute_module(failed=True)
+
+    def test_sgos_list_large(self):
+        current = ['10.%d.%d.%d' % (i >> 16, (i >> 8) & 255, i & 255) for i in range(100000)]
+        self.run_commands.return_value = ['Allowed access:\r\n' + ''.join('  %s\r\n' % e for e in current)]
+        self.set_args(state='replaced', entries=current[1:] + ['192.168.0.1'])
+        with patch.object(self, 'load_fixtures'):
+            result = self.execute_module(changed=True)
+        self.assertEqual(result['commands'], ['security allowed-access remove 10.0.0.0',
+                                              'security allowed-access add 192.168.0.1'])
@@ -0,0 +1,74 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest.mock import patch
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import policy_checksum
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_policy
+from sgos_module import TestSgosModule, set_module_args
+
+
+POLICY = 'url.domain=example.com ALLOW\nurl.domain=example.org DENY\n'
+URL = 'http://10.1.0.5:8080/4f1c/local.txt'
+
+
+class TestSgosPolicyModule(TestSgosModule):
+
+    module = sgos_policy
+
+    def setUp(self):
+        super(TestSgosPolicyModule, self).setUp()
+        self.mock_run_commands = patch('ansible_collections.cwkwan.sgos.plugins.modules.sgos_policy.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+        self.mock_load_config = patch('ansible_collections.cwkwan.sgos.plugins.modules.sgos_policy.load_config')
+        self.load_config = self.mock_load_config.start()
+        self.installed = ''
+
+    def tearDown(self):
+        super(TestSgosPolicyModule, self).tearDown()
+        self.mock_run_commands.stop()
+        self.mock_load_config.stop()
+
+    def load_fixtures(self, commands=None):
+        def run_commands(module, commands):
+            if commands == ['show sources policy local']:
+                return [self.installed]
+            self.installed = POLICY
+            return ['Finished loading']
+
+        self.run_commands.side_effect = run_commands
+
+    def test_sgos_policy_load(self):
+        set_module_args(dict(url=URL, checksum=policy_checksum(POLICY)))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['commands'], ['policy local-path %s' % URL, 'load policy local'])
+        self.assertEqual(self.load_config.call_args[0][1], ['policy local-path %s' % URL])
+        self.assertEqual(result['response'], 'Finished loading')
+        self.assertEqual(self.run_commands.call_count, 3)
+
+    def test_sgos_policy_unchanged(self):
+        self.installed = ';; installed by ansible\r\n' + POLICY.replace('\n', '  \r\n\r\n')
+        set_module_args(dict(url=URL, checksum=policy_checksum(POLICY)))
+        result = self.execute_module()
+        self.assertEqual(result['commands'], [])
+        self.load_config.assert_not_called()
+
+    def test_sgos_policy_verify_failed(self):
+        set_module_args(dict(url=URL, checksum=policy_checksum('url.domain=example.net DENY')))
+        result = self.execute_module(failed=True)
+        self.assertIn('does not match', result['msg'])
+
+    def test_sgos_policy_no_checksum(self):
+        set_module_args(dict(policy='central', url=URL))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['commands'], ['policy central-path %s' % URL, 'load policy central'])
+        self.assertEqual(self.run_commands.call_count, 1)
+
+    def test_sgos_policy_check_mode(self):
+        set_module_args(dict(url=URL, checksum=policy_checksum(POLICY), _ansible_check_mode=True))
+        self.execute_module(changed=True)
+        self.load_config.assert_not_called()
+
+    def test_sgos_policy_src_without_action(self):
+        set_module_args(dict(src='/tmp/local.txt'))
+        self.execute_module(failed=True)
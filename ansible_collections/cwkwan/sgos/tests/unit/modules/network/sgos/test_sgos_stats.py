@@ -0,0 +1,77 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+
+from unittest.mock import patch
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_stats
+from sgos_module import TestSgosModule, load_fixture, set_module_args
+
+
+class TestSgosStatsModule(TestSgosModule):
+
+    module = sgos_stats
+
+    def setUp(self):
+        super(TestSgosStatsModule, self).setUp()
+        self.mock_run_commands = patch('ansible_collections.cwkwan.sgos.plugins.modules.sgos_stats.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestSgosStatsModule, self).tearDown()
+        self.mock_run_commands.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def load_fixtures(self, commands=None):
+        def load_from_file(*args, **kwargs):
+            commands = args[1]
+            output = list()
+
+            for command in commands:
+                filename = str(command).replace(' ', '_').replace('/', '~')
+                output.append(load_fixture('sgos_stats_%s' % filename))
+            return output
+
+        self.run_commands.side_effect = load_from_file
+
+    def test_sgos_stats_counters(self):
+        set_module_args(dict(gather_subset=['http', 'cpu']))
+        result = self.execute_module()
+        self.assertEqual(result['counters']['http']['Requests'], 4401234)
+        self.assertEqual(result['counters']['http']['Average response time'], 0.25)
+        self.assertEqual(result['counters']['cpu']['Total CPU utilization'], 12)
+        self.assertNotIn('State', result['counters']['cpu'])
+        self.assertNotIn('rates', result)
+        self.assertEqual(self.run_commands.call_count, 1)
+
+    def test_sgos_stats_urls(self):
+        set_module_args(dict(gather_subset='!all', urls=['/HTTP/Statistics']))
+        result = self.execute_module()
+        self.assertEqual(list(result['counters']), ['/HTTP/Statistics'])
+
+    def test_sgos_stats_rates(self):
+        state_file = os.path.join(self.tmpdir, 'testdevice01.json')
+        with open(state_file, 'w') as f:
+            json.dump(dict(timestamp=0, counters={'http': {'Requests': 4400000, 'Client connections': 2000}}), f)
+
+        set_module_args(dict(gather_subset='http', state_file=state_file))
+        with patch('time.time', return_value=10.0):
+            result = self.execute_module()
+
+        self.assertEqual(result['interval'], 10.0)
+        self.assertEqual(result['rates']['http']['Requests'], 123.4)
+        self.assertNotIn('Client connections', result['rates']['http'])
+
+        with open(state_file) as f:
+            sample = json.load(f)
+        self.assertEqual(sample['timestamp'], 10.0)
+        self.assertEqual(sample['counters']['http']['Requests'], 4401234)
+
+    def test_sgos_stats_bad_subset(self):
+        set_module_args(dict(gather_subset='foo'))
+        self.execute_module(failed=True)
@@ -0,0 +1,180 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest.mock import MagicMock, patch
+from ansible.parsing.dataloader import DataLoader
+from ansible.plugins.action.normal import ActionModule as _ActionModule
+from ansible_collections.cwkwan.sgos.plugins.action import sgos_command as sgos_command_action
+from ansible_collections.cwkwan.sgos.plugins.action import sgos_facts as sgos_facts_action
+from ansible_collections.cwkwan.sgos.plugins.module_utils import sgos_action
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos_action import ModuleExit, TaskModule
+from ansible_collections.cwkwan.sgos.plugins.modules import sgos_command
+
+
+CAPABILITIES = json.dumps(dict(network_api='cliconf', device_info=dict(network_os='sgos')))
+
+
+class TestTaskModule(unittest.TestCase):
+    """ Test class for running module code in the controller process
+    """
+    def test_defaults(self):
+        module = TaskModule(sgos_command.ARGUMENT_SPEC, dict(commands='show version', retries='3'), '/socket')
+        self.assertEqual(module.params['commands'], ['show version'])
+        self.assertEqual(module.params['retries'], 3)
+        self.assertEqual(module.params['match'], 'all')
+        self.assertIsNone(module.params['wait_for'])
+
+    def test_choices(self):
+        with self.assertRaises(ModuleExit) as e:
+            TaskModule(sgos_command.ARGUMENT_SPEC, dict(commands=['show version'], match='none'), '/socket')
+        self.assertTrue(e.exception.result['failed'])
+        self.assertIn('match', e.exception.result['msg'])
+
+    def test_unsupported_parameters(self):
+        with self.assertRaises(ModuleExit) as e:
+            TaskModule(sgos_command.ARGUMENT_SPEC, dict(commands=['show version'], lines=['a']), '/socket')
+        self.assertEqual(e.exception.result['msg'], 'Unsupported parameters for module: lines')
+
+    def test_required_arguments(self):
+        with self.assertRaises(ModuleExit) as e:
+            TaskModule(sgos_command.ARGUMENT_SPEC, dict(), '/socket')
+        self.assertIn('commands', e.exception.result['msg'])
+
+
+class TestSgosActions(unittest.TestCase):
+    """ Test class for the sgos_command and sgos_facts action plugins
+    """
+    def setUp(self):
+        sgos_action.CAPABILITIES.clear()
+        sgos_command_action.BATCHES.clear()
+
+        self.mock_connection = patch('ansible_collections.cwkwan.sgos.plugins.module_utils.sgos.Connection')
+        self.connection = self.mock_connection.start().return_value
+        self.connection.get_capabilities.return_value = CAPABILITIES
+        self.connection.run_commands.side_effect = lambda commands, check_rc: [
+            'output of %s' % cmd['command'] for cmd in commands]
+
+    def tearDown(self):
+        self.mock_connection.stop()
+
+    def make_action(self, plugin, args, socket_path='/socket', ds=None):
+        task = MagicMock()
+        task.args = args
+        task.async_val = 0
+        task._uuid = 'task-uuid'
+        task._ds = ds
+        task.loop = ds.get('loop') if ds else None
+        task.loop_with = None
+        task.loop_control = None
+        task.when = []
+        task.until = None
+        task.collections = ['cwkwan.sgos']
+        task.check_mode = False
+        connection = MagicMock()
+        connection.socket_path = socket_path
+        play_context = MagicMock()
+        play_context.check_mode = False
+        return plugin.ActionModule(task, connection, play_context, DataLoader(), MagicMock(), MagicMock())
+
+    def test_sgos_command(self):
+        action = self.make_action(sgos_command_action, dict(commands=['show version']))
+        result = action.run(task_vars=dict())
+        self.assertEqual(result['stdout'], ['output of show version'])
+        self.assertEqual(result['stdout_lines'], [['output of show version']])
+        self.assertFalse(result['changed'])
+
+    def test_sgos_command_fails(self):
+        action = self.make_action(sgos_command_action, dict(commands=['show version'], wait_for=['result[0] contains 8'],
+                                                            retries=2, interval=0))
+        result = action.run(task_vars=dict())
+        self.assertTrue(result['failed'])
+        self.assertEqual(result['failed_conditions'], ['result[0] contains 8'])
+
+    def test_sgos_facts(self):
+        self.connection.run_commands.side_effect = lambda commands, check_rc: ['Model: S200-20'] * len(commands)
+        action = self.make_action(sgos_facts_action, dict(gather_subset=['hardware']))
+        result = action.run(task_vars=dict())
+        self.assertEqual(result['ansible_facts']['ansible_net_model'], 'S200-20')
+        self.assertIn('/socket', sgos_action.CAPABILITIES)
+
+    def test_profiled(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        with patch.dict(os.environ, {'ANSIBLE_SGOS_PROFILE_DIR': profile_dir}):
+            self.make_action(sgos_command_action, dict(commands=['show version'])).run(task_vars=dict())
+            self.run_loop(['version', 'clock'], dict(commands=['show {{ item }}']))
+            self.connection.run_commands.side_effect = lambda commands, check_rc: ['Model: S200-20'] * len(commands)
+            self.make_action(sgos_facts_action, dict(gather_subset=['hardware'])).run(task_vars=dict())
+
+        prefixes = sorted(name.split('-')[0] for name in os.listdir(profile_dir) if name.endswith('.pstats'))
+        self.assertEqual(prefixes, ['sgos_command', 'sgos_command', 'sgos_facts'])
+
+    def test_capabilities_reused(self):
+        for i in range(3):
+            self.make_action(sgos_command_action, dict(commands=['show version'])).run(task_vars=dict())
+        self.assertEqual(self.connection.get_capabilities.call_count, 1)
+
+    def test_no_persistent_connection(self):
+        action = self.make_action(sgos_command_action, dict(commands=['show version']), socket_path=None)
+        with patch.object(_ActionModule, 'run', return_value=dict(module='result')) as run:
+            self.assertEqual(action.run(task_vars=dict()), dict(module='result'))
+        run.assert_called_once()
+        self.connection.run_commands.assert_not_called()
+
+    def run_loop(self, items, args, loop_control=None, **ds):
+        ds.update({'cwkwan.sgos.sgos_command': args, 'loop': items})
+        results = list()
+        for item in items:
+            task_args = dict(commands=[cmd.replace('{{ item }}', item) for cmd in args['commands']])
+            action = self.make_action(sgos_command_action, task_args, ds=ds)
+            action._task.loop_control = loop_control
+            results.append(action.run(task_vars=dict(ansible_loop_var='item', item=item, inventory_hostname='sgos',
+                                                     omit='__omit_place_holder__')))
+        return results
+
+    def test_loop_batched(self):
+        items = ['version', 'appliance-name', 'clock']
+        results = self.run_loop(items, dict(commands=['show {{ item }}', 'show {{ item }} detail']))
+        self.assertEqual(self.connection.run_commands.call_count, 1)
+        self.assertEqual([result['stdout'] for result in results],
+                         [['output of show %s' % item, 'output of show %s detail' % item] for item in items])
+
+    def test_loop_configuration_commands(self):
+        items = ['version', 'appliance-name']
+        self.run_loop(items, dict(commands=['show {{ item }}', 'restart {{ item }}']))
+        self.assertEqual(self.connection.run_commands.call_count, 2)
+
+    def test_loop_with_conditional(self):
+        items = ['version', 'appliance-name']
+        self.run_loop(items, dict(commands=['show {{ item }}'], wait_for=['result[0] contains output']))
+        self.assertEqual(self.connection.run_commands.call_count, 2)
+
+    def test_loop_with_omit(self):
+        items = ['version', 'appliance-name']
+        self.run_loop(items, dict(commands=['show {{ item }}'], retries='{{ omit }}'))
+        self.assertEqual(self.connection.run_commands.call_count, 2)
+
+    def test_loop_with_filter(self):
+        items = ['version', 'appliance-name']
+        self.run_loop(items, dict(commands=['show {{ item | lower }}']))
+        self.assertEqual(self.connection.run_commands.call_count, 2)
+
+    def test_loop_with_loop_control(self):
+        items = ['version', 'appliance-name']
+        self.run_loop(items, dict(commands=['show {{ item }}']), loop_control=MagicMock(label='{{ item }}', pause=0, extended=False, index_var=None))
+        self.assertEqual(self.connection.run_commands.call_count, 2)
+
+    def test_is_simple(self):
+        self.assertTrue(sgos_command_action.is_simple(['show version', 'show {{ item.name }} {{ pages[0] }}']))
+        self.assertTrue(sgos_command_action.is_simple(dict(commands="{{ item['command'] }}", retries=3)))
+        self.assertFalse(sgos_command_action.is_simple(dict(retries='{{ omit }}')))
+        self.assertFalse(sgos_command_action.is_simple("{{ lookup('file', 'commands') }}"))
+        self.assertFalse(sgos_command_action.is_simple('{% for i in items %}{{ i }}{% endfor %}'))
@@ -0,0 +1,74 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import shutil
+import tempfile
+import unittest
+
+from unittest.mock import MagicMock, patch
+from ansible.plugins.action.normal import ActionModule as _ActionModule
+from ansible_collections.cwkwan.sgos.plugins.action import sgos_config
+from ansible_collections.cwkwan.sgos.plugins.modules.sgos_config import parse_src
+
+
+CONFIG = """\
+appliance-name proxy1
+
+inline policy local _EOF
+url.domain=example.com ALLOW
+_EOF
+dns server 10.0.0.1
+"""
+
+
+class TestSgosConfigAction(unittest.TestCase):
+    """ Test class for the sgos_config action plugin
+    """
+    def setUp(self):
+        sgos_config.CANDIDATES.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def make_action(self, **args):
+        task = MagicMock()
+        task.args = args
+        action = sgos_config.ActionModule(task, MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock())
+        action._handle_src_option = MagicMock(side_effect=lambda: task.args.update(src=CONFIG))
+        return action
+
+    def test_candidate_commands(self):
+        commands = sgos_config.candidate_commands(CONFIG, self.cache_dir)
+        self.assertEqual(commands, parse_src(CONFIG))
+        self.assertEqual(commands, ['appliance-name proxy1', 'inline policy local _EOF\nurl.domain=example.com ALLOW\n',
+                                    '_EOF', 'dns server 10.0.0.1'])
+
+    def test_parsed_once(self):
+        with patch.object(sgos_config.sgos_config, 'parse_src', wraps=parse_src) as parse:
+            sgos_config.candidate_commands(CONFIG, self.cache_dir)
+            sgos_config.candidate_commands(CONFIG, self.cache_dir)
+            # the worker of another host
+            sgos_config.CANDIDATES.clear()
+            commands = sgos_config.candidate_commands(CONFIG, self.cache_dir)
+            sgos_config.candidate_commands(CONFIG + 'ntp enable\n', self.cache_dir)
+
+        self.assertEqual(commands, parse_src(CONFIG))
+        self.assertEqual(parse.call_count, 2)
+
+    def test_run_passes_lines(self):
+        action = self.make_action(src='proxy.cfg.j2')
+        with patch.object(_ActionModule, 'run', return_value=dict(changed=True)) as run:
+            action.run(task_vars=dict())
+
+        run.assert_called_once()
+        self.assertNotIn('src', action._task.args)
+        self.assertEqual(action._task.args['lines'], parse_src(CONFIG))
+
+    def test_run_lines(self):
+        action = self.make_action(lines=['dns server 10.0.0.1'])
+        with patch.object(_ActionModule, 'run', return_value=dict(changed=True)):
+            action.run(task_vars=dict())
+
+        action._handle_src_option.assert_not_called()
+        self.assertEqual(action._task.args, dict(lines=['dns server 10.0.0.1']))
@@ -0,0 +1,65 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import unittest
+
+from unittest.mock import MagicMock, patch
+from ansible.module_utils.six.moves.urllib.request import urlopen
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.plugins.action.network import ActionModule as ActionNetworkModule
+from ansible_collections.cwkwan.sgos.plugins.action import sgos_policy
+from ansible_collections.cwkwan.sgos.plugins.module_utils.sgos import policy_checksum
+
+
+POLICY = 'url.domain=example.com ALLOW\n'
+
+
+class TestSgosPolicyAction(unittest.TestCase):
+    """ Test class for the sgos_policy action plugin
+    """
+    def make_action(self, **args):
+        task = MagicMock()
+        task.args = args
+        play_context = MagicMock()
+        play_context.remote_addr = '127.0.0.1'
+        action = sgos_policy.ActionModule(task, MagicMock(), play_context, MagicMock(), MagicMock(), MagicMock())
+        action._handle_src_option = MagicMock(side_effect=lambda: task.args.update(src=POLICY))
+        return action
+
+    def test_policy_server(self):
+        server = sgos_policy.PolicyServer(b'policy', 'local.txt', '127.0.0.1')
+        try:
+            url = server.url('127.0.0.1')
+            self.assertTrue(url.endswith('/local.txt'))
+            self.assertEqual(urlopen(url).read(), b'policy')
+            self.assertRaises(HTTPError, urlopen, 'http://127.0.0.1:%d/local.txt' % server.server_address[1])
+            self.assertEqual(len(server.requests), 2)
+        finally:
+            server.close()
+
+    def test_local_address(self):
+        self.assertEqual(sgos_policy.local_address('127.0.0.1'), '127.0.0.1')
+
+    def test_run_serves_src(self):
+        action = self.make_action(src='local.txt', serve_address='127.0.0.1')
+        downloaded = list()
+
+        def run(self, task_vars=None):
+            # the device loading the policy while the module runs
+            downloaded.append(urlopen(self._task.args['url']).read())
+            return dict(changed=True, checksum=self._task.args['checksum'])
+
+        with patch.object(ActionNetworkModule, 'run', run):
+            result = action.run(task_vars=dict())
+
+        self.assertEqual(downloaded, [POLICY.encode()])
+        self.assertEqual(result['checksum'], policy_checksum(POLICY))
+        self.assertEqual(result['downloads'], 1)
+        self.assertNotIn('src', action._task.args)
+        self.assertNotIn('serve_address', action._task.args)
+
+    def test_run_src_and_url(self):
+        action = self.make_action(src='local.txt', url='http://repo/local.txt')
+        self.assertTrue(action.run(task_vars=dict())['failed'])
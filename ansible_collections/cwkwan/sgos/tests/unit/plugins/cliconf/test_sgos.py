@@ -8,6 +8,7 @@ import unittest
 
 from os import path
 from unittest.mock import MagicMock, call
+from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils._text import to_bytes
 from ansible_collections.cwkwan.sgos.plugins.cliconf import sgos
 
@@ -78,7 +79,8 @@ class TestPluginCLIConfSGOS(unittest.TestCase):
                 'get_capabilities',
                 'get',
                 'enable_response_logging',
-                'disable_response_logging'
+                'disable_response_logging',
+                'run_commands'
             ],
             'device_info': {
                 'network_os': 'sgos',
@@ -93,3 +95,97 @@ class TestPluginCLIConfSGOS(unittest.TestCase):
             capabilities
         )
 
+    def test_run_commands_parallel(self):
+        """ Test run_commands sends show commands over the shell channels
+        """
+        self._mock_connection.get_prompt.return_value = b'testdevice01#'
+        self._mock_connection.send_parallel.return_value = [u'Version: SGOS', AnsibleConnectionFailure('% Invalid input')]
+        commands = ['show version', {'command': 'show foo', 'prompt': None, 'answer': None}]
+
+        self.assertEqual(self._cliconf.run_commands(commands, check_rc=False), [u'Version: SGOS', u'% Invalid input'])
+        self._mock_connection.send_parallel.assert_called_once_with([b'show version', b'show foo'])
+        self.assertRaises(AnsibleConnectionFailure, self._cliconf.run_commands, commands)
+
+    def test_run_commands_sequential(self):
+        """ Test run_commands sends commands with prompts or changes one by one
+        """
+        self._mock_connection.get_prompt.return_value = b'testdevice01#'
+        commands = ['show version', {'command': 'restart', 'prompt': 'Continue?', 'answer': 'y'}]
+
+        self._cliconf.run_commands(commands)
+        self._mock_connection.send_parallel.assert_not_called()
+        self.assertEqual(self._mock_connection.send.call_count, 2)
+
+    def enable_response_cache(self, patterns, ttl=60, size=128):
+        options = dict(response_cache=patterns, response_cache_ttl=ttl, response_cache_size=size)
+        self._mock_connection.get_option.side_effect = options.get
+        self._mock_connection.get_prompt.return_value = b'testdevice01#'
+
+    def test_response_cache(self):
+        """ Test get answers allowlisted commands from the response cache
+        """
+        self.enable_response_cache(['^show version$'])
+        self.assertEqual(self._cliconf.get('show version'), self._cliconf.get('show  version'))
+        self.assertEqual(self._mock_connection.send.call_count, 1)
+
+        self._cliconf.get('show appliance-name')
+        self._cliconf.get('show appliance-name')
+        self._cliconf.get('show version')
+        self.assertEqual(self._mock_connection.send.call_count, 3)
+
+        # a command that is not a show command may have changed the device
+        self._cliconf.get('clear arp-cache')
+        self._cliconf.get('show version')
+        self.assertEqual(self._mock_connection.send.call_count, 5)
+
+    def test_response_cache_disabled(self):
+        """ Test get does not cache responses by default
+        """
+        self.enable_response_cache([])
+        self._cliconf.get('show version')
+        self._cliconf.get('show version')
+        self.assertEqual(self._mock_connection.send.call_count, 2)
+
+    def test_response_cache_invalidation(self):
+        """ Test the response cache is cleared on mode changes and configuration
+        """
+        self.enable_response_cache(['^show '])
+        self._cliconf.get('show version')
+        self._mock_connection.get_prompt.return_value = b'testdevice01>'
+        self._cliconf.get('show version')
+        self.assertEqual(self._mock_connection.send.call_count, 2)
+
+        self._cliconf.edit_config(['dns server 10.0.0.1'])
+        self._mock_connection.send.reset_mock()
+        self._cliconf.get('show version')
+        self._mock_connection.send.assert_called_once()
+
+    def test_response_cache_run_commands(self):
+        """ Test run_commands only sends the commands missing from the response cache
+        """
+        self.enable_response_cache(['^show version$', '^show advanced-url '])
+        self._cliconf.get('show version')
+        self._mock_connection.send_parallel.return_value = [u'Model: S200-20', u'CPU: 12%']
+        commands = ['show version', 'show advanced-url /Diagnostics/Hardware/Info', 'show advanced-url /CPU']
+
+        responses = self._cliconf.run_commands(commands)
+        self.assertEqual(responses[1:], [u'Model: S200-20', u'CPU: 12%'])
+        self._mock_connection.send_parallel.assert_called_once_with(
+            [b'show advanced-url /Diagnostics/Hardware/Info', b'show advanced-url /CPU'])
+
+        self.assertEqual(self._cliconf.run_commands(commands), responses)
+        self.assertEqual(self._mock_connection.send_parallel.call_count, 1)
+        self.assertEqual(self._mock_connection.send.call_count, 1)
+
+    def test_response_cache_bounds(self):
+        """ Test responses expire after the ttl and the least recently used are dropped
+        """
+        cache = sgos.ResponseCache(size=2, ttl=10)
+        cache.put('a', 'A', now=100)
+        cache.put('b', 'B', now=100)
+        self.assertEqual(cache.get('a', now=105), 'A')
+        cache.put('c', 'C', now=105)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b', now=105))
+        self.assertEqual(cache.get('a', now=109), 'A')
+        self.assertIsNone(cache.get('a', now=111))
@@ -0,0 +1,162 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import importlib.util
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from unittest.mock import patch
+from ansible.errors import AnsibleConnectionFailure
+from ansible.playbook.play_context import PlayContext
+from test_sgos_network_cli import make_connection, sgos_network_cli
+
+# The broker is a script shipped next to the collection rather than in it.
+BROKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '..', '..', '..', '..', '..', '..', '..', 'bin', 'sgos_broker.py')
+spec = importlib.util.spec_from_file_location('sgos_broker', BROKER_PATH)
+sgos_broker = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sgos_broker)
+
+
+def new_connection(params):
+    connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'])
+    connection._matched_prompt = b'\ntestdevice01#'
+    return connection
+
+
+class TestSgosBroker(unittest.TestCase):
+    """ Test class for the SGOS session broker
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'broker.sock')
+        self.broker = sgos_broker.SessionBroker(idle_timeout=60, factory=new_connection)
+        self.server = sgos_broker.BrokerServer(self.path, self.broker)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.tmpdir)
+
+    def attach(self, **params):
+        client = sgos_network_cli.BrokerClient(self.path)
+        params.setdefault('host', 'testdevice01')
+        params.setdefault('username', 'admin')
+        params.setdefault('password', 'admin')
+        return client, client.call('open', **params)
+
+    def wait_idle(self):
+        for i in range(100):
+            if all(not session['busy'] for session in self.broker.stats()):
+                return
+            time.sleep(0.01)
+
+    def test_warm_session(self):
+        client, result = self.attach()
+        self.assertFalse(result['warm'])
+        self.assertEqual(result['prompt'].strip(), 'testdevice01#')
+        result = client.call('send', command='show version')
+        self.assertEqual(result['response'], 'Version: SGOS 6.7.4.144')
+        client.close()
+        self.wait_idle()
+
+        client, result = self.attach()
+        self.assertTrue(result['warm'])
+        client.close()
+        self.wait_idle()
+
+        stats = self.broker.stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['attaches'], 2)
+        self.assertEqual(stats[0]['commands'], 1)
+
+    def test_session_per_credentials(self):
+        client, result = self.attach()
+        other, other_result = self.attach(password='other')
+        self.assertNotEqual(result['session'], other_result['session'])
+        client.close()
+        other.close()
+
+    def test_session_key_not_exposed(self):
+        client, result = self.attach()
+        key = sgos_broker.session_key(dict(host='testdevice01', username='admin', password='admin'))
+        self.assertEqual(result['session'].split('/')[0], 'admin@testdevice01:None')
+        self.assertNotIn(key[:8], result['session'])
+        self.assertEqual([session['session'] for session in client.call('stats')], [result['session']])
+        client.close()
+        self.wait_idle()
+
+        # the key is an HMAC with the secret of the broker process
+        with patch.object(sgos_broker, 'KEY_SECRET', b'other'):
+            self.assertNotEqual(sgos_broker.session_key(dict(host='testdevice01', username='admin', password='admin')), key)
+
+    def test_send_without_open(self):
+        client = sgos_network_cli.BrokerClient(self.path)
+        self.assertRaises(AnsibleConnectionFailure, client.call, 'send', command='show version')
+        client.close()
+
+    def test_evict(self):
+        client, result = self.attach()
+        client.close()
+        self.wait_idle()
+        self.assertEqual(self.broker.evict(now=time.time() + 30), 0)
+        self.assertEqual(self.broker.evict(now=time.time() + 120), 1)
+        self.assertEqual(self.broker.stats(), [])
+
+    def test_connection_plugin(self):
+        connection = make_connection([], broker_socket=self.path, persistent_connect_timeout=30, network_cli_retries=3,
+                                     host_key_auto_add=False)
+        connection._connected = False
+        connection._play_context.configure_mock(port=22, remote_user='admin', password='admin', private_key_file=None,
+                                                become=False, become_method=None, become_pass=None)
+        connection._network_os = 'sgos'
+        connection._connect()
+        self.assertEqual(connection.send(b'show version'), u'Version: SGOS 6.7.4.144')
+        self.assertEqual(connection.get_prompt().strip(), b'testdevice01#')
+        connection.close()
+        self.wait_idle()
+        self.assertEqual(self.broker.stats()[0]['commands'], 1)
+
+    def test_connection_plugin_become(self):
+        shells = list()
+
+        def new_session(params):
+            connection = make_connection([b'disable\r\n', b'testdevice01>',
+                                          b'enable\r\n', b'Enable Password:', b'\r\n', b'testdevice01#'])
+            connection._matched_prompt = b'\ntestdevice01#'
+            shells.append(connection._ssh_shell)
+            return connection
+
+        self.broker.factory = new_session
+        connection = make_connection([], broker_socket=self.path, persistent_connect_timeout=30, network_cli_retries=3,
+                                     host_key_auto_add=False)
+        connection._ssh_shell = None
+        connection._connected = False
+        connection._play_context.configure_mock(port=22, remote_user='admin', password='admin', private_key_file=None,
+                                                become=True, become_method='enable', become_pass='secret')
+        connection._network_os = 'sgos'
+        connection._connect()
+
+        # toggling become between tasks runs disable and enable on the broker session
+        play_context = PlayContext()
+        play_context.become = False
+        connection.update_play_context(pickle.dumps(play_context.serialize()))
+        self.assertEqual(connection.get_prompt().strip(), b'testdevice01>')
+
+        play_context.become = True
+        play_context.become_pass = 'secret'
+        connection.update_play_context(pickle.dumps(play_context.serialize()))
+        self.assertEqual(connection.get_prompt().strip(), b'testdevice01#')
+        self.assertEqual(shells[0].sent, [b'disable\r', b'enable\r', b'secret', b'\r'])
+        connection.close()
+        self.wait_idle()
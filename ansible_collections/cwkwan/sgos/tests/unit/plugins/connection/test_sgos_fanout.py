@@ -0,0 +1,147 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import os
+import socket
+import sys
+import threading
+import unittest
+
+from unittest.mock import patch
+from ansible.errors import AnsibleConnectionFailure
+from test_sgos_network_cli import make_connection
+
+# The fan-out engine is a script shipped next to the collection rather than in it.
+BIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', '..', '..', '..', 'bin')
+sys.path.insert(0, BIN_DIR)
+import sgos_fanout  # noqa: E402
+
+
+class PipeChannel(object):
+    """A shell channel answering commands, signalling buffered data on a pipe like paramiko"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.buffer = list()
+        self.closed = False
+        self.signalled = False
+        self._read, self._write = os.pipe()
+
+    def fileno(self):
+        return self._read
+
+    def settimeout(self, timeout):
+        pass
+
+    def signal(self):
+        if not self.signalled:
+            os.write(self._write, b'x')
+            self.signalled = True
+
+    def sendall(self, data):
+        command = data.strip()
+        if command == b'exit':
+            self.closed = True
+        elif command in self.responses:
+            # a response split over chunks, with the line ending in the next one
+            response = self.responses[command]
+            self.buffer.extend([command + b'\r\n' + response[:4], response[4:] + b'\r', b'\ntestdevice01#'])
+        self.signal()
+
+    def recv(self, size):
+        if self.buffer:
+            data = self.buffer.pop(0)
+            if not self.buffer and not self.closed:
+                os.read(self._read, 1)
+                self.signalled = False
+            return data
+        if self.closed:
+            return b''
+        raise socket.timeout()
+
+    def close(self):
+        os.close(self._read)
+        os.close(self._write)
+
+
+RESPONSES = {
+    b'show version': b'Version: SGOS 6.7.4.144',
+    b'show status': b'Memory installed: 8192 MB',
+    b'show foo': b'% Invalid input detected at "^" marker.',
+}
+
+
+def factory(params):
+    if params.get('password') != 'admin':
+        raise AnsibleConnectionFailure('Authentication failed.')
+    connection = make_connection([])
+    connection._ssh_shell = PipeChannel(RESPONSES)
+    connection._matched_prompt = b'testdevice01#'
+    connection._learned_prompts.add(b'testdevice01#')
+    connection._terminal_stdout_re = connection._get_terminal_std_re('terminal_stdout_re')
+    connection._terminal_stderr_re = connection._get_terminal_std_re('terminal_stderr_re')
+    return connection
+
+
+class TestSgosFanout(unittest.TestCase):
+    """ Test class for the SGOS fan-out engine
+    """
+    def run_fleet(self, hosts, commands, **kwargs):
+        kwargs.setdefault('factory', factory)
+        return sgos_fanout.run_fleet([dict(name=name, host=name, password=password) for name, password in hosts],
+                                     commands, **kwargs)
+
+    def test_run_fleet(self):
+        results = self.run_fleet([('proxy%d' % index, 'admin') for index in range(20)], ['show version', 'show status'],
+                                 concurrency=5, connect_workers=2)
+        self.assertEqual([result['host'] for result in results], ['proxy%d' % index for index in range(20)])
+        for result in results:
+            self.assertFalse(result['failed'])
+            self.assertEqual(result['stdout'], [u'Version: SGOS 6.7.4.144', u'Memory installed: 8192 MB'])
+
+    def test_plugins_loaded_once(self):
+        calls = list()
+
+        def load_plugins(network_os='sgos'):
+            calls.append(('load_plugins', network_os, threading.current_thread().name))
+            return 'connection class'
+
+        def new_connection(params, connection_class=None):
+            calls.append(('new_connection', connection_class, threading.current_thread().name))
+            return factory(params)
+
+        with patch.object(sgos_fanout, 'load_plugins', load_plugins), \
+                patch.object(sgos_fanout, 'new_connection', new_connection):
+            results = self.run_fleet([('proxy%d' % index, 'admin') for index in range(4)], ['show version'],
+                                     factory=None, connect_workers=2)
+        self.assertFalse(any(result['failed'] for result in results))
+        self.assertEqual(calls[0], ('load_plugins', 'sgos', 'MainThread'))
+        self.assertEqual([call for call in calls if call[0] == 'load_plugins'], calls[:1])
+        self.assertEqual(len(calls), 5)
+        for name, connection_class, thread in calls[1:]:
+            self.assertEqual(connection_class, 'connection class')
+            self.assertNotEqual(thread, 'MainThread')
+
+    def test_command_error(self):
+        result, = self.run_fleet([('proxy1', 'admin')], ['show version', 'show foo', 'show status'])
+        self.assertTrue(result['failed'])
+        self.assertIn('Invalid input', result['msg'])
+        self.assertEqual(result['stdout'], [u'Version: SGOS 6.7.4.144'])
+
+    def test_login_failure(self):
+        results = self.run_fleet([('proxy1', 'wrong'), ('proxy2', 'admin')], ['show version'])
+        self.assertTrue(results[0]['failed'])
+        self.assertEqual(results[0]['msg'], 'Authentication failed.')
+        self.assertFalse(results[1]['failed'])
+
+    def test_closed(self):
+        result, = self.run_fleet([('proxy1', 'admin')], ['exit'])
+        self.assertTrue(result['failed'])
+        self.assertEqual(result['msg'], 'cli session has been closed by the remote device')
+
+    def test_timeout(self):
+        result, = self.run_fleet([('proxy1', 'admin')], ['show nothing'], timeout=0.1)
+        self.assertTrue(result['failed'])
+        self.assertIn('timeout', result['msg'])
@@ -0,0 +1,436 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import tracemalloc
+import unittest
+
+from unittest.mock import MagicMock, patch
+from ansible.errors import AnsibleAuthenticationFailure, AnsibleConnectionFailure
+from ansible_collections.cwkwan.sgos.plugins.terminal.sgos import TerminalModule
+
+# The connection plugin is shipped next to the collection rather than in it.
+PLUGIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '..', '..', '..', '..', '..', '..', '..', 'plugins', 'connection', 'sgos_network_cli.py')
+spec = importlib.util.spec_from_file_location('sgos_network_cli', PLUGIN_PATH)
+sgos_network_cli = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sgos_network_cli)
+
+
+class FakeShell(object):
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.sent = list()
+        self.timeout = None
+        self.closed = False
+
+    def recv(self, size):
+        if self.chunks:
+            return self.chunks.pop(0)
+        # the device closed the session
+        self.closed = True
+        return b''
+
+    def sendall(self, data):
+        self.sent.append(data)
+
+    def close(self):
+        self.closed = True
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def gettimeout(self):
+        return self.timeout
+
+
+class FakeChannel(FakeShell):
+    """A shell channel answering the commands sent to it"""
+
+    def __init__(self, responses):
+        super(FakeChannel, self).__init__([b'\r\ntestdevice01#'])
+        self.responses = responses
+        self.prompt = b'testdevice01#'
+
+    def get_pty(self):
+        pass
+
+    def invoke_shell(self):
+        pass
+
+    def sendall(self, data):
+        self.sent.append(data)
+        command = data.strip()
+        if command == b'conf t':
+            self.prompt = b'testdevice01#(config)'
+        elif command == b'exit':
+            self.prompt = b'testdevice01#'
+        self.chunks.append(command + b'\r\n')
+        if command in self.responses:
+            self.chunks.append(self.responses[command] + b'\r\n')
+        self.chunks.append(self.prompt)
+
+
+def make_connection(chunks, **options):
+    connection = sgos_network_cli.Connection.__new__(sgos_network_cli.Connection)
+    connection._options = dict(
+        persistent_command_timeout=30,
+        persistent_buffer_read_timeout=0.0,
+        persistent_log_messages=False,
+        terminal_stdout_re=None,
+        terminal_stderr_re=None,
+        terminal_initial_prompt=None,
+        terminal_initial_answer=None,
+        terminal_inital_prompt_newline=None,
+        terminal_initial_prompt_checkall=False,
+        timing_log=None,
+        session_capture=None,
+        profile_dir=None,
+        session_record=None,
+        session_replay=None,
+        session_replay_speed=1.0,
+        keepalive_interval=0,
+        reconnect=True,
+        broker_socket=None,
+        channels=1,
+        ssh_ciphers=None,
+        ssh_kex=None,
+        ssh_macs=None,
+        ssh_compression=False,
+        ssh_window_size=None,
+        ssh_max_packet_size=None,
+        ssh_auth_cache=None,
+        ssh_auth_cache_ttl=300,
+        response_cache=[],
+        response_cache_ttl=60,
+        response_cache_size=128,
+    )
+    connection._options.update(options)
+    connection._play_context = MagicMock(remote_addr='testdevice01')
+    connection._network_os = 'sgos'
+    connection._terminal = TerminalModule(connection)
+    connection._sub_plugin = dict()
+    connection.paramiko_conn = MagicMock()
+    connection._ssh_shell = FakeShell(chunks)
+    connection._connected = True
+    connection._history = list()
+    connection._matched_prompt = None
+    connection._learned_prompts = set()
+    connection._last_timing = None
+    connection._timing_stats = dict()
+    connection._timing_log = None
+    connection._session_capture = None
+    connection._profiler = None
+    connection._profile_depth = 0
+    connection._tracemalloc_started = False
+    connection._broker = None
+    connection._channels = None
+    connection._timing_lock = threading.Lock()
+    connection._messages = list()
+    return connection
+
+
+class TestSgosNetworkCli(unittest.TestCase):
+    """ Test class for the SGOS network_cli connection plugin
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_send(self):
+        connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'])
+        response = connection.send(b'show version')
+        self.assertEqual(response, u'Version: SGOS 6.7.4.144')
+        self.assertEqual(connection._ssh_shell.sent, [b'show version\r'])
+        self.assertEqual(connection.get_prompt().strip(), b'testdevice01#')
+
+    def test_send_split_chunks(self):
+        # an ANSI sequence and a line ending split across chunk boundaries
+        connection = make_connection([b'show version\r\n\x1b[?1', b'h\x1b=Version: SGOS\r', b'\n\r\nModel: S200\x08',
+                                      b'X\r\n', b'testdevice01#'])
+        response = connection.send(b'show version')
+        self.assertEqual(response, u'Version: SGOS\n\nModel: S200')
+
+    def test_send_learned_prompt(self):
+        connection = make_connection([b'\r\ntestdevice01#', b'show config\r\n<html>', b'\r\nfoo#',
+                                      b'\r\nend\r\ntestdevice01#',
+                                      b'conf t\r\n', b'testdevice01#(config)'])
+        connection.receive()
+        self.assertEqual(connection._learned_prompts, set([b'testdevice01#']))
+
+        # output ending a chunk like a prompt does not end the response
+        self.assertEqual(connection.send(b'show config'), u'<html>\nfoo#\nend')
+        # the prompt changes on configure, the regexes find the new one
+        connection.send(b'conf t')
+        self.assertEqual(connection.get_prompt().strip(), b'testdevice01#(config)')
+        self.assertEqual(connection._learned_prompts, set([b'testdevice01#', b'testdevice01#(config)']))
+
+    def test_send_learned_prompt_error_like_output(self):
+        # event log messages that look like errors, well before the prompt
+        connection = make_connection([b'\r\ntestdevice01#', b'show event-log\r\n',
+                                      b'2019-12-02 06:11:30+00:00UTC  "Policy file not found"\r\n',
+                                      b'2019-12-02 06:11:31+00:00UTC  "% Error loading"\r\n',
+                                      b'x' * 300 + b'\r\ntestdevice01#'])
+        connection.receive()
+        response = connection.send(b'show event-log')
+        self.assertIn(u'Policy file not found', response)
+        self.assertTrue(response.endswith(u'x' * 300))
+
+    def reconnecting(self, connection, chunks):
+        def connect():
+            connection._ssh_shell = FakeShell(chunks)
+            connection._connected = True
+            connection.receive()
+        connection._connect = connect
+        return connection
+
+    def test_send_reconnect_closed(self):
+        connection = make_connection([])
+        connection._ssh_shell.closed = True
+        self.reconnecting(connection, [b'testdevice01#', b'show version\r\n', b'Version: SGOS\r\n', b'testdevice01#'])
+        self.assertEqual(connection.send(b'show version'), u'Version: SGOS')
+
+    def test_send_reconnect_read_only(self):
+        # closed while the command runs
+        connection = make_connection([b'show version\r\n', b'Version'])
+        self.reconnecting(connection, [b'testdevice01#', b'show version\r\n', b'Version: SGOS\r\n', b'testdevice01#'])
+        self.assertEqual(connection.send(b'show version'), u'Version: SGOS')
+
+    def test_send_reconnect_not_read_only(self):
+        connection = make_connection([b'restart\r\n'])
+        connection._connect = MagicMock()
+        self.assertRaises(AnsibleConnectionFailure, connection.send, b'restart')
+        connection._connect.assert_not_called()
+
+    def test_send_reconnect_config_mode(self):
+        connection = make_connection([])
+        connection._matched_prompt = b'testdevice01#(config)'
+        connection._ssh_shell.closed = True
+        connection._connect = MagicMock()
+        self.assertRaises(AnsibleConnectionFailure, connection.send, b'dns server 10.0.0.1')
+        connection._connect.assert_not_called()
+
+    def parallel(self, channels, **options):
+        responses = dict((b'show %d' % index, b'output %d' % index) for index in range(6))
+        connection = make_connection([], channels=channels, **options)
+        connection._ssh_shell = FakeChannel(responses)
+        connection._ssh_shell.chunks = list()
+        connection._matched_prompt = b'testdevice01#'
+        connection.paramiko_conn.ssh.get_transport.return_value.open_session.side_effect = [
+            FakeChannel(responses) for index in range(channels - 1)]
+        return connection
+
+    def test_send_parallel(self):
+        connection = self.parallel(3)
+        commands = [b'show %d' % index for index in range(6)]
+        self.assertEqual(connection.send_parallel(commands), [u'output %d' % index for index in range(6)])
+
+        # the channels were initialised by the terminal plugin and share the work
+        self.assertEqual(len(connection._channels), 2)
+        sent = list()
+        for channel in [connection] + connection._channels:
+            self.assertEqual(channel.get_prompt().strip(), b'testdevice01#')
+            sent.extend(data for data in channel._ssh_shell.sent if data.startswith(b'show'))
+        self.assertEqual(sorted(sent), sorted(command + b'\r' for command in commands))
+        self.assertEqual(connection._channels[0]._ssh_shell.sent[:2], [b'conf t\r', b'line-vty\r'])
+
+        connection.close()
+        self.assertIsNone(connection._channels)
+
+    def test_send_parallel_refused(self):
+        connection = self.parallel(3)
+        connection.paramiko_conn.ssh.get_transport.return_value.open_session.side_effect = Exception('prohibited')
+        self.assertEqual(connection.send_parallel([b'show 1', b'show 2']), [u'output 1', u'output 2'])
+        self.assertEqual(connection._channels, [])
+
+    def test_send_parallel_closed_channel(self):
+        connection = self.parallel(2)
+        connection._get_channels()
+        connection._channels[0]._ssh_shell.closed = True
+        commands = [b'show %d' % index for index in range(6)]
+        self.assertEqual(connection.send_parallel(commands), [u'output %d' % index for index in range(6)])
+        self.assertEqual(connection._channels, [])
+
+    def test_send_parallel_error(self):
+        connection = self.parallel(2)
+        results = connection.send_parallel([b'show 1', b'show invalid\r\n% Invalid input', b'show 2'])
+        self.assertEqual(results[0], u'output 1')
+        self.assertIsInstance(results[1], AnsibleConnectionFailure)
+        self.assertEqual(results[2], u'output 2')
+
+    def test_transport_factory(self):
+        factory = sgos_network_cli.transport_factory(ciphers=['aes256-gcm@openssh.com'], macs=['hmac-sha2-512'],
+                                                     window_size=8388608, max_packet_size=65536)
+        sock, other = socket.socketpair()
+        try:
+            transport = factory(sock)
+            options = transport.get_security_options()
+            self.assertEqual(options.ciphers[0], 'aes256-gcm@openssh.com')
+            self.assertIn('aes128-ctr', options.ciphers)
+            self.assertEqual(options.digests[0], 'hmac-sha2-512')
+            self.assertEqual(transport.default_window_size, 8388608)
+            self.assertEqual(transport.default_max_packet_size, 65536)
+        finally:
+            sock.close()
+            other.close()
+
+        self.assertRaises(AnsibleConnectionFailure, sgos_network_cli.transport_factory, kex=['rot13'])
+
+    def test_transport_factory_old_paramiko(self):
+        connection = make_connection([], ssh_ciphers=['aes128-gcm@openssh.com'], ssh_window_size=8388608)
+        with patch('paramiko.__version__', '2.7.2'):
+            with self.assertRaises(AnsibleConnectionFailure) as exc:
+                connection._tune_transport()
+        self.assertEqual(str(exc.exception), 'ssh_ciphers, ssh_window_size require paramiko 3.2 or later, found 2.7.2')
+        connection.paramiko_conn._parse_proxy_command.assert_not_called()
+
+    def test_auth_failure_retried_without_cache(self):
+        connection = make_connection([], persistent_connect_timeout=30, network_cli_retries=2)
+        connection._connected = False
+        connection._play_context.configure_mock(port=22, remote_user='admin', password='wrong', private_key_file=None)
+        paramiko_conn = MagicMock()
+        paramiko_conn._connect.side_effect = AnsibleAuthenticationFailure('Failed to authenticate: Authentication failed.')
+
+        with patch.object(sgos_network_cli, 'connection_loader') as connection_loader, patch('time.sleep'):
+            connection_loader.get.return_value = paramiko_conn
+            self.assertRaises(AnsibleConnectionFailure, connection._connect)
+        self.assertEqual(paramiko_conn._connect.call_count, 3)
+
+    def test_auth_cache(self):
+        auth_cache = os.path.join(self.tmpdir, 'auth.json')
+        connection = make_connection([], ssh_auth_cache=auth_cache, persistent_connect_timeout=30, network_cli_retries=3,
+                                     ssh_compression=True)
+        connection._connected = False
+        connection._play_context.configure_mock(port=22, remote_user='admin', password='wrong', private_key_file=None)
+        paramiko_conn = MagicMock()
+        paramiko_conn._parse_proxy_command.return_value = dict()
+        paramiko_conn._connect.side_effect = AnsibleAuthenticationFailure('Failed to authenticate: Authentication failed.')
+
+        with patch.object(sgos_network_cli, 'connection_loader') as connection_loader:
+            connection_loader.get.return_value = paramiko_conn
+            self.assertRaises(AnsibleAuthenticationFailure, connection._connect)
+            # not retried, and the next connection fails without trying
+            self.assertEqual(paramiko_conn._connect.call_count, 1)
+            self.assertRaises(AnsibleAuthenticationFailure, connection._connect)
+            self.assertEqual(paramiko_conn._connect.call_count, 1)
+
+        self.assertEqual(paramiko_conn._parse_proxy_command(22)['compress'], True)
+        with open(auth_cache) as f:
+            self.assertNotIn('wrong', f.read())
+        # the keys are an HMAC with a secret only the owner can read
+        self.assertEqual(os.stat(auth_cache + '.key').st_mode & 0o777, 0o600)
+        cache = sgos_network_cli.AuthCache(auth_cache, 300)
+        key = cache.key(connection._play_context)
+        self.assertEqual(cache.key(connection._play_context), key)
+        os.remove(auth_cache + '.key')
+        self.assertNotEqual(cache.key(connection._play_context), key)
+
+    def test_sanitize(self):
+        connection = make_connection([])
+        connection._matched_prompt = b'\ntestdevice01#'
+        response = b'\r\n  show version \r\nVersion: SGOS\r\n\r\nshow version x\r\nlast testdevice01# line\r\ntestdevice01#'
+        self.assertEqual(connection._sanitize(response, b'show version'), b'Version: SGOS\n\nshow version x')
+        self.assertEqual(connection._sanitize(bytearray(b' \r\n \r\n'), b'show version'), b'')
+
+    def test_send_timing(self):
+        timing_log = os.path.join(self.tmpdir, 'timing.log')
+        connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'],
+                                     timing_log=timing_log)
+        connection.send(b'show version')
+        connection.close()
+
+        with open(timing_log) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['event'], 'command')
+        self.assertEqual(records[0]['command'], 'show version')
+        self.assertEqual(records[0]['bytes'], 52)
+        self.assertEqual(records[0]['windows'], 3)
+        self.assertEqual(records[0]['host'], 'testdevice01')
+        for key in ('send_time', 'first_byte', 'prompt', 'buffer_wait', 'match_time', 'total_time'):
+            self.assertIn(key, records[0])
+
+        stats = connection.get_timing_stats()
+        self.assertEqual(stats['histograms']['show version']['count'], 1)
+        self.assertEqual(sum(stats['histograms']['show version']['counts']), 1)
+
+    def test_log_messages_disabled(self):
+        connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'])
+        connection.send(b'show version')
+        self.assertEqual(connection.pop_messages(), [])
+
+    def test_log_messages_enabled(self):
+        connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'],
+                                     persistent_log_messages=True)
+        connection.send(b'show version')
+        messages = [message for level, message in connection.pop_messages()]
+        self.assertIn("send command: b'show version\\r'", messages)
+        self.assertIn("response-2: b'Version: SGOS 6.7.4.144\\r\\n'", messages)
+
+    def test_session_capture(self):
+        session_capture = os.path.join(self.tmpdir, 'session.raw')
+        chunks = [b'show version\r\n', b'\x1b[KVersion: SGOS 6.7.4.144\r\n', b'testdevice01#']
+        connection = make_connection(list(chunks), session_capture=session_capture)
+        connection.send(b'show version')
+        connection.close()
+
+        with open(session_capture, 'rb') as f:
+            self.assertEqual(f.read(), b''.join(chunks))
+
+    def test_profile_dir(self):
+        connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'],
+                                     profile_dir=self.tmpdir)
+        connection.send(b'show version')
+        connection.close()
+
+        files = sorted(os.listdir(self.tmpdir))
+        self.assertEqual(len(files), 2)
+        self.assertTrue(files[0].startswith('sgos_network_cli-testdevice01-'))
+        self.assertTrue(files[0].endswith('.pstats'))
+        self.assertTrue(files[1].endswith('.tracemalloc'))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_profile_dir_keeps_tracing(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'],
+                                     profile_dir=self.tmpdir)
+        connection.send(b'show version')
+        connection.close()
+        self.assertEqual(len(os.listdir(self.tmpdir)), 2)
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_session_record_replay(self):
+        session_record = os.path.join(self.tmpdir, 'session.jsonl')
+        connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'])
+        connection._ssh_shell = sgos_network_cli.SessionRecorder(connection._ssh_shell, session_record)
+        expected = connection.send(b'show version')
+        connection.close()
+
+        replay = sgos_network_cli.SessionReplay(session_record, speed=0)
+        connection = make_connection([])
+        connection._ssh_shell = replay
+        self.assertEqual(connection.send(b'show version'), expected)
+        self.assertEqual(replay._index, len(replay._events))
+
+    def test_session_replay_diverged(self):
+        session_record = os.path.join(self.tmpdir, 'session.jsonl')
+        connection = make_connection([b'show version\r\n', b'Version: SGOS 6.7.4.144\r\n', b'testdevice01#'])
+        connection._ssh_shell = sgos_network_cli.SessionRecorder(connection._ssh_shell, session_record)
+        connection.send(b'show version')
+        connection.close()
+
+        connection = make_connection([])
+        connection._ssh_shell = sgos_network_cli.SessionReplay(session_record, speed=0)
+        self.assertRaises(AnsibleConnectionFailure, connection.send, b'show status')
@@ -0,0 +1,68 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import unittest
+
+from unittest.mock import patch
+from ansible.errors import AnsibleFilterError
+from ansible_collections.cwkwan.sgos.plugins.filter import sgos_fleet
+
+
+HOSTVARS = {
+    'proxy01': {'site': 'hk', 'stats': {'counters': {'cpu': {'Total CPU utilization': 12}}}},
+    'proxy02': {'site': 'hk', 'stats': {'counters': {'cpu': {'Total CPU utilization': 80}}}},
+    'proxy03': {'site': 'sg', 'stats': {'counters': {'cpu': {'Total CPU utilization': 45}}}},
+    'proxy04': {'site': 'sg', 'stats': {'counters': {'cpu': {'Total CPU utilization': 'n/a'}}}},
+    'proxy05': {'site': 'sg'},
+}
+
+CPU = 'stats.counters.cpu.Total CPU utilization'
+
+
+class TestSgosFleetFilter(unittest.TestCase):
+    """ Test class for SGOS fleet aggregation filters
+    """
+    has_numpy = sgos_fleet.HAS_NUMPY
+
+    def setUp(self):
+        self.mock_numpy = patch.object(sgos_fleet, 'HAS_NUMPY', self.has_numpy)
+        self.mock_numpy.start()
+
+    def tearDown(self):
+        self.mock_numpy.stop()
+
+    def test_sgos_columns(self):
+        columns = sgos_fleet.sgos_columns(HOSTVARS, CPU, by='site')
+        self.assertEqual(columns['host'], ['proxy01', 'proxy02', 'proxy03', 'proxy04', 'proxy05'])
+        self.assertEqual(columns[CPU], [12.0, 80.0, 45.0, None, None])
+        self.assertEqual(columns['site'], ['hk', 'hk', 'sg', 'sg', 'sg'])
+
+    def test_sgos_sum(self):
+        self.assertEqual(sgos_fleet.sgos_sum(HOSTVARS, CPU), 137.0)
+        self.assertEqual(sgos_fleet.sgos_sum(HOSTVARS, CPU, by='site'), {'hk': 92.0, 'sg': 45.0})
+
+    def test_sgos_percentile(self):
+        self.assertEqual(sgos_fleet.sgos_percentile(HOSTVARS, CPU, 50), 45.0)
+        self.assertEqual(sgos_fleet.sgos_percentile(HOSTVARS, CPU, 75), 62.5)
+        self.assertEqual(sgos_fleet.sgos_percentile(HOSTVARS, CPU, 100, by='site'), {'hk': 80.0, 'sg': 45.0})
+        self.assertIsNone(sgos_fleet.sgos_percentile(HOSTVARS, 'missing', 50))
+
+    def test_sgos_percentile_invalid(self):
+        self.assertRaises(AnsibleFilterError, sgos_fleet.sgos_percentile, HOSTVARS, CPU, 101)
+
+    def test_sgos_top(self):
+        self.assertEqual(sgos_fleet.sgos_top(HOSTVARS, CPU, 2), [['proxy02', 80.0], ['proxy03', 45.0]])
+        self.assertEqual(sgos_fleet.sgos_top(HOSTVARS, CPU, 10, reverse=False),
+                         [['proxy01', 12.0], ['proxy03', 45.0], ['proxy02', 80.0]])
+
+    def test_list_records(self):
+        records = [dict(inventory_hostname=host, **record) for host, record in HOSTVARS.items()]
+        self.assertEqual(sgos_fleet.sgos_top(records, CPU, 1), [['proxy02', 80.0]])
+
+
+class TestSgosFleetFilterPurePython(TestSgosFleetFilter):
+    """ Run the same tests without NumPy
+    """
+    has_numpy = False
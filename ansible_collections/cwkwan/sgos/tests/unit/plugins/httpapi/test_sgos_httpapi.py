@@ -0,0 +1,142 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import base64
+import json
+import os
+import threading
+import unittest
+
+from unittest.mock import MagicMock
+from ansible.errors import AnsibleConnectionFailure
+from ansible.module_utils.six.moves import BaseHTTPServer, http_client, socketserver
+from ansible.plugins.loader import httpapi_loader
+
+HTTPAPI_PLUGINS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               '..', '..', '..', '..', 'plugins', 'httpapi')
+
+PAGES = {
+    '/Diagnostics/Hardware/Info': ('text/plain', 'Hardware Information\r\n\r\nModel: S200-20\r\nRAM: 8192 MB\r\n'),
+    '/TCP/Statistics': ('text/html', '<html><body><h1>TCP Statistics</h1><pre>Connections: 12\n'
+                                     'Bytes &amp; packets: 3</pre><br>Retransmits: 1</body></html>'),
+}
+
+
+class ConsoleHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.headers.get('Authorization') != 'Basic %s' % base64.b64encode(b'admin:admin').decode():
+            self.reply(401, 'text/plain', 'Unauthorized')
+        elif self.path not in PAGES:
+            self.reply(404, 'text/plain', 'Not Found')
+        else:
+            self.reply(200, *PAGES[self.path])
+
+    def reply(self, status, content_type, body):
+        body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ConsoleServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), ConsoleHandler)
+        self.connections = 0
+        self.requests = list()
+
+
+class TestSgosHttpApi(unittest.TestCase):
+    """ Test class for the SGOS httpapi plugin
+    """
+    def setUp(self):
+        self.server = ConsoleServer()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        options = dict(host='127.0.0.1', port=self.server.server_address[1], remote_user='admin', password='admin',
+                       use_ssl=False, validate_certs=False, timeout=10)
+        self.connection = MagicMock()
+        self.connection.get_option.side_effect = options.get
+        self.options = options
+
+        httpapi_loader.add_directory(HTTPAPI_PLUGINS)
+        self.httpapi = httpapi_loader.get('sgos', self.connection)
+        self.httpapi.set_options(direct=dict(pool_size=4))
+
+    def tearDown(self):
+        self.httpapi.logout()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_run_commands(self):
+        responses = self.httpapi.run_commands(['show advanced-url /Diagnostics/Hardware/Info',
+                                               'show advanced-url /TCP/Statistics'])
+        self.assertEqual(responses[0], 'Hardware Information\n\nModel: S200-20\nRAM: 8192 MB')
+        self.assertEqual(responses[1], 'TCP Statistics\nConnections: 12\nBytes & packets: 3\nRetransmits: 1')
+
+    def test_keep_alive(self):
+        for i in range(3):
+            self.httpapi.run_commands(['show advanced-url /Diagnostics/Hardware/Info'])
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_pool_size(self):
+        self.httpapi.run_commands(['show advanced-url /Diagnostics/Hardware/Info'] * 20)
+        self.assertEqual(len(self.server.requests), 20)
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_reconnect(self):
+        self.httpapi.run_commands(['show advanced-url /Diagnostics/Hardware/Info'])
+        # the device closing an idle keep-alive connection
+        for conn in self.httpapi._idle:
+            conn.sock.close()
+        self.httpapi.run_commands(['show advanced-url /Diagnostics/Hardware/Info'])
+        self.assertEqual(self.server.connections, 2)
+
+    def test_not_found(self):
+        self.assertRaises(AnsibleConnectionFailure, self.httpapi.run_commands, ['show advanced-url /Missing'])
+        responses = self.httpapi.run_commands(['show advanced-url /Missing', 'show advanced-url /TCP/Statistics'],
+                                              check_rc=False)
+        self.assertIn('404', responses[0])
+        self.assertIn('Connections: 12', responses[1])
+
+    def test_authentication(self):
+        self.options['password'] = 'wrong'
+        self.assertRaises(AnsibleConnectionFailure, self.httpapi.run_commands,
+                          ['show advanced-url /Diagnostics/Hardware/Info'])
+
+    def test_console_port_https(self):
+        for port in (None, 8082):
+            self.options['port'] = port
+            conn = self.httpapi._open()
+            self.assertIsInstance(conn, http_client.HTTPSConnection)
+            self.assertEqual(conn.port, 8082)
+
+    def test_cli_command(self):
+        self.assertRaises(AnsibleConnectionFailure, self.httpapi.run_commands, ['show version'])
+        self.assertEqual(self.server.requests, [])
+
+    def test_get_capabilities(self):
+        capabilities = json.loads(self.httpapi.get_capabilities())
+        self.assertEqual(capabilities['network_api'], 'httpapi')
+        self.assertEqual(capabilities['device_info'], {'network_os': 'sgos', 'network_os_model': 'S200-20'})
+        self.assertIn('run_commands', capabilities['rpc'])
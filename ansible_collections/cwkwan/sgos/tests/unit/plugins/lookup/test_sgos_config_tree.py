@@ -0,0 +1,123 @@
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest.mock import patch
+from ansible.errors import AnsibleLookupError
+from ansible.parsing.dataloader import DataLoader
+from ansible_collections.cwkwan.sgos.plugins.lookup import sgos_config_tree
+
+
+CONFIG = """\
+!- SGOS 6.7.4.144
+!- BEGIN networking
+interface 0:0 ;mode
+ip-address 10.1.1.10 255.255.255.0
+exit
+interface 0:1 ;mode
+ip-address 10.2.1.10 255.255.255.0
+exit
+ip-default-gateway 10.1.1.1
+!- END networking
+!- BEGIN general
+appliance-name "proxy1"
+ntp server 10.0.0.1
+ntp server 10.0.0.2
+ntp enable
+security local-user-list edit guests ;mode
+user create alice
+exit
+!- END general
+"""
+
+
+class TestSgosConfigTreeLookup(unittest.TestCase):
+    """ Test class for the indexed SGOS configuration lookup
+    """
+    def setUp(self):
+        sgos_config_tree.INDEXES.clear()
+        self.lookup = sgos_config_tree.LookupModule(loader=DataLoader())
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.src = os.path.join(self.tmpdir, 'proxy1.cfg')
+        with open(self.src, 'w') as f:
+            f.write(CONFIG)
+
+    def test_parse_config(self):
+        tree = sgos_config_tree.parse_config(CONFIG)
+        self.assertEqual(tree['networking > interface 0:1'], ['ip-address 10.2.1.10 255.255.255.0'])
+        self.assertEqual(tree['networking'], ['interface 0:0', 'interface 0:1', 'ip-default-gateway 10.1.1.1'])
+        self.assertEqual(tree['general > security local-user-list edit guests'], ['user create alice'])
+
+    def test_build_index(self):
+        index = sgos_config_tree.build_index(sgos_config_tree.parse_config(CONFIG))
+        self.assertEqual(index['keywords']['user create alice'], [['general > security local-user-list edit guests', '']])
+        self.assertIn('security local-user-list edit', index['keywords'])
+        self.assertNotIn('security local-user-list edit guests', index['keywords'])
+
+    def test_values(self):
+        self.assertEqual(self.lookup.run(['ntp server'], config=CONFIG), ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(self.lookup.run(['appliance-name'], config=CONFIG), ['proxy1'])
+        self.assertEqual(self.lookup.run(['ntp   enable'], config=CONFIG), [''])
+        self.assertEqual(self.lookup.run(['snmp'], config=CONFIG), [])
+        self.assertEqual(self.lookup.run(['security  local-user-list edit guests'], config=CONFIG), [''])
+        self.assertEqual(self.lookup.run(['ip-address 10.1.1.10 255.255.255.0'], config=CONFIG), [''])
+        self.assertEqual(self.lookup.run(['ip-address 10.2.1.10'], config=CONFIG), ['255.255.255.0'])
+        self.assertEqual(self.lookup.run(['ip-address 10.2.1.10 255.255'], config=CONFIG), [])
+
+    def test_section(self):
+        self.assertEqual(self.lookup.run(['ip-address'], config=CONFIG, section='networking > interface 0:0'),
+                         ['10.1.1.10 255.255.255.0'])
+        self.assertEqual(self.lookup.run(['ip-address'], config=CONFIG, section='general'), [])
+        self.assertEqual(self.lookup.run(['ip-address 10.1.1.10 255.255.255.0'], config=CONFIG, query='exists',
+                                         section='networking > interface 0:0'), [True])
+        self.assertEqual(self.lookup.run(['networking > interface 0:1'], config=CONFIG, query='section'),
+                         ['ip-address 10.2.1.10 255.255.255.0'])
+
+    def test_exists(self):
+        self.assertEqual(self.lookup.run(['ntp enable', 'ntp server 10.0.0.3', 'user create alice'],
+                                         config=CONFIG, query='exists'), [True, False, True])
+        self.assertEqual(self.lookup.run(['security local-user-list edit guests', 'security local-user-list edit admins'],
+                                         config=CONFIG, query='exists'), [True, False])
+
+    def test_src_index(self):
+        variables = dict(ansible_search_path=[self.tmpdir])
+        self.assertEqual(self.lookup.run(['ntp server'], variables, src='proxy1.cfg'), ['10.0.0.1', '10.0.0.2'])
+        with open(self.src + '.index') as f:
+            self.assertEqual(json.load(f)['checksum'], sgos_config_tree.checksum(CONFIG))
+
+        # another worker reads the index instead of parsing the file again
+        sgos_config_tree.INDEXES.clear()
+        with patch.object(sgos_config_tree, 'parse_config') as parse:
+            self.assertEqual(self.lookup.run(['ntp enable'], variables, src='proxy1.cfg', query='exists'), [True])
+        parse.assert_not_called()
+
+    def test_src_index_version(self):
+        variables = dict(ansible_search_path=[self.tmpdir])
+        with open(self.src + '.index', 'w') as f:
+            json.dump(dict(checksum=sgos_config_tree.checksum(CONFIG), tree=dict(), paths=dict(), keywords=dict()), f)
+        self.assertEqual(self.lookup.run(['ntp server'], variables, src='proxy1.cfg'), ['10.0.0.1', '10.0.0.2'])
+        with open(self.src + '.index') as f:
+            self.assertEqual(json.load(f)['version'], sgos_config_tree.INDEX_VERSION)
+
+    def test_src_changed(self):
+        variables = dict(ansible_search_path=[self.tmpdir])
+        self.lookup.run(['ntp server'], variables, src=self.src)
+        with open(self.src, 'a') as f:
+            f.write('!- BEGIN snmp\nsnmp enable\n!- END snmp\n')
+        sgos_config_tree.INDEXES.clear()
+        self.assertEqual(self.lookup.run(['snmp enable'], variables, src=self.src, query='exists'), [True])
+
+    def test_errors(self):
+        self.assertRaises(AnsibleLookupError, self.lookup.run, ['ntp server'])
+        self.assertRaises(AnsibleLookupError, self.lookup.run, ['ntp server'], config=CONFIG, query='count')
+        self.assertRaises(AnsibleLookupError, self.lookup.run, ['ntp server'], dict(), src='/missing/proxy1.cfg')
+        self.assertRaises(AnsibleLookupError, self.lookup.run, ['interface 0:0'], config=CONFIG, query='section',
+                          section='networking')
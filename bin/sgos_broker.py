@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+#
+"""Session broker keeping warm SGOS cli sessions across playbook runs.
+
+Holds authenticated sgos_network_cli sessions per device, already logged in,
+in enable mode and with the terminal initialised, and serves commands to
+them over a local Unix socket. Point the connection plugin at the socket
+with the ``broker_socket`` option (``ANSIBLE_NETWORK_CLI_BROKER_SOCKET``)
+and every persistent connection attaches to a warm session instead of
+connecting to the device.
+
+A session serves one persistent connection at a time and goes back to the
+pool, out of configuration mode, when that connection closes. Sessions idle
+for longer than ``--idle-timeout`` are closed.
+
+Usage::
+
+    python bin/sgos_broker.py --socket ~/.ansible/sgos_broker.sock
+    ANSIBLE_NETWORK_CLI_BROKER_SOCKET=~/.ansible/sgos_broker.sock ansible-playbook site.yml
+
+The socket is only accessible by the user running the broker. Sessions are
+keyed by host, port, user and credentials, so a run with other credentials
+never attaches to a session it could not open itself.
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+import uuid
+
+from functools import partial
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.connection import recv_data, send_data
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CONNECTION_PLUGINS = os.path.join(ROOT_DIR, 'plugins', 'connection')
+COLLECTION_DIR = os.path.join(ROOT_DIR, 'ansible_collections', 'cwkwan', 'sgos')
+
+log = logging.getLogger('sgos_broker')
+
+# secret of the pool keys, which are never logged or returned; it only
+# lives as long as the broker process
+KEY_SECRET = os.urandom(32)
+
+
+def to_device(value):
+    """Converts a prompt or answer sent by the connection plugin back to bytes"""
+    if isinstance(value, list):
+        return [to_bytes(item, errors='surrogate_or_strict') for item in value]
+    if value is not None:
+        return to_bytes(value, errors='surrogate_or_strict')
+    return None
+
+
+def load_plugins(network_os='sgos'):
+    """Adds the connection plugin and the collection plugins to the plugin loaders
+
+    The plugins are loaded once here, the loaders are not safe to search
+    from several threads at the same time. The connections created later
+    only find them in the loader caches.
+
+    Returns the sgos_network_cli connection class.
+    """
+    from ansible.plugins.loader import cliconf_loader, connection_loader, terminal_loader
+
+    connection_loader.add_directory(CONNECTION_PLUGINS)
+    terminal_loader.add_directory(os.path.join(COLLECTION_DIR, 'plugins', 'terminal'))
+    cliconf_loader.add_directory(os.path.join(COLLECTION_DIR, 'plugins', 'cliconf'))
+
+    # the plugins sgos_network_cli gets from the loaders as it connects
+    connection_loader.get('local', class_only=True)
+    connection_loader.get('paramiko', class_only=True)
+    terminal_loader.get(network_os, class_only=True)
+    cliconf_loader.get(network_os, class_only=True)
+    return connection_loader.get('sgos_network_cli', class_only=True)
+
+
+def new_connection(params, connection_class=None):
+    """Returns a connected sgos_network_cli connection for the ``open`` parameters
+
+    ``connection_class`` is the class returned by load_plugins, the plugins
+    are loaded here when it is not given.
+    """
+    from ansible.playbook.play_context import PlayContext
+
+    if connection_class is None:
+        connection_class = load_plugins(params.get('network_os') or 'sgos')
+
+    play_context = PlayContext()
+    play_context.remote_addr = params['host']
+    play_context.port = params.get('port')
+    play_context.remote_user = params.get('username')
+    play_context.password = params.get('password')
+    play_context.private_key_file = params.get('private_key_file')
+    play_context.become = params.get('become') or False
+    play_context.become_method = params.get('become_method')
+    play_context.become_pass = params.get('become_pass')
+    play_context.network_os = params.get('network_os') or 'sgos'
+
+    connection = connection_class(play_context, '/dev/null')
+    options = dict((key, value) for key, value in (params.get('options') or dict()).items() if value is not None)
+    # the broker must not attach to itself, and serves sessions from threads
+    # where the SIGALRM based persistent_buffer_read_timeout is not available
+    options.update(broker_socket=None, persistent_buffer_read_timeout=0.0)
+    connection.set_options(direct=options)
+    connection._connect()
+    return connection
+
+
+def session_key(params):
+    """Returns the pool key of the ``open`` parameters"""
+    return hmac.new(KEY_SECRET, to_bytes(json.dumps([params.get(key) for key in (
+        'host', 'port', 'username', 'password', 'private_key_file', 'become', 'become_method', 'become_pass',
+        'network_os')]), errors='surrogate_or_strict'), hashlib.sha256).hexdigest()
+
+
+def session_name(params):
+    """Returns a name for a new session of the ``open`` parameters, for logs and replies"""
+    return '%s@%s:%s/%s' % (params.get('username'), params['host'], params.get('port'), uuid.uuid4().hex[:8])
+
+
+class Session(object):
+    """A warm connection in the broker"""
+
+    def __init__(self, key, name, connection):
+        self.key = key
+        self.name = name
+        self.connection = connection
+        self.created = self.last_used = time.time()
+        self.commands = 0
+        self.attaches = 0
+
+    def send(self, params):
+        self.commands += 1
+        try:
+            response = self.connection.send(to_bytes(params['command'], errors='surrogate_or_strict'),
+                                            prompt=to_device(params.get('prompt')),
+                                            answer=to_device(params.get('answer')),
+                                            newline=params.get('newline', True),
+                                            sendonly=params.get('sendonly', False),
+                                            prompt_retry_check=params.get('prompt_retry_check', False),
+                                            check_all=params.get('check_all', False))
+        finally:
+            self.last_used = time.time()
+            self.drain_messages()
+        return dict(response=response, prompt=self.prompt())
+
+    def prompt(self):
+        return to_text(self.connection.get_prompt() or b'', errors='surrogate_or_strict')
+
+    def reset(self):
+        """Leaves configuration mode so the next run finds the session as a new one"""
+        while b'(' in (self.connection.get_prompt() or b''):
+            self.connection.send(b'exit')
+        self.drain_messages()
+
+    def drain_messages(self):
+        # the connection queues messages for the ansible-connection process,
+        # log them instead of letting them pile up
+        for level, message in self.connection.pop_messages():
+            log.debug('%s: %s', self.name, message)
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception as e:
+            log.warning('%s: error closing session: %s', self.name, e)
+        self.drain_messages()
+
+
+class SessionBroker(object):
+    """Pools of idle sessions keyed by device and credentials"""
+
+    def __init__(self, idle_timeout=600, factory=new_connection):
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+        self._idle = dict()
+        self._busy = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, params):
+        """Returns an idle session for the ``open`` parameters, or a new one"""
+        key = session_key(params)
+        with self._lock:
+            pool = self._idle.get(key) or list()
+            session = pool.pop() if pool else None
+            if session:
+                self._busy.add(session)
+
+        warm = session is not None and session.connection._is_alive()
+        if session and not warm:
+            log.info('%s: idle session was closed by the device', session.name)
+            self._discard(session)
+            session = None
+
+        if session is None:
+            start = time.time()
+            session = Session(key, session_name(params), self.factory(params))
+            session.drain_messages()
+            log.info('%s: opened session in %.2fs', session.name, time.time() - start)
+            with self._lock:
+                self._busy.add(session)
+
+        session.attaches += 1
+        return session, warm
+
+    def release(self, session):
+        """Returns a session to its pool, or closes it when it is unusable"""
+        try:
+            session.reset()
+        except Exception as e:
+            log.warning('%s: closing session that cannot be reset: %s', session.name, e)
+            self._discard(session)
+            return
+
+        with self._lock:
+            self._busy.discard(session)
+            self._idle.setdefault(session.key, list()).append(session)
+
+    def _discard(self, session):
+        with self._lock:
+            self._busy.discard(session)
+        session.close()
+
+    def evict(self, now=None):
+        """Closes the sessions idle for longer than idle_timeout, returns how many"""
+        now = now or time.time()
+        expired = list()
+        with self._lock:
+            for key, pool in list(self._idle.items()):
+                keep = [session for session in pool if now - session.last_used < self.idle_timeout]
+                expired.extend(session for session in pool if session not in keep)
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+
+        for session in expired:
+            log.info('%s: closing idle session', session.name)
+            session.close()
+        return len(expired)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            sessions = [(session, False) for pool in self._idle.values() for session in pool]
+            sessions.extend((session, True) for session in self._busy)
+        return [dict(session=session.name, busy=busy, age=now - session.created, idle=now - session.last_used,
+                     commands=session.commands, attaches=session.attaches) for session, busy in sessions]
+
+    def close(self):
+        with self._lock:
+            sessions = [session for pool in self._idle.values() for session in pool]
+            self._idle = dict()
+        for session in sessions:
+            session.close()
+
+
+class BrokerHandler(socketserver.BaseRequestHandler):
+    """Serves the JSON-RPC requests of one persistent connection"""
+
+    def handle(self):
+        broker = self.server.broker
+        session = None
+        try:
+            while True:
+                data = recv_data(self.request)
+                if data is None:
+                    break
+
+                request = json.loads(to_text(data, errors='surrogate_or_strict'))
+                method, params = request.get('method'), request.get('params') or dict()
+                response = dict(jsonrpc='2.0', id=request.get('id'))
+                try:
+                    if method == 'open':
+                        if session:
+                            raise ValueError('a session is already attached')
+                        session, warm = broker.acquire(params)
+                        response['result'] = dict(session=session.name, warm=warm, prompt=session.prompt())
+                    elif method == 'send':
+                        if not session:
+                            raise ValueError('no session attached, call open first')
+                        response['result'] = session.send(params)
+                    elif method == 'stats':
+                        response['result'] = broker.stats()
+                    else:
+                        response['error'] = dict(code=-32601, message='Method not found: %s' % method)
+                except Exception as e:
+                    response['error'] = dict(code=-32603, message=to_text(e))
+                send_data(self.request, to_bytes(json.dumps(response)))
+        finally:
+            if session:
+                broker.release(session)
+
+
+class BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(self, path, broker):
+        self.broker = broker
+        if os.path.exists(path):
+            os.unlink(path)
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(self, path, BrokerHandler)
+        finally:
+            os.umask(umask)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--socket', default='~/.ansible/sgos_broker.sock', help='default %(default)s')
+    parser.add_argument('--idle-timeout', type=float, default=600,
+                        help='seconds after which idle sessions are closed, default %(default)s')
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s %(levelname)s %(message)s')
+    path = os.path.expanduser(args.socket)
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+
+    # loaded before the server threads start, they only create connections
+    broker = SessionBroker(args.idle_timeout, factory=partial(new_connection, connection_class=load_plugins()))
+    server = BrokerServer(path, broker)
+
+    def evict():
+        while True:
+            time.sleep(min(args.idle_timeout, 30))
+            broker.evict()
+    thread = threading.Thread(target=evict)
+    thread.daemon = True
+    thread.start()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    log.info('serving on %s', path)
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        os.unlink(path)
+        broker.close()
+
+
+if __name__ == '__main__':
+    main()
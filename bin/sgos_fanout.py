@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+#
+"""Runs SGOS commands against a fleet of appliances from one process.
+
+Every appliance is logged into with the sgos_network_cli connection plugin,
+so logins, enable and terminal initialisation behave as in a playbook run.
+The commands are then sent from an asyncio event loop that waits on the
+shell channels of all appliances at once, using the prompt, error and
+sanitize handling of the connection plugin. Logins run in a bounded thread
+pool, as paramiko authenticates synchronously.
+
+Usage::
+
+    python bin/sgos_fanout.py -i inventory --limit proxies -c 'show version' -c 'show status' \\
+        --concurrency 500 --connect-workers 64 --output audit.json
+
+The result of every host is a JSON object with the responses in ``stdout``,
+or ``failed`` and ``msg`` when the host could not be logged into or a
+command failed. Commands after a failed one are not run.
+
+The engine can also be used from Python::
+
+    results = run_fleet([dict(host='proxy1', username='admin', password='...')], ['show version'])
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.module_utils._text import to_bytes, to_text
+
+from sgos_broker import load_plugins, new_connection
+
+
+log = logging.getLogger('sgos_fanout')
+
+# inventory variables of the ``open`` parameters, the first one set wins
+HOST_VARS = (
+    ('host', ('ansible_host',)),
+    ('port', ('ansible_port',)),
+    ('username', ('ansible_user',)),
+    ('password', ('ansible_password', 'ansible_ssh_pass', 'ansible_ssh_password')),
+    ('private_key_file', ('ansible_private_key_file',)),
+    ('become', ('ansible_become',)),
+    ('become_method', ('ansible_become_method',)),
+    ('become_pass', ('ansible_become_password', 'ansible_become_pass')),
+    ('network_os', ('ansible_network_os',)),
+)
+
+
+class FleetShell(object):
+    """Sends commands over the shell channel of a connected sgos_network_cli
+    connection from an event loop"""
+
+    def __init__(self, connection, loop):
+        self.connection = connection
+        self.loop = loop
+        self.channel = connection._ssh_shell
+        self.channel.settimeout(0.0)
+
+    async def send(self, command, timeout):
+        """Returns the sanitized response to ``command``"""
+        connection = self.connection
+        command = to_bytes(command, errors='surrogate_or_strict')
+        learned_prompts = connection._learned_prompts if connection._is_prompt_stable(command) else None
+        connection._matched_prompt = None
+        connection._history.append(command + b'\r')
+        self.channel.sendall(command + b'\r')
+
+        recv = bytearray()
+        tail = pending = b''
+        deadline = self.loop.time() + timeout
+        while True:
+            data = await self.recv(deadline)
+            if not data:
+                raise AnsibleConnectionFailure('cli session has been closed by the remote device')
+            tail, pending = connection._append_chunk(recv, tail, pending, data)
+            if connection._find_prompt(tail + pending, learned_prompts):
+                # no chunk follows the prompt, add the bytes held back for it
+                recv += pending.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+                connection._learned_prompts.add(connection._matched_prompt.strip())
+                return to_text(connection._sanitize(recv, command), errors='surrogate_or_strict')
+
+    async def recv(self, deadline):
+        """Returns the next chunk received, waiting on the channel without a thread"""
+        while True:
+            try:
+                return self.channel.recv(65536)
+            except socket.timeout:
+                pass
+
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                raise AnsibleConnectionFailure('timeout waiting for the prompt of %s'
+                                               % self.connection._play_context.remote_addr)
+            # the channel signals buffered data on a pipe, only watch it while
+            # waiting so data arriving between commands does not spin the loop
+            ready = self.loop.create_future()
+            fd = self.channel.fileno()
+            self.loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+            try:
+                await asyncio.wait_for(ready, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.loop.remove_reader(fd)
+
+
+async def run_host(params, commands, executor, semaphore, timeout, factory):
+    """Returns the result of running ``commands`` on the host of the ``open`` parameters"""
+    loop = asyncio.get_event_loop()
+    result = dict(host=params.get('name') or params['host'], failed=False, stdout=list())
+    async with semaphore:
+        start = loop.time()
+        connection = None
+        try:
+            connection = await loop.run_in_executor(executor, factory, params)
+            result['login_time'] = loop.time() - start
+            shell = FleetShell(connection, loop)
+            for command in commands:
+                result['stdout'].append(await shell.send(command, timeout))
+        except Exception as e:
+            result.update(failed=True, msg=to_text(e))
+        finally:
+            if connection:
+                await loop.run_in_executor(executor, close_connection, connection)
+        result['elapsed'] = loop.time() - start
+    log.debug('%s: %s in %.2fs', result['host'], 'failed' if result['failed'] else 'ok', result['elapsed'])
+    return result
+
+
+def close_connection(connection):
+    try:
+        connection.close()
+    except Exception as e:
+        log.warning('%s: error closing connection: %s', connection._play_context.remote_addr, e)
+
+
+async def fan_out(hosts, commands, concurrency, connect_workers, timeout, factory):
+    semaphore = asyncio.Semaphore(concurrency)
+    with ThreadPoolExecutor(max_workers=connect_workers) as executor:
+        return await asyncio.gather(*[run_host(params, commands, executor, semaphore, timeout, factory)
+                                      for params in hosts])
+
+
+def run_fleet(hosts, commands, concurrency=200, connect_workers=32, timeout=30, factory=None):
+    """Runs ``commands`` on every host and returns the per host results in order
+
+    :arg hosts: List of ``open`` parameters of the session broker, one per host.
+    :arg commands: Commands to run on every host, in order.
+    :kwarg concurrency: Hosts logged into at the same time.
+    :kwarg connect_workers: Threads logging into hosts.
+    :kwarg timeout: Seconds to wait for the prompt after each command.
+    :kwarg factory: Returns a connected connection for ``open`` parameters,
+        called from the connect threads.
+    """
+    if factory is None:
+        # the plugin loaders are not thread-safe, the connect threads only
+        # create connections of the classes loaded here
+        connection_class = None
+        for network_os in sorted(set(params.get('network_os') or 'sgos' for params in hosts)):
+            connection_class = load_plugins(network_os)
+        factory = partial(new_connection, connection_class=connection_class)
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(fan_out(hosts, commands, concurrency, connect_workers, timeout, factory))
+    finally:
+        loop.close()
+
+
+def inventory_hosts(sources, limit=None):
+    """Returns the ``open`` parameters of the inventory hosts matching ``limit``"""
+    from ansible.inventory.manager import InventoryManager
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.template import Templar
+    from ansible.vars.manager import VariableManager
+
+    loader = DataLoader()
+    inventory = InventoryManager(loader=loader, sources=sources)
+    variable_manager = VariableManager(loader=loader, inventory=inventory)
+
+    hosts = list()
+    for host in inventory.get_hosts(limit or 'all'):
+        hostvars = variable_manager.get_vars(host=host)
+        templar = Templar(loader=loader, variables=hostvars)
+        params = dict(name=host.name)
+        for key, names in HOST_VARS:
+            for name in names:
+                if hostvars.get(name) is not None:
+                    params[key] = templar.template(hostvars[name])
+                    break
+        params.setdefault('host', host.name)
+        hosts.append(params)
+    return hosts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-i', '--inventory', action='append', required=True, help='inventory source, may be repeated')
+    parser.add_argument('-l', '--limit', help='host pattern, default all')
+    parser.add_argument('-c', '--command', action='append', required=True, dest='commands',
+                        help='command to run, may be repeated')
+    parser.add_argument('--concurrency', type=int, default=200, help='hosts handled at once, default %(default)s')
+    parser.add_argument('--connect-workers', type=int, default=32,
+                        help='threads logging into hosts, default %(default)s')
+    parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for a response, default %(default)s')
+    parser.add_argument('--output', help='write the results to this file instead of stdout')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s %(levelname)s %(message)s')
+    hosts = inventory_hosts(args.inventory, args.limit)
+    for params in hosts:
+        params['options'] = dict(persistent_command_timeout=int(args.timeout))
+
+    start = time.time()
+    results = run_fleet(hosts, args.commands, args.concurrency, args.connect_workers, args.timeout)
+    failed = [result['host'] for result in results if result['failed']]
+    log.info('%d hosts in %.1fs, %d failed', len(results), time.time() - start, len(failed))
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        json.dump(dict(results=results, failed=failed), output, indent=2)
+        output.write('\n')
+    finally:
+        if args.output:
+            output.close()
+    sys.exit(2 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -271,22 +271,339 @@ options:
           key: network_cli_retries
     vars:
         - name: ansible_network_cli_retries
+  broker_socket:
+    type: path
+    description:
+      - Path of the Unix socket of a session broker (C(bin/sgos_broker.py)) to run commands
+        through instead of connecting to the remote device. The broker keeps authenticated
+        sessions open between playbook runs, so a run attaching to a warm session skips the
+        SSH connect, login, C(enable) and terminal initialisation.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_BROKER_SOCKET
+    ini:
+        - section: persistent_connection
+          key: broker_socket
+    vars:
+        - name: ansible_network_cli_broker_socket
+  keepalive_interval:
+    type: int
+    description:
+      - Interval, in seconds, to send SSH keepalive messages on the transport at, so idle
+        sessions are not dropped by firewalls and a dead transport is noticed between tasks.
+        C(0) disables keepalives.
+    default: 0
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_KEEPALIVE_INTERVAL
+    ini:
+        - section: persistent_connection
+          key: keepalive_interval
+    vars:
+        - name: ansible_network_cli_keepalive_interval
+  ssh_ciphers:
+    type: list
+    description:
+      - Ciphers to prefer, in order, when the SSH transport is negotiated, for example
+        C(aes128-gcm@openssh.com) for bulk transfers on appliances with AES acceleration.
+        The other ciphers paramiko supports are still offered after them.
+      - The C(ssh_*) algorithm, window and packet size options need paramiko 3.2 or later.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SSH_CIPHERS
+    ini:
+        - section: persistent_connection
+          key: ssh_ciphers
+    vars:
+        - name: ansible_network_cli_ssh_ciphers
+  ssh_kex:
+    type: list
+    description:
+      - Key exchange algorithms to prefer, in order, when the SSH transport is negotiated.
+        The other algorithms paramiko supports are still offered after them.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SSH_KEX
+    ini:
+        - section: persistent_connection
+          key: ssh_kex
+    vars:
+        - name: ansible_network_cli_ssh_kex
+  ssh_macs:
+    type: list
+    description:
+      - MAC algorithms to prefer, in order, when the SSH transport is negotiated.
+        The other algorithms paramiko supports are still offered after them.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SSH_MACS
+    ini:
+        - section: persistent_connection
+          key: ssh_macs
+    vars:
+        - name: ansible_network_cli_ssh_macs
+  ssh_compression:
+    type: boolean
+    description:
+      - Request zlib compression of the SSH transport. Large, repetitive outputs such as
+        C(show configuration) transfer faster over slow links, at the cost of CPU on both ends.
+    default: False
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SSH_COMPRESSION
+    ini:
+        - section: persistent_connection
+          key: ssh_compression
+    vars:
+        - name: ansible_network_cli_ssh_compression
+  ssh_window_size:
+    type: int
+    description:
+      - Window size, in bytes, of the shell channels. A larger window lets the appliance send
+        more of a large response before waiting for the window to be adjusted, which matters
+        on links with a high latency. Defaults to the paramiko default of 2 MB.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SSH_WINDOW_SIZE
+    ini:
+        - section: persistent_connection
+          key: ssh_window_size
+    vars:
+        - name: ansible_network_cli_ssh_window_size
+  ssh_max_packet_size:
+    type: int
+    description:
+      - Maximum packet size, in bytes, of the shell channels. Defaults to the paramiko default
+        of 32 KB.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SSH_MAX_PACKET_SIZE
+    ini:
+        - section: persistent_connection
+          key: ssh_max_packet_size
+    vars:
+        - name: ansible_network_cli_ssh_max_packet_size
+  ssh_auth_cache:
+    type: path
+    description:
+      - Path of a JSON file to cache authentication results in, keyed by an HMAC of the host,
+        port, user and credentials. With the cache an authentication failure is not retried,
+        and connections with the same credentials fail at once for C(ssh_auth_cache_ttl)
+        seconds instead of trying the appliance again and risking an account lockout.
+      - The HMAC secret is generated on first use and kept in I(ssh_auth_cache).key, readable
+        by its owner only. Without it the keys in the cache cannot be used to test passwords.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SSH_AUTH_CACHE
+    ini:
+        - section: persistent_connection
+          key: ssh_auth_cache
+    vars:
+        - name: ansible_network_cli_ssh_auth_cache
+  ssh_auth_cache_ttl:
+    type: int
+    description:
+      - Seconds an authentication failure in C(ssh_auth_cache) is used for.
+    default: 300
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SSH_AUTH_CACHE_TTL
+    ini:
+        - section: persistent_connection
+          key: ssh_auth_cache_ttl
+    vars:
+        - name: ansible_network_cli_ssh_auth_cache_ttl
+  reconnect:
+    type: boolean
+    description:
+      - Open a new cli session when the remote device has closed the current one, for example
+        after the idle timeout of the appliance. The session is checked before every command and
+        is replaced if the command is outside configuration mode. When the session is closed
+        while a command runs, the command is only run again if it is a read-only C(show) command.
+    default: True
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_RECONNECT
+    ini:
+        - section: persistent_connection
+          key: reconnect
+    vars:
+        - name: ansible_network_cli_reconnect
+  channels:
+    type: int
+    description:
+      - Number of shell channels to open on the SSH transport of the connection. Independent
+        read-only C(show) commands, such as the commands of a facts run or of a C(sgos_command)
+        task, are spread over the channels and run in parallel.
+      - The additional channels are opened, and initialised by the terminal plugin, the first
+        time commands are run in parallel. The appliance limits the number of sessions, channels
+        it refuses are left out.
+      - Commands are sent over a single channel through the session broker and on session replay.
+    default: 1
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_CHANNELS
+    ini:
+        - section: persistent_connection
+          key: channels
+    vars:
+        - name: ansible_network_cli_channels
+  response_cache:
+    type: list
+    description:
+      - Regular expressions of read-only commands whose responses are cached for the lifetime of
+        the persistent connection, for example C(^show version$) or C(^show advanced-url ). Later
+        tasks running a cached command get the response without a device round trip.
+      - Commands with prompts are never cached. The cache is cleared when a configuration is
+        applied, when a command other than a C(show) command is run and when the prompt
+        changes, e.g. on entering or leaving enable mode.
+      - No responses are cached when empty.
+    default: []
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_RESPONSE_CACHE
+    ini:
+        - section: persistent_connection
+          key: response_cache
+    vars:
+        - name: ansible_network_cli_response_cache
+  response_cache_ttl:
+    type: int
+    description:
+      - Seconds a response stays in the response cache.
+    default: 60
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_RESPONSE_CACHE_TTL
+    ini:
+        - section: persistent_connection
+          key: response_cache_ttl
+    vars:
+        - name: ansible_network_cli_response_cache_ttl
+  response_cache_size:
+    type: int
+    description:
+      - Maximum number of responses in the response cache, the least recently used ones are
+        dropped first.
+    default: 128
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_RESPONSE_CACHE_SIZE
+    ini:
+        - section: persistent_connection
+          key: response_cache_size
+    vars:
+        - name: ansible_network_cli_response_cache_size
+  session_capture:
+    type: path
+    description:
+      - Path of a file to append the raw bytes received from the remote device to, exactly
+        as they were read from the SSH channel. Unlike C(persistent_log_messages) nothing is
+        formatted or decoded, so the capture has no per chunk overhead beyond the write.
+      - Be sure to fully understand the security implications of enabling this
+        option as it could create a security vulnerability by logging sensitive information in the file.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SESSION_CAPTURE
+    ini:
+        - section: persistent_connection
+          key: session_capture
+    vars:
+        - name: ansible_network_cli_session_capture
+  profile_dir:
+    type: path
+    description:
+      - Directory to write a cProfile stats file and a tracemalloc snapshot of the persistent
+        connection to when it is closed. Only the time spent in C(send) and C(receive) is profiled.
+      - The same environment variable enables profiling of the sgos modules.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_SGOS_PROFILE_DIR
+    vars:
+        - name: ansible_sgos_profile_dir
+  session_record:
+    type: path
+    description:
+      - Path of a file to record the session to. Every chunk sent to and received from the remote
+        device is written as a JSON object per line with its time offset from the start of the
+        session, so the session can be played back with C(session_replay). The file is
+        overwritten when the connection is opened.
+      - Be sure to fully understand the security implications of enabling this
+        option as it could create a security vulnerability by logging sensitive information in the file.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SESSION_RECORD
+    vars:
+        - name: ansible_network_cli_session_record
+  session_replay:
+    type: path
+    description:
+      - Path of a session recorded with C(session_record) to play back instead of connecting to
+        the remote device. The received chunks are fed through the receive loop with their recorded
+        boundaries and timing, and commands sent must match the recording.
+      - Use it to reproduce and benchmark device behaviour offline.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SESSION_REPLAY
+    vars:
+        - name: ansible_network_cli_session_replay
+  session_replay_speed:
+    type: float
+    description:
+      - Speed factor to play back C(session_replay) at. C(1.0) reproduces the recorded timing,
+        C(10.0) plays back ten times faster and C(0) does not wait at all.
+    default: 1.0
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_SESSION_REPLAY_SPEED
+    vars:
+        - name: ansible_network_cli_session_replay_speed
+  timing_log:
+    type: path
+    description:
+      - Path of a file to append per command timing records to, one JSON object per line.
+        Each record has the connect and login time of the session or, for commands, the
+        command send time, time to first byte, time to prompt, time spent waiting for more
+        data after the prompt matched, bytes received, number of receive windows and the
+        time spent matching prompt regexes.
+      - Aggregate histograms per command for the current session are also available from
+        the C(get_timing_stats) method of the persistent connection.
+      - Be sure to fully understand the security implications of enabling this
+        option as the command strings sent to the device are written to the file.
+    version_added: '2.9'
+    env:
+        - name: ANSIBLE_NETWORK_CLI_TIMING_LOG
+    ini:
+        - section: persistent_connection
+          key: timing_log
+    vars:
+        - name: ansible_network_cli_timing_log
 """
 
+import copy
+import cProfile
+import errno
 import getpass
+import hashlib
+import hmac
 import json
 import logging
 import re
 import os
 import signal
 import socket
+import tempfile
+import threading
 import time
 import traceback
-from io import BytesIO
+from base64 import b64decode, b64encode
+from functools import wraps
 
-from ansible.errors import AnsibleConnectionFailure
+from ansible.errors import AnsibleAuthenticationFailure, AnsibleConnectionFailure
 from ansible.module_utils.six import PY3
 from ansible.module_utils.six.moves import cPickle
+from ansible.module_utils.six.moves.queue import Empty, Queue
+from ansible.module_utils.connection import recv_data, send_data
 from ansible.module_utils.network.common.utils import to_list
 from ansible.module_utils._text import to_bytes, to_text
 from ansible.playbook.play_context import PlayContext
@@ -294,10 +611,297 @@ from ansible.plugins.connection import NetworkConnectionBase, ensure_connect
 from ansible.plugins.loader import cliconf_loader, terminal_loader, connection_loader
 
 
+# upper bounds, in seconds, of the timing histogram buckets
+TIMING_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+# ANSI sequences start with ESC or backspace; one left in the last ANSI_HOLD
+# bytes of a stripped chunk may be the start of a sequence split across
+# chunks, so it is held back and stripped again with the next chunk
+ANSI_HOLD = 16
+ANSI_START_RE = re.compile(b'[\x08\x1b]')
+
+WHITESPACE = frozenset(b' \t\n\r\x0b\x0c')
+
+# commands, or abbreviations of them, that change the prompt outside of
+# configuration mode
+MODE_COMMANDS = (b'enable', b'disable', b'configure', b'exit', b'end')
+
+# commands that are safe to run again on a new session
+READ_ONLY_COMMAND_RE = re.compile(br'^\s*show\b', re.I)
+
+# options passed on to the session broker for the sessions it opens
+BROKER_OPTIONS = ('persistent_command_timeout', 'persistent_connect_timeout', 'network_cli_retries',
+                  'host_key_auto_add', 'keepalive_interval', 'reconnect', 'ssh_ciphers', 'ssh_kex', 'ssh_macs',
+                  'ssh_compression', 'ssh_window_size', 'ssh_max_packet_size')
+
+# options tuning the SSH transport, applied through a paramiko transport_factory
+TRANSPORT_OPTIONS = ('ssh_ciphers', 'ssh_kex', 'ssh_macs', 'ssh_window_size', 'ssh_max_packet_size')
+
+# SSHClient.connect takes a transport_factory since paramiko 3.2
+TRANSPORT_FACTORY_VERSION = (3, 2)
+
+
+def to_newlines(data):
+    ''' Converts \\r\\n and \\r line endings to \\n '''
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return data
+
+
+def paramiko_version():
+    ''' Returns the major and minor version of paramiko '''
+    import paramiko
+    return tuple(int(part) for part in re.findall(r'\d+', paramiko.__version__)[:2])
+
+
+def transport_factory(ciphers=None, kex=None, macs=None, window_size=None, max_packet_size=None):
+    '''
+    Returns a paramiko SSHClient transport_factory preferring the given
+    algorithms and using the given channel window and packet sizes
+    '''
+    import paramiko
+
+    preferences = (('ciphers', ciphers, paramiko.Transport._cipher_info),
+                   ('kex', kex, paramiko.Transport._kex_info),
+                   ('digests', macs, paramiko.Transport._mac_info))
+    for name, preferred, supported in preferences:
+        unsupported = [algorithm for algorithm in preferred or () if algorithm not in supported]
+        if unsupported:
+            raise AnsibleConnectionFailure('unsupported SSH %s: %s' % (name, ', '.join(unsupported)))
+
+    def factory(sock, **kwargs):
+        if window_size:
+            kwargs['default_window_size'] = window_size
+        if max_packet_size:
+            kwargs['default_max_packet_size'] = max_packet_size
+        transport = paramiko.Transport(sock, **kwargs)
+        options = transport.get_security_options()
+        for name, preferred, supported in preferences:
+            if preferred:
+                offered = getattr(options, name)
+                setattr(options, name, tuple(preferred) + tuple(algorithm for algorithm in offered if algorithm not in preferred))
+        return transport
+    return factory
+
+
+class AuthCache(object):
+    ''' Authentication failures of host, user and credentials, kept in a JSON file '''
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+
+    def _secret(self):
+        '''
+        Returns the HMAC secret of the cache, creating it on first use
+        '''
+        secret_path = '%s.key' % self.path
+        if not os.path.exists(secret_path):
+            # written to a private temporary file and linked into place, so
+            # concurrent connections agree on the first secret written
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(secret_path)))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(b64encode(os.urandom(32)))
+                os.link(tmp_path, secret_path)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            finally:
+                os.remove(tmp_path)
+        with open(secret_path, 'rb') as f:
+            return b64decode(f.read())
+
+    def key(self, play_context):
+        return hmac.new(self._secret(), to_bytes(json.dumps([
+            play_context.remote_addr, play_context.port, play_context.remote_user, play_context.password,
+            play_context.private_key_file]), errors='surrogate_or_strict'), hashlib.sha256).hexdigest()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return dict()
+
+    def failure(self, key):
+        '''
+        Returns the message of a cached authentication failure for ``key``
+        '''
+        entry = self._load().get(key)
+        if entry and time.time() - entry['time'] < self.ttl:
+            return entry['msg']
+
+    def record(self, key, msg):
+        '''
+        Records an authentication failure for ``key``, dropping the expired ones
+        '''
+        now = time.time()
+        entries = dict((k, entry) for k, entry in self._load().items() if now - entry['time'] < self.ttl)
+        entries[key] = dict(msg=msg, time=now)
+        # replace the file so concurrent connections never read half of it
+        tmp_path = '%s.%d' % (self.path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.rename(tmp_path, self.path)
+
+
 class AnsibleCmdRespRecv(Exception):
     pass
 
 
+class SessionRecorder(object):
+    ''' Records the chunks sent and received on a shell channel '''
+
+    def __init__(self, channel, path):
+        self._channel = channel
+        self._file = open(path, 'w')
+        self._start = time.time()
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+    def _record(self, direction, data):
+        self._file.write(json.dumps(dict(t=time.time() - self._start, dir=direction,
+                                         data=to_text(b64encode(data)))) + '\n')
+
+    def recv(self, nbytes):
+        data = self._channel.recv(nbytes)
+        self._record('recv', data)
+        return data
+
+    def sendall(self, data):
+        self._record('send', data)
+        return self._channel.sendall(data)
+
+    def close(self):
+        self._file.close()
+        return self._channel.close()
+
+
+class SessionReplay(object):
+    ''' Plays back a session recorded by SessionRecorder as a shell channel '''
+
+    def __init__(self, path, speed=1.0):
+        with open(path) as f:
+            self._events = [json.loads(line) for line in f if line.strip()]
+        for event in self._events:
+            event['data'] = b64decode(event['data'])
+        self._speed = speed
+        self._index = 0
+        self._pending = b''
+        self._timeout = None
+        # wall clock time and recorded time of the last event played back
+        self._anchor = (time.time(), 0.0)
+
+    def _next(self, direction):
+        if self._index < len(self._events) and self._events[self._index]['dir'] == direction:
+            event = self._events[self._index]
+            self._index += 1
+            return event
+
+    def recv(self, nbytes):
+        if not self._pending:
+            event = self._next('recv')
+            if event is None:
+                # nothing more was received before the next send or the end of
+                # the recording, so wait for input as the device would
+                time.sleep(self._timeout or 0)
+                raise socket.timeout()
+
+            if self._speed:
+                delay = self._anchor[0] + (event['t'] - self._anchor[1]) / self._speed - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            self._anchor = (time.time(), event['t'])
+            self._pending = event['data']
+
+        data, self._pending = self._pending[:nbytes], self._pending[nbytes:]
+        return data
+
+    def sendall(self, data):
+        while data:
+            event = self._next('send')
+            if event is None:
+                raise AnsibleConnectionFailure('session replay diverged, unexpected send of %r' % data)
+            expected = event['data']
+            if not data.startswith(expected) and not expected.startswith(data):
+                raise AnsibleConnectionFailure('session replay diverged, sent %r but recorded %r' % (data, expected))
+            if expected.startswith(data) and len(expected) > len(data):
+                # sent in smaller pieces than recorded
+                event = dict(event, data=expected[len(data):])
+                self._index -= 1
+                self._events[self._index] = event
+                data = b''
+            else:
+                data = data[len(expected):]
+            self._anchor = (time.time(), event['t'])
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+
+    def gettimeout(self):
+        return self._timeout
+
+    def close(self):
+        self._index = len(self._events)
+
+
+def to_broker(value):
+    ''' Converts a prompt or answer, a byte string or a list of them, to text for the broker '''
+    if isinstance(value, list):
+        return [to_text(item, errors='surrogate_or_strict') for item in value]
+    if value is not None:
+        return to_text(value, errors='surrogate_or_strict')
+    return None
+
+
+class BrokerClient(object):
+    ''' JSON-RPC client of the session broker '''
+
+    def __init__(self, path):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(path)
+        except socket.error as e:
+            self._socket.close()
+            raise AnsibleConnectionFailure('unable to connect to session broker at %s: %s' % (path, to_text(e)))
+        self._id = 0
+
+    def call(self, method, **params):
+        self._id += 1
+        request = dict(jsonrpc='2.0', method=method, params=params, id=self._id)
+        send_data(self._socket, to_bytes(json.dumps(request)))
+        response = recv_data(self._socket)
+        if response is None:
+            raise AnsibleConnectionFailure('session broker closed the connection')
+
+        response = json.loads(to_text(response, errors='surrogate_or_strict'))
+        if 'error' in response:
+            raise AnsibleConnectionFailure(response['error']['message'])
+        return response['result']
+
+    def close(self):
+        self._socket.close()
+
+
+def profile(func):
+    @wraps(func)
+    def wrapped(self, *args, **kwargs):
+        profiler = self._get_profiler()
+        if not profiler or self._profile_depth:
+            return func(self, *args, **kwargs)
+
+        self._profile_depth += 1
+        profiler.enable()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            profiler.disable()
+            self._profile_depth -= 1
+    return wrapped
+
+
 class Connection(NetworkConnectionBase):
     ''' CLI (shell) SSH connections on Paramiko '''
 
@@ -312,9 +916,20 @@ class Connection(NetworkConnectionBase):
         self._matched_prompt = None
         self._matched_cmd_prompt = None
         self._matched_pattern = None
+        self._learned_prompts = set()
         self._last_response = None
         self._history = list()
         self._command_response = None
+        self._last_timing = None
+        self._timing_stats = dict()
+        self._timing_log = None
+        self._session_capture = None
+        self._profiler = None
+        self._profile_depth = 0
+        self._tracemalloc_started = False
+        self._broker = None
+        self._channels = None
+        self._timing_lock = threading.Lock()
 
         self._terminal = None
         self.cliconf = None
@@ -356,8 +971,9 @@ class Connection(NetworkConnectionBase):
         # this try..except block is just to handle the transition to supporting
         # network_cli as a toplevel connection.  Once connection=local is gone,
         # this block can be removed as well and all calls passed directly to
-        # the local connection
-        if self._ssh_shell:
+        # the local connection. Under a broker there is no local shell, the
+        # commands are sent through send as well
+        if self._ssh_shell or self._broker:
             try:
                 cmd = json.loads(to_text(cmd, errors='surrogate_or_strict'))
                 kwargs = {'command': to_bytes(cmd['command'], errors='surrogate_or_strict')}
@@ -406,67 +1022,154 @@ class Connection(NetworkConnectionBase):
         Connects to the remote device and starts the terminal
         '''
         if not self.connected:
-            self.paramiko_conn = connection_loader.get('paramiko', self._play_context, '/dev/null')
-            self.paramiko_conn._set_log_channel(self._get_log_channel())
-            self.paramiko_conn.set_options(direct={'look_for_keys': not bool(self._play_context.password and not self._play_context.private_key_file)})
-            self.paramiko_conn.force_persistence = self.force_persistence
-
             command_timeout = self.get_option('persistent_command_timeout')
-            max_pause = min([self.get_option('persistent_connect_timeout'), command_timeout])
-            retries = self.get_option('network_cli_retries')
-            total_pause = 0
-
-            for attempt in range(retries + 1):
-                try:
-                    ssh = self.paramiko_conn._connect()
-                    break
-                except Exception as e:
-                    pause = 2 ** (attempt + 1)
-                    if attempt == retries or total_pause >= max_pause:
-                        raise AnsibleConnectionFailure(to_text(e, errors='surrogate_or_strict'))
-                    else:
-                        msg = (u"network_cli_retry: attempt: %d, caught exception(%s), "
-                               u"pausing for %d seconds" % (attempt + 1, to_text(e, errors='surrogate_or_strict'), pause))
-
-                        self.queue_message('vv', msg)
-                        time.sleep(pause)
-                        total_pause += pause
-                        continue
+            connect_start = time.time()
+
+            broker_socket = self.get_option('broker_socket')
+            if broker_socket:
+                self._connect_broker(os.path.expanduser(broker_socket))
+                self._record_timing(dict(event='connect', connect_time=time.time() - connect_start, login_time=0.0))
+                return self
+
+            session_replay = self.get_option('session_replay')
+            if session_replay:
+                self.queue_message('vvvv', 'replaying session from %s' % session_replay)
+                self._ssh_shell = SessionReplay(os.path.expanduser(session_replay), self.get_option('session_replay_speed'))
+                self._connected = True
+                login_start = time.time()
+            else:
+                self.paramiko_conn = connection_loader.get('paramiko', self._play_context, '/dev/null')
+                self.paramiko_conn._set_log_channel(self._get_log_channel())
+                self.paramiko_conn.set_options(direct={'look_for_keys': not bool(self._play_context.password and not self._play_context.private_key_file)})
+                self.paramiko_conn.force_persistence = self.force_persistence
+
+                self._tune_transport()
+
+                max_pause = min([self.get_option('persistent_connect_timeout'), command_timeout])
+                retries = self.get_option('network_cli_retries')
+                total_pause = 0
+
+                auth_cache = self._get_auth_cache()
+                auth_key = auth_cache.key(self._play_context) if auth_cache else None
+                if auth_cache:
+                    failure = auth_cache.failure(auth_key)
+                    if failure:
+                        raise AnsibleAuthenticationFailure('%s (cached in %s)' % (failure, auth_cache.path))
+
+                for attempt in range(retries + 1):
+                    try:
+                        ssh = self.paramiko_conn._connect()
+                        break
+                    except Exception as e:
+                        if auth_cache and isinstance(e, AnsibleAuthenticationFailure):
+                            # the same credentials fail the same way again
+                            auth_cache.record(auth_key, to_text(e, errors='surrogate_or_strict'))
+                            raise
+                        pause = 2 ** (attempt + 1)
+                        if attempt == retries or total_pause >= max_pause:
+                            raise AnsibleConnectionFailure(to_text(e, errors='surrogate_or_strict'))
+                        else:
+                            msg = (u"network_cli_retry: attempt: %d, caught exception(%s), "
+                                   u"pausing for %d seconds" % (attempt + 1, to_text(e, errors='surrogate_or_strict'), pause))
+
+                            self.queue_message('vv', msg)
+                            time.sleep(pause)
+                            total_pause += pause
+                            continue
+
+                keepalive_interval = self.get_option('keepalive_interval')
+                if keepalive_interval:
+                    ssh.ssh.get_transport().set_keepalive(keepalive_interval)
+
+                self.queue_message('vvvv', 'ssh connection done, setting terminal')
+                self._connected = True
+                login_start = time.time()
+
+                self._ssh_shell = ssh.ssh.invoke_shell()
+
+            session_record = self.get_option('session_record')
+            if session_record:
+                self.queue_message('vvvv', 'recording session to %s' % session_record)
+                self._ssh_shell = SessionRecorder(self._ssh_shell, os.path.expanduser(session_record))
+            self._open_shell()
 
-            self.queue_message('vvvv', 'ssh connection done, setting terminal')
-            self._connected = True
+            self.queue_message('vvvv', 'ssh connection has completed successfully')
+            self._record_timing(dict(event='connect', connect_time=login_start - connect_start,
+                                     login_time=time.time() - login_start))
 
-            self._ssh_shell = ssh.ssh.invoke_shell()
-            self._ssh_shell.settimeout(command_timeout)
+        return self
 
-            self.queue_message('vvvv', 'loaded terminal plugin for network_os %s' % self._network_os)
+    def _tune_transport(self):
+        '''
+        Passes the SSH transport tuning options on to paramiko
 
-            terminal_initial_prompt = self.get_option('terminal_initial_prompt') or self._terminal.terminal_initial_prompt
-            terminal_initial_answer = self.get_option('terminal_initial_answer') or self._terminal.terminal_initial_answer
-            newline = self.get_option('terminal_inital_prompt_newline') or self._terminal.terminal_inital_prompt_newline
-            check_all = self.get_option('terminal_initial_prompt_checkall') or False
+        The paramiko connection plugin takes the extra SSHClient.connect
+        arguments from _parse_proxy_command, so the tuning is added there.
+        '''
+        connect_args = dict()
+        if self.get_option('ssh_compression'):
+            connect_args['compress'] = True
+        tuning = [self.get_option(option) for option in TRANSPORT_OPTIONS]
+        if any(tuning):
+            if paramiko_version() < TRANSPORT_FACTORY_VERSION:
+                # an unknown connect argument would only fail in the retry loop
+                import paramiko
+                raise AnsibleConnectionFailure('%s require paramiko %s or later, found %s' % (
+                    ', '.join(option for option, value in zip(TRANSPORT_OPTIONS, tuning) if value),
+                    '.'.join(str(part) for part in TRANSPORT_FACTORY_VERSION), paramiko.__version__))
+            connect_args['transport_factory'] = transport_factory(*tuning)
+        if not connect_args:
+            return
+
+        parse_proxy_command = self.paramiko_conn._parse_proxy_command
+
+        def tuned_connect_args(port=22):
+            args = parse_proxy_command(port)
+            args.update(connect_args)
+            return args
+        self.paramiko_conn._parse_proxy_command = tuned_connect_args
+
+    def _get_auth_cache(self):
+        auth_cache = self.get_option('ssh_auth_cache')
+        if auth_cache:
+            return AuthCache(os.path.expanduser(auth_cache), self.get_option('ssh_auth_cache_ttl'))
+
+    def _open_shell(self):
+        '''
+        Waits for the initial prompt on the shell channel and starts the terminal
+        '''
+        self._ssh_shell.settimeout(self.get_option('persistent_command_timeout'))
 
-            self.receive(prompts=terminal_initial_prompt, answer=terminal_initial_answer, newline=newline, check_all=check_all)
+        self.queue_message('vvvv', 'loaded terminal plugin for network_os %s' % self._network_os)
 
-            self.queue_message('vvvv', 'firing event: on_open_shell()')
-            self._terminal.on_open_shell()
+        terminal_initial_prompt = self.get_option('terminal_initial_prompt') or self._terminal.terminal_initial_prompt
+        terminal_initial_answer = self.get_option('terminal_initial_answer') or self._terminal.terminal_initial_answer
+        newline = self.get_option('terminal_inital_prompt_newline') or self._terminal.terminal_inital_prompt_newline
+        check_all = self.get_option('terminal_initial_prompt_checkall') or False
 
-            if self._play_context.become and self._play_context.become_method == 'enable':
-                self.queue_message('vvvv', 'firing event: on_become')
-                auth_pass = self._play_context.become_pass
-                self._terminal.on_become(passwd=auth_pass)
+        self.receive(prompts=terminal_initial_prompt, answer=terminal_initial_answer, newline=newline, check_all=check_all)
 
-            self.queue_message('vvvv', 'ssh connection has completed successfully')
+        self.queue_message('vvvv', 'firing event: on_open_shell()')
+        self._terminal.on_open_shell()
 
-        return self
+        if self._play_context.become and self._play_context.become_method == 'enable':
+            self.queue_message('vvvv', 'firing event: on_become')
+            auth_pass = self._play_context.become_pass
+            self._terminal.on_become(passwd=auth_pass)
 
     def close(self):
         '''
         Close the active connection to the device
         '''
+        if self._broker:
+            # the session stays open in the broker for the next run
+            self._broker.close()
+            self._broker = None
+            self._connected = False
         # only close the connection if its connected.
         if self._connected:
             self.queue_message('debug', "closing ssh connection to device")
+            self._close_channels()
             if self._ssh_shell:
                 self.queue_message('debug', "firing event: on_close_shell()")
                 self._terminal.on_close_shell()
@@ -474,21 +1177,38 @@ class Connection(NetworkConnectionBase):
                 self._ssh_shell = None
                 self.queue_message('debug', "cli session is now closed")
 
-                self.paramiko_conn.close()
-                self.paramiko_conn = None
+                if self.paramiko_conn:
+                    self.paramiko_conn.close()
+                    self.paramiko_conn = None
                 self.queue_message('debug', "ssh connection has been closed successfully")
+        if self._timing_log:
+            self._timing_log.close()
+            self._timing_log = None
+        if self._session_capture:
+            self._session_capture.close()
+            self._session_capture = None
+        if self._profiler:
+            self._dump_profile()
         super(Connection, self).close()
 
+    @profile
     def receive(self, command=None, prompts=None, answer=None, newline=True, prompt_retry_check=False, check_all=False):
         '''
         Handles receiving of output from command
         '''
+        learned_prompts = self._learned_prompts if self._is_prompt_stable(command) else None
         self._matched_prompt = None
         self._matched_cmd_prompt = None
-        recv = BytesIO()
+        # the response is stripped and its line endings converted as it
+        # arrives, so it is assembled in a single buffer; tail keeps the
+        # last stripped bytes as received for matching prompts
+        recv = bytearray()
+        tail = pending = b''
         handled = False
         command_prompt_matched = False
         matched_prompt_window = window_count = 0
+        timing = self._last_timing = dict(bytes=0, windows=0, buffer_wait=0.0, match_time=0.0)
+        start = time.time()
 
         # set terminal regex values for command prompt and errors in response
         self._terminal_stderr_re = self._get_terminal_std_re('terminal_stderr_re')
@@ -503,42 +1223,64 @@ class Connection(NetworkConnectionBase):
         buffer_read_timeout = self.get_option('persistent_buffer_read_timeout')
         self._validate_timeout_value(buffer_read_timeout, "persistent_buffer_read_timeout")
 
-        self._log_messages("command: %s" % command)
+        capture = self._get_session_capture()
+
+        self._log_messages("command: %s", command)
         while True:
             if command_prompt_matched:
                 try:
-                    signal.signal(signal.SIGALRM, self._handle_buffer_read_timeout)
-                    signal.setitimer(signal.ITIMER_REAL, buffer_read_timeout)
-                    data = self._ssh_shell.recv(256)
-                    signal.alarm(0)
-                    self._log_messages("response-%s: %s" % (window_count + 1, data))
+                    wait_start = time.time()
+                    if threading.current_thread().name == 'MainThread':
+                        signal.signal(signal.SIGALRM, self._handle_buffer_read_timeout)
+                        signal.setitimer(signal.ITIMER_REAL, buffer_read_timeout)
+                        data = self._ssh_shell.recv(256)
+                        signal.alarm(0)
+                    else:
+                        # signals are only delivered to the main thread, the
+                        # shell channels used by other threads wait on the
+                        # channel timeout instead
+                        data = self._recv_quiet(buffer_read_timeout, command_timeout)
+                    timing['buffer_wait'] += time.time() - wait_start
+                    self._log_messages("response-%s: %s", window_count + 1, data)
                     # if data is still received on channel it indicates the prompt string
                     # is wrongly matched in between response chunks, continue to read
                     # remaining response.
                     command_prompt_matched = False
 
                     # restart command_timeout timer
-                    signal.signal(signal.SIGALRM, self._handle_command_timeout)
-                    signal.alarm(command_timeout)
+                    if threading.current_thread().name == 'MainThread':
+                        signal.signal(signal.SIGALRM, self._handle_command_timeout)
+                        signal.alarm(command_timeout)
 
                 except AnsibleCmdRespRecv:
+                    timing['buffer_wait'] += time.time() - wait_start
                     # reset socket timeout to global timeout
                     self._ssh_shell.settimeout(cache_socket_timeout)
+                    self._learned_prompts.add(self._matched_prompt.strip())
                     return self._command_response
             else:
                 data = self._ssh_shell.recv(256)
-                self._log_messages("response-%s: %s" % (window_count + 1, data))
+                self._log_messages("response-%s: %s", window_count + 1, data)
             # when a channel stream is closed, received data will be empty
             if not data:
-                break
+                if command_prompt_matched:
+                    self._ssh_shell.settimeout(cache_socket_timeout)
+                    return self._command_response
+                raise AnsibleConnectionFailure('cli session has been closed by the remote device')
+
+            if capture:
+                capture.write(data)
 
-            recv.write(data)
-            offset = recv.tell() - 256 if recv.tell() > 256 else 0
-            recv.seek(offset)
+            if not timing['bytes']:
+                timing['first_byte'] = time.time() - start
+            timing['bytes'] += len(data)
 
-            window = self._strip(recv.read())
+            tail, pending = self._append_chunk(recv, tail, pending, data)
+            window = tail + pending
             window_count += 1
+            timing['windows'] = window_count
 
+            match_start = time.time()
             if prompts and not handled:
                 handled = self._handle_prompt(window, prompts, answer, True, False, check_all)
                 matched_prompt_window = window_count
@@ -549,18 +1291,24 @@ class Connection(NetworkConnectionBase):
                 if self._handle_prompt(window, prompts, answer, newline, prompt_retry_check, check_all):
                     raise AnsibleConnectionFailure("For matched prompt '%s', answer is not valid" % self._matched_cmd_prompt)
 
-            if self._find_prompt(window):
-                self._last_response = recv.getvalue()
-                resp = self._strip(self._last_response)
-                self._command_response = self._sanitize(resp, command)
+            prompt_matched = self._find_prompt(window, learned_prompts)
+            timing['match_time'] += time.time() - match_start
+            if prompt_matched:
+                timing['prompt'] = time.time() - start
+                recv += to_newlines(pending)
+                tail = (tail + pending)[-256:]
+                pending = b''
+                self._command_response = self._last_response = self._sanitize(recv, command)
                 if buffer_read_timeout == 0.0:
                     # reset socket timeout to global timeout
                     self._ssh_shell.settimeout(cache_socket_timeout)
+                    self._learned_prompts.add(self._matched_prompt.strip())
                     return self._command_response
                 else:
                     command_prompt_matched = True
 
     @ensure_connect
+    @profile
     def send(self, command, prompt=None, answer=None, newline=True, sendonly=False, prompt_retry_check=False, check_all=False):
         '''
         Sends the command to the device in the opened shell
@@ -570,21 +1318,332 @@ class Connection(NetworkConnectionBase):
             answer_len = len(to_list(answer))
             if prompt_len != answer_len:
                 raise AnsibleConnectionFailure("Number of prompts (%s) is not same as that of answers (%s)" % (prompt_len, answer_len))
+
+        if self._broker:
+            return self._send_broker(command, prompt, answer, newline, sendonly, prompt_retry_check, check_all)
+
+        if not self._is_alive():
+            # nothing has been sent yet, so a command outside configuration
+            # mode runs the same on a new session
+            if not self._can_reconnect(command, sent=False):
+                raise AnsibleConnectionFailure('cli session to %s has been closed by the remote device'
+                                               % self._play_context.remote_addr)
+            self._reconnect('cli session has been closed by the remote device')
+
+        try:
+            return self._send(command, prompt, answer, newline, sendonly, prompt_retry_check, check_all)
+        except AnsibleConnectionFailure:
+            if self._is_alive() or not self._can_reconnect(command, sent=True):
+                raise
+            self._reconnect('cli session was closed while running %s' % to_text(command, errors='surrogate_or_strict'))
+            return self._send(command, prompt, answer, newline, sendonly, prompt_retry_check, check_all)
+
+    @ensure_connect
+    def send_parallel(self, commands):
+        '''
+        Sends independent read-only commands over the shell channels of the
+        connection and returns their responses in order
+
+        Each channel takes the next command when it is done with the last
+        one. A command that fails has its AnsibleConnectionFailure in place
+        of the response, so the caller decides whether to raise it.
+        '''
+        results = [None] * len(commands)
+        pending = Queue()
+        for index, command in enumerate(commands):
+            pending.put((index, command))
+
+        def run(channel):
+            while True:
+                try:
+                    index, command = pending.get_nowait()
+                except Empty:
+                    return
+                try:
+                    results[index] = channel.send(command)
+                except AnsibleConnectionFailure as e:
+                    if channel is not self and not channel._is_alive():
+                        # leave the command to the main channel, which is
+                        # the only one allowed to reconnect
+                        return
+                    results[index] = e
+
+        channels = self._get_channels() if len(commands) > 1 else [self]
+        threads = [threading.Thread(target=run, args=(channel,)) for channel in channels[1:]]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        # the main channel stays in this thread, where the
+        # persistent_buffer_read_timeout signal can be delivered
+        run(self)
+        for thread in threads:
+            thread.join()
+
+        if self._channels:
+            self._channels = [channel for channel in self._channels if channel._is_alive()]
+        for index, result in enumerate(results):
+            if result is None:
+                try:
+                    results[index] = self.send(commands[index])
+                except AnsibleConnectionFailure as e:
+                    results[index] = e
+        return results
+
+    def _get_channels(self):
+        '''
+        Returns the shell channels to spread commands over, the connection
+        itself first, opening the additional ones on first use
+        '''
+        if not self.paramiko_conn or self._broker or self.get_option('session_replay'):
+            return [self]
+
+        if self._channels is None:
+            self._channels = list()
+            threads = [threading.Thread(target=self._open_channel) for i in range(self.get_option('channels') - 1)]
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.queue_message('vvvv', 'opened %d additional shell channels' % len(self._channels))
+        return [self] + self._channels
+
+    def _open_channel(self):
+        '''
+        Opens another shell channel on the SSH transport and adds a copy of
+        the connection sending to it to the channels
+        '''
+        channel = copy.copy(self)
+        # only the main channel reconnects, captures the session and profiles
+        channel._options = dict(self._options, reconnect=False, session_capture=None, profile_dir=None)
+        channel._channels = channel._ssh_shell = None
+        channel._learned_prompts = set(self._learned_prompts)
+        channel._matched_prompt = channel._matched_cmd_prompt = channel._matched_pattern = None
+        channel._last_response = channel._command_response = channel._last_timing = None
+        channel._history = list()
+        channel._timing_log = channel._session_capture = channel._profiler = None
+        channel._profile_depth = 0
+        channel._terminal = type(self._terminal)(channel)
+
+        try:
+            shell = self.paramiko_conn.ssh.get_transport().open_session()
+            shell.get_pty()
+            shell.invoke_shell()
+            channel._ssh_shell = shell
+            channel._open_shell()
+        except Exception as e:
+            self.queue_message('vvvv', 'unable to open another shell channel: %s' % to_text(e, errors='surrogate_or_strict'))
+            if channel._ssh_shell:
+                channel._ssh_shell.close()
+            return
+        self._channels.append(channel)
+
+    def _close_channels(self):
+        for channel in self._channels or ():
+            try:
+                channel._terminal.on_close_shell()
+                channel._ssh_shell.close()
+            except Exception:
+                pass
+            if channel._timing_log:
+                channel._timing_log.close()
+        self._channels = None
+
+    def _recv_quiet(self, quiet_timeout, command_timeout):
+        '''
+        Reads the next chunk after the prompt matched, raises
+        AnsibleCmdRespRecv if nothing arrives within ``quiet_timeout``
+        '''
+        self._ssh_shell.settimeout(quiet_timeout)
+        try:
+            return self._ssh_shell.recv(256)
+        except socket.timeout:
+            raise AnsibleCmdRespRecv()
+        finally:
+            self._ssh_shell.settimeout(command_timeout)
+
+    def _send(self, command, prompt, answer, newline, sendonly, prompt_retry_check, check_all):
         try:
             cmd = b'%s' % command
             if newline:
               cmd += b'\r'
             self._history.append(cmd)
+            start = time.time()
             self._ssh_shell.sendall(cmd)
-            self._log_messages('send command: %s' % cmd)
+            send_time = time.time() - start
+            self._log_messages('send command: %s', cmd)
             if sendonly:
                 return
             response = self.receive(command, prompt, answer, newline, prompt_retry_check, check_all)
+            timing = dict(self._last_timing)
+            timing.update(event='command', command=to_text(command, errors='surrogate_or_strict'),
+                          send_time=send_time, total_time=time.time() - start)
+            self._record_timing(timing)
             return to_text(response, errors='surrogate_or_strict')
         except (socket.timeout, AttributeError):
             self.queue_message('error', traceback.format_exc())
             raise AnsibleConnectionFailure("timeout value %s seconds reached while trying to send command: %s"
                                            % (self._ssh_shell.gettimeout(), command.strip()))
+        except socket.error as e:
+            raise AnsibleConnectionFailure("error while trying to send command %s: %s" % (command.strip(), to_text(e)))
+
+    def _connect_broker(self, path):
+        '''
+        Attaches to a session for the remote device in the session broker
+        '''
+        self.queue_message('vvvv', 'attaching to session broker at %s' % path)
+        self._broker = BrokerClient(path)
+        pc = self._play_context
+        result = self._broker.call('open', host=pc.remote_addr, port=pc.port, username=pc.remote_user,
+                                   password=pc.password, private_key_file=pc.private_key_file,
+                                   become=pc.become, become_method=pc.become_method, become_pass=pc.become_pass,
+                                   network_os=self._network_os,
+                                   options=dict((option, self.get_option(option)) for option in BROKER_OPTIONS))
+        self._matched_prompt = to_bytes(result['prompt'], errors='surrogate_or_strict')
+        self._connected = True
+        self.queue_message('vvvv', 'attached to %s session %s' % ('warm' if result['warm'] else 'new', result['session']))
+
+    def _send_broker(self, command, prompt, answer, newline, sendonly, prompt_retry_check, check_all):
+        result = self._broker.call('send', command=to_text(command, errors='surrogate_or_strict'),
+                                   prompt=to_broker(prompt), answer=to_broker(answer), newline=newline, sendonly=sendonly,
+                                   prompt_retry_check=prompt_retry_check, check_all=check_all)
+        self._matched_prompt = to_bytes(result['prompt'], errors='surrogate_or_strict')
+        return result['response']
+
+    def _is_alive(self):
+        '''
+        Returns False when the shell channel or the SSH transport has been closed
+        '''
+        if self._ssh_shell is None:
+            return False
+        if getattr(self._ssh_shell, 'closed', False) or getattr(self._ssh_shell, 'eof_received', False):
+            return False
+        if self.paramiko_conn:
+            transport = self.paramiko_conn.ssh.get_transport()
+            return bool(transport and transport.is_active())
+        return True
+
+    def _can_reconnect(self, command, sent):
+        '''
+        Returns True if ``command`` may be run on a new session
+
+        Once a command has been sent only read-only commands are run again,
+        the device may have acted on anything else. Before that a new session
+        is only equivalent outside configuration mode.
+        '''
+        if not self.get_option('reconnect') or self.get_option('session_replay') or not command:
+            return False
+        if sent:
+            return bool(READ_ONLY_COMMAND_RE.match(command))
+        return not self._matched_prompt or b'(' not in self._matched_prompt
+
+    def _reconnect(self, reason):
+        '''
+        Replaces the closed cli session with a new one
+        '''
+        self.queue_message('vvvv', '%s, reconnecting' % reason)
+        self._close_channels()
+        for resource in (self._ssh_shell, self.paramiko_conn):
+            try:
+                if resource:
+                    resource.close()
+            except Exception:
+                pass
+        self._ssh_shell = None
+        self.paramiko_conn = None
+        self._matched_prompt = None
+        self._connected = False
+        self._connect()
+
+    def get_timing_stats(self):
+        """Returns the timing histograms of the current session
+
+        The histograms are keyed by command; the C(connect) key holds the
+        connect time of the session. Bucket I(i) counts the samples less
+        than or equal to C(buckets[i]) seconds.
+        """
+        return dict(host=self._play_context.remote_addr,
+                    buckets=[str(bound) for bound in TIMING_BUCKETS],
+                    histograms=self._timing_stats)
+
+    def _record_timing(self, timing):
+        if timing['event'] == 'connect':
+            key, elapsed = 'connect', timing['connect_time'] + timing['login_time']
+        else:
+            # one histogram per command, keyed by the first line so inline
+            # blocks and long commands do not explode the key space
+            key, elapsed = timing['command'].strip().split('\n')[0][:80], timing['total_time']
+
+        # the shell channels of the connection share the histograms
+        with self._timing_lock:
+            stats = self._timing_stats.get(key)
+            if stats is None:
+                stats = self._timing_stats[key] = dict(count=0, total=0.0, max=0.0, counts=[0] * len(TIMING_BUCKETS))
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            for index, bound in enumerate(TIMING_BUCKETS):
+                if elapsed <= bound:
+                    stats['counts'][index] += 1
+                    break
+
+        timing_log = self.get_option('timing_log')
+        if timing_log:
+            if not self._timing_log:
+                self._timing_log = open(os.path.expanduser(timing_log), 'a')
+            timing.update(timestamp=time.time(), host=self._play_context.remote_addr, pid=os.getpid())
+            self._timing_log.write(json.dumps(timing) + '\n')
+            self._timing_log.flush()
+
+    def _log_messages(self, message, *args):
+        """Queues a log message when persistent_log_messages is enabled
+
+        ``message`` is only formatted with ``args`` once it is known to be
+        logged, so callers in the receive loop do not pay for formatting
+        large responses when logging is off.
+        """
+        if self.get_option('persistent_log_messages'):
+            if args:
+                message = message % args
+            self.queue_message('log', message)
+
+    def _get_session_capture(self):
+        session_capture = self.get_option('session_capture')
+        if session_capture and not self._session_capture:
+            self._session_capture = open(os.path.expanduser(session_capture), 'ab', 0)
+        return self._session_capture
+
+    def _get_profiler(self):
+        if self._profiler is None and self.get_option('profile_dir'):
+            try:
+                import tracemalloc
+                # left running when it was started outside the connection
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._tracemalloc_started = True
+            except ImportError:
+                pass
+            self._profiler = cProfile.Profile()
+        return self._profiler
+
+    def _dump_profile(self):
+        profile_dir = os.path.expanduser(self.get_option('profile_dir'))
+        if not os.path.isdir(profile_dir):
+            os.makedirs(profile_dir)
+        prefix = os.path.join(profile_dir, 'sgos_network_cli-%s-%s-%d' % (self._play_context.remote_addr, os.getpid(), time.time()))
+
+        self._profiler.dump_stats('%s.pstats' % prefix)
+        self._profiler = None
+        try:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                tracemalloc.take_snapshot().dump('%s.tracemalloc' % prefix)
+            if self._tracemalloc_started:
+                tracemalloc.stop()
+                self._tracemalloc_started = False
+        except ImportError:
+            pass
+        self.queue_message('vvvv', 'connection profile written to %s.pstats' % prefix)
 
     def _handle_buffer_read_timeout(self, signum, frame):
         self.queue_message('vvvv', "Response received, triggered 'persistent_buffer_read_timeout' timer of %s seconds" %
@@ -605,6 +1664,24 @@ class Connection(NetworkConnectionBase):
             data = regex.sub(b'', data)
         return data
 
+    def _append_chunk(self, recv, tail, pending, data):
+        '''
+        Strips the chunk ``data`` received after the ``pending`` bytes and
+        appends its complete part to ``recv``
+
+        Returns the new tail and pending bytes. The start of an ANSI sequence
+        or a \\r at the end of the chunk stays pending until the next chunk
+        shows how it ends.
+        '''
+        data = self._strip(pending + data if pending else data)
+        hold = ANSI_START_RE.search(data, max(0, len(data) - ANSI_HOLD))
+        split = hold.start() if hold else len(data)
+        if data[split - 1:split] == b'\r':
+            # the \n of a \r\n may be in the next chunk
+            split -= 1
+        recv += to_newlines(data[:split])
+        return (tail + data[:split])[-256:], data[split:]
+
     def _handle_prompt(self, resp, prompts, answer, newline, prompt_retry_check=False, check_all=False):
         '''
         Matches the command prompt and responds
@@ -630,7 +1707,7 @@ class Connection(NetworkConnectionBase):
             match = regex.search(resp)
             if match:
                 self._matched_cmd_prompt = match.group()
-                self._log_messages("matched command prompt: %s" % self._matched_cmd_prompt)
+                self._log_messages("matched command prompt: %s", self._matched_cmd_prompt)
 
                 # if prompt_retry_check is enabled to check if same prompt is
                 # repeated don't send answer again.
@@ -640,7 +1717,7 @@ class Connection(NetworkConnectionBase):
                     if newline:
                         self._ssh_shell.sendall(b'\r')
                         prompt_answer += b'\r'
-                    self._log_messages("matched command prompt answer: %s" % prompt_answer)
+                    self._log_messages("matched command prompt answer: %s", prompt_answer)
                 if check_all and prompts and not single_prompt:
                     prompts.pop(0)
                     answer.pop(0)
@@ -651,22 +1728,100 @@ class Connection(NetworkConnectionBase):
     def _sanitize(self, resp, command=None):
         '''
         Removes elements from the response before returning to the caller
+
+        Finds the echoed command and the lines containing the matched prompt
+        in a single regex pass and joins the rest of the response from
+        memoryview slices, so the response is copied once.
         '''
-        cleaned = []
-        for line in resp.splitlines():
-            if command and line.strip() == command.strip():
-                continue
+        removed = []
+        command = command.strip() if command else b''
+        if command and b'\n' not in command and b'\r' not in command:
+            # a line that is the echoed command, ignoring surrounding whitespace
+            removed.append(br'[ \t\x0b\x0c]*%s[ \t\x0b\x0c]*' % re.escape(command))
+        prompts = [re.escape(prompt.strip()) for prompt in self._matched_prompt.strip().splitlines() if prompt.strip()]
+        if prompts:
+            # a line containing the prompt
+            removed.append(br'[^\n]*(?:%s)[^\n]*' % b'|'.join(prompts))
+
+        resp = to_newlines(resp)
+        view = memoryview(resp)
+        pieces = []
+        start = 0
+        if removed:
+            for match in re.finditer(br'(?m)^(?:%s)$\n?' % b'|'.join(removed), resp):
+                pieces.append(view[start:match.start()])
+                start = match.end()
+        pieces.append(view[start:])
+
+        # strip the slices rather than the joined response to save a copy
+        while pieces:
+            start = 0
+            while start < len(pieces[0]) and pieces[0][start] in WHITESPACE:
+                start += 1
+            if start < len(pieces[0]):
+                pieces[0] = pieces[0][start:]
+                break
+            pieces.pop(0)
+        while pieces:
+            end = len(pieces[-1])
+            while end and pieces[-1][end - 1] in WHITESPACE:
+                end -= 1
+            if end:
+                pieces[-1] = pieces[-1][:end]
+                break
+            pieces.pop()
+        return b''.join(pieces)
 
-            for prompt in self._matched_prompt.strip().splitlines():
-                if prompt.strip() in line:
-                    break
-            else:
-                cleaned.append(line)
-        return b'\n'.join(cleaned).strip()
+    def _is_prompt_stable(self, command):
+        '''
+        Returns True if ``command`` is known to leave the current prompt alone
 
-    def _find_prompt(self, response):
+        That is a command other than enable, disable, configure, exit or end
+        sent outside configuration mode at a prompt that has been learned.
+        '''
+        prompt = self._matched_prompt
+        if not command or not prompt or b'(' in prompt or prompt.strip() not in self._learned_prompts:
+            return False
+        word = command.split(None, 1)[0].lower() if command.strip() else b''
+        return not any(mode_command.startswith(word) for mode_command in MODE_COMMANDS)
+
+    def _find_learned_prompt(self, response, learned_prompts):
+        '''
+        Returns the learned prompt the response ends with, or None
+
+        The prompt must start a word, like the prompt regexes require.
+        '''
+        for prompt in learned_prompts:
+            if response.endswith(prompt):
+                start = len(response) - len(prompt)
+                if not start or response[start - 1] in WHITESPACE:
+                    return prompt
+        return None
+
+    def _find_prompt(self, response, learned_prompts=None):
         '''Searches the buffered response for a matching command prompt
+
+        When the literal prompts seen so far are passed in ``learned_prompts``
+        only the end of the response is compared against them, which does not
+        false match on output that looks like a prompt; the terminal regexes
+        are used while the prompt may change.
         '''
+        if learned_prompts:
+            prompt = self._find_learned_prompt(response, learned_prompts)
+            if prompt is None:
+                return False
+
+            self._matched_pattern = None
+            self._matched_prompt = prompt
+            # like the regex path only the window before the prompt is
+            # checked, output lines may look like errors
+            for regex in self._terminal_stderr_re:
+                if regex.search(response):
+                    self._log_messages("matched error regex '%s' from response '%s'", regex.pattern, response)
+                    raise AnsibleConnectionFailure(response)
+            self._log_messages("matched learned cli prompt '%s' from response '%s'", prompt, response)
+            return True
+
         errored_response = None
         is_error_message = False
 
@@ -682,7 +1837,7 @@ class Connection(NetworkConnectionBase):
                         errored_response = response
                         self._matched_pattern = regex.pattern
                         self._matched_prompt = match.group()
-                        self._log_messages("matched error regex '%s' from response '%s'" % (self._matched_pattern, errored_response))
+                        self._log_messages("matched error regex '%s' from response '%s'", self._matched_pattern, errored_response)
                         break
 
         if not is_error_message:
@@ -691,7 +1846,7 @@ class Connection(NetworkConnectionBase):
                 if match:
                     self._matched_pattern = regex.pattern
                     self._matched_prompt = match.group()
-                    self._log_messages("matched cli prompt '%s' with regex '%s' from response '%s'" % (self._matched_prompt, self._matched_pattern, response))
+                    self._log_messages("matched cli prompt '%s' with regex '%s' from response '%s'", self._matched_prompt, self._matched_pattern, response)
                     if not errored_response:
                         return True
 